@@ -6,6 +6,7 @@ from app.core.config import settings
 from app.services.cost_calculator import CostCalculator
 from app.db.clickhouse import get_client as get_ch_client
 from app.services.wallet_service import WalletService 
+from app.services.balance_publisher import BalancePublisher
 
 logger = logging.getLogger("event_processor")
 
@@ -18,6 +19,7 @@ class EventProcessor:
         self.cost_calculator = CostCalculator()
         self.ch_client = get_ch_client()
         self.wallet_service = WalletService()
+        self.balance_publisher = BalancePublisher(self.redis)
 
     async def setup(self):
         """Create Consumer Group if not exists"""
@@ -89,7 +91,7 @@ class EventProcessor:
         """
         1. Calculate Cost
         2. Deduct from Wallet
-        3. Save Metrics to ClickHouse
+        3. Save Metrics to ClickHouse (per call + per model route)
         """
         try:
             # 1. Calculate
@@ -100,8 +102,16 @@ class EventProcessor:
             tenant_id = data.get('tenant_id')
             call_id = data.get('call_id')
             # 2. Billing (Execute Deduction)
+            new_balance = None
             if tenant_id and total_cost > 0:
-                await self.wallet_service.deduct_balance(tenant_id, total_cost, call_id)
+                new_balance = await self.wallet_service.deduct_balance(tenant_id, total_cost, call_id)
+
+            # 2b. Live credit view: new balance in, the call's running estimate out of the in-flight hash
+            if tenant_id:
+                try:
+                    await self.balance_publisher.settle(tenant_id, call_id, new_balance)
+                except Exception as e:
+                    logger.error(f"Failed to publish balance for {tenant_id}: {e}")
             
             # await self.wallet_service.deduct_balance(tenant_id, total_cost, call_id)
             logger.info(f"💰 Billing Tenant {tenant_id}: ${total_cost:.4f}")
@@ -123,5 +133,30 @@ class EventProcessor:
                 ]],
                 column_names=['call_id', 'tenant_id', 'agent_id', 'start_time', 'end_time', 'duration_seconds', 'status', 'cost', 'end_reason', 'sentiment_score']
             )
+
+            # 4. Latency / cost by model route
+            route_rows = [
+                [
+                    call_id,
+                    tenant_id,
+                    data.get('agent_id'),
+                    data.get('end_time'),
+                    route,
+                    int(data.get(f'llm_{route}_turns', 0)),
+                    int(data.get(f'llm_{route}_input_tokens', 0)),
+                    int(data.get(f'llm_{route}_output_tokens', 0)),
+                    int(data.get(f'llm_{route}_cached_input_tokens', 0)),
+                    float(data.get(f'llm_{route}_first_token_avg_ms', 0)),
+                    cost_details['breakdown'][f'llm_{route}']
+                ]
+                for route in ("fast", "large")
+                if int(data.get(f'llm_{route}_turns', 0))
+            ]
+            if route_rows:
+                self.ch_client.insert(
+                    'llm_route_metrics',
+                    route_rows,
+                    column_names=['call_id', 'tenant_id', 'agent_id', 'end_time', 'route', 'turns', 'input_tokens', 'output_tokens', 'cached_input_tokens', 'first_token_avg_ms', 'cost']
+                )
         except Exception as e:
             logger.error(f"Failed to process call_ended: {e}")
\ No newline at end of file
@@ -26,11 +26,23 @@ class Settings(BaseSettings):
     PRICE_STT_PER_MIN: float = 0.043 # Deepgram Nova-2
     PRICE_LLM_INPUT_1K: float = 0.005 # GPT-4o
     PRICE_LLM_OUTPUT_1K: float = 0.015
+    PRICE_LLM_FAST_INPUT_1K: float = 0.00015 # GPT-4o mini (voice engine's fast route)
+    PRICE_LLM_FAST_OUTPUT_1K: float = 0.0006
     PRICE_TTS_1K_CHARS: float = 0.18 # ElevenLabs Turbo
     PRICE_TWILIO_PER_MIN: float = 0.014
     
     PROFIT_MARGIN_PERCENT: float = 0.20 # 20% Markup
 
+    # Live credit view for the Voice Engine's cost meter (Redis)
+    BALANCE_REFRESH_SECONDS: int = 60 # Full refresh; billed calls update their tenant immediately
+    BALANCE_KEY_TTL: int = 600 # A stopped worker's balances expire (the engine then fails open)
+
+    # Observability (Prometheus scrape port + event loop monitor)
+    METRICS_PORT: int = 9100
+    LOOP_MONITOR_INTERVAL_MS: int = 50
+    LOOP_SLOW_CALLBACK_MS: int = 100 # Stalls longer than this are reported with the blocking stack
+    LOOP_STALL_STACK_DEPTH: int = 15
+
     class Config:
         env_file = ".env"
 
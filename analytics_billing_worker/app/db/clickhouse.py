@@ -37,7 +37,27 @@ def init_clickhouse():
         ORDER BY (tenant_id, start_time)
         """)
         
-        # 2. Transcripts (Many rows per call)
+        # 2. LLM usage per model route (fast/large), one row per route used in a call
+        client.command("""
+        CREATE TABLE IF NOT EXISTS llm_route_metrics (
+            call_id String,
+            tenant_id String,
+            agent_id String,
+            end_time DateTime,
+            route String,
+            turns UInt32,
+            input_tokens UInt32,
+            output_tokens UInt32,
+            cached_input_tokens UInt32,
+            first_token_avg_ms Float32,
+            cost Float32
+        ) ENGINE = MergeTree()
+        ORDER BY (tenant_id, agent_id, route, end_time)
+        """)
+        # Tables created before prompt-cache tracking
+        client.command("ALTER TABLE llm_route_metrics ADD COLUMN IF NOT EXISTS cached_input_tokens UInt32 DEFAULT 0 AFTER output_tokens")
+
+        # 3. Transcripts (Many rows per call)
         client.command("""
         CREATE TABLE IF NOT EXISTS transcript_logs (
             call_id String,
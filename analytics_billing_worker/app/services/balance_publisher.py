@@ -0,0 +1,68 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.postgres import AsyncSessionLocal
+from app.services.cost_calculator import CostCalculator
+
+logger = logging.getLogger("balance_publisher")
+
+# Read by the Voice Engine's live cost meter (voice_stream_engine/app/services/cost_meter.py)
+RATE_CARD_KEY = "billing:rate_card"
+
+
+def balance_key(tenant_id: str) -> str:
+    return f"billing:balance:{tenant_id}"
+
+
+def inflight_key(tenant_id: str) -> str:
+    """Hash: call_id -> the running call's live estimate (written by the engine's cost meter)."""
+    return f"billing:inflight:{tenant_id}"
+
+
+class BalancePublisher:
+    """
+    Keeps the Voice Engine's view of pricing and credit in Redis:
+    - the rate card (same prices CostCalculator bills with),
+    - every tenant's credit balance, refreshed every BALANCE_REFRESH_SECONDS
+      and right after each call is billed.
+    When a call is billed, its entry leaves the tenant's in-flight hash in the
+    same transaction that stores the new balance, so the engine never sees the
+    spend counted twice or not at all.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def publish_rate_card(self):
+        await self.redis.set(RATE_CARD_KEY, json.dumps(CostCalculator.rate_card()))
+
+    async def refresh_balances(self):
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(text("SELECT id, credit_balance FROM tenants"))
+            rows = result.all()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tenant_id, balance in rows:
+                pipe.set(balance_key(str(tenant_id)), float(balance or 0), ex=settings.BALANCE_KEY_TTL)
+            await pipe.execute()
+        logger.info(f"💳 Published balances for {len(rows)} tenants")
+
+    async def settle(self, tenant_id: str, call_id: Optional[str], new_balance: Optional[float]):
+        """Call billed: new balance in, the call's live estimate out."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if new_balance is not None:
+                pipe.set(balance_key(tenant_id), new_balance, ex=settings.BALANCE_KEY_TTL)
+            if call_id:
+                pipe.hdel(inflight_key(tenant_id), call_id)
+            await pipe.execute()
+
+    async def run(self):
+        while True:
+            try:
+                await self.publish_rate_card()
+                await self.refresh_balances()
+            except Exception as e:
+                logger.error(f"Failed to publish balances: {e}")
+            await asyncio.sleep(settings.BALANCE_REFRESH_SECONDS)
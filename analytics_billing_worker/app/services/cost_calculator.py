@@ -1,6 +1,19 @@
 from app.core.config import settings
 
 class CostCalculator:
+    @staticmethod
+    def rate_card() -> dict:
+        """Prices as published for the Voice Engine's live cost estimate (keep in step with calculate())."""
+        return {
+            "per_minute": settings.PRICE_STT_PER_MIN + settings.PRICE_TWILIO_PER_MIN,
+            "llm_input_1k": settings.PRICE_LLM_INPUT_1K,
+            "llm_output_1k": settings.PRICE_LLM_OUTPUT_1K,
+            "llm_fast_input_1k": settings.PRICE_LLM_FAST_INPUT_1K,
+            "llm_fast_output_1k": settings.PRICE_LLM_FAST_OUTPUT_1K,
+            "tts_1k_chars": settings.PRICE_TTS_1K_CHARS,
+            "margin": settings.PROFIT_MARGIN_PERCENT,
+        }
+
     async def calculate(self, data: dict) -> dict:
         """
         Input: Raw usage stats (duration, tokens).
@@ -14,12 +27,17 @@ class CostCalculator:
         # 2. Telephony Cost (Twilio)
         twilio_cost = duration_min * settings.PRICE_TWILIO_PER_MIN
         
-        # 3. LLM Cost (OpenAI)
+        # 3. LLM Cost (OpenAI), priced per model route; tokens not on the fast route pay large-model prices
         input_tokens = int(data.get("input_tokens", 0))
         output_tokens = int(data.get("output_tokens", 0))
-        
-        llm_cost = (input_tokens / 1000 * settings.PRICE_LLM_INPUT_1K) + \
-                   (output_tokens / 1000 * settings.PRICE_LLM_OUTPUT_1K)
+        fast_input = int(data.get("llm_fast_input_tokens", 0))
+        fast_output = int(data.get("llm_fast_output_tokens", 0))
+
+        llm_fast_cost = (fast_input / 1000 * settings.PRICE_LLM_FAST_INPUT_1K) + \
+                        (fast_output / 1000 * settings.PRICE_LLM_FAST_OUTPUT_1K)
+        llm_large_cost = (max(0, input_tokens - fast_input) / 1000 * settings.PRICE_LLM_INPUT_1K) + \
+                         (max(0, output_tokens - fast_output) / 1000 * settings.PRICE_LLM_OUTPUT_1K)
+        llm_cost = llm_fast_cost + llm_large_cost
         
         # 4. TTS Cost (ElevenLabs)
         tts_chars = int(data.get("tts_characters", 0))
@@ -37,6 +55,8 @@ class CostCalculator:
                 "stt": stt_cost,
                 "twilio": twilio_cost,
                 "llm": llm_cost,
+                "llm_fast": llm_fast_cost,
+                "llm_large": llm_large_cost,
                 "tts": tts_cost,
                 "margin": total_cost - raw_cost
             }
@@ -1,14 +1,15 @@
 import uuid
 import logging
+from typing import Optional
 from sqlalchemy import text
 from app.db.postgres import AsyncSessionLocal
 
 logger = logging.getLogger("wallet")
 
 class WalletService:
-    async def deduct_balance(self, tenant_id: str, amount: float, reference_id: str):
+    async def deduct_balance(self, tenant_id: str, amount: float, reference_id: str) -> Optional[float]:
         """
-        Atomic transaction to deduct funds.
+        Atomic transaction to deduct funds. Returns the new balance (None if the tenant is unknown).
         """
         async with AsyncSessionLocal() as session:
             async with session.begin(): # Start Transaction
@@ -23,7 +24,7 @@ class WalletService:
                     
                     if current_balance is None:
                         logger.error(f"Tenant {tenant_id} not found.")
-                        return
+                        return None
 
                     # 2. Update Balance
                     new_balance = float(current_balance) - amount
@@ -47,6 +48,7 @@ class WalletService:
                     )
                     
                     logger.info(f"✅ Deducted ${amount:.4f} from Tenant {tenant_id}. New Balance: ${new_balance:.4f}")
+                    return new_balance
                 
                 except Exception as e:
                     logger.error(f"Wallet Transaction Failed: {e}")
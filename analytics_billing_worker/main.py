@@ -1,6 +1,8 @@
 import asyncio
 import logging
+from prometheus_client import start_http_server
 from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
 from app.consumers.event_processor import EventProcessor
 from app.db.clickhouse import init_clickhouse
 
@@ -11,16 +13,26 @@ logger = logging.getLogger("worker")
 async def main():
     logger.info("🚀 Starting Analytics & Billing Worker...")
     
-    # 1. Initialize Analytics DB
+    # 1. Metrics + event loop monitor (blocking DB calls show up as stalls)
+    start_http_server(settings.METRICS_PORT)
+    loop_monitor.start()
+
+    # 2. Initialize Analytics DB
     init_clickhouse()
     
-    # 2. Start Event Processor
+    # 3. Start Event Processor
     processor = EventProcessor()
+
+    # 4. Rate card + tenant balances for the Voice Engine's live cost meter
+    balance_task = asyncio.create_task(processor.balance_publisher.run())
     
     try:
         await processor.start_consuming()
     except KeyboardInterrupt:
         logger.info("Stopping worker...")
+    finally:
+        balance_task.cancel()
+        await loop_monitor.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,458 @@
+"""
+Local stand-ins for Deepgram, ElevenLabs, OpenAI and Twilio SMS, for load tests without provider cost.
+
+One server speaks all four protocols:
+    ws   /v1/listen                                  Deepgram live (linear16 in, Results/SpeechStarted out)
+    ws   /v1/text-to-speech/{voice_id}/stream-input  ElevenLabs stream-input (text in, PCM audio out)
+    post /v1/chat/completions                        OpenAI chat completions (SSE streaming, tools, usage)
+    post /v1/embeddings                              OpenAI embeddings (random unit vectors)
+    post /2010-04-01/Accounts/{sid}/Messages.json    Twilio Messages API (SMS tool outbox)
+    get  /stats                                      Request/failure counters
+
+Point the voice engine at it:
+    DEEPGRAM_URL=http://fakes:9000  OPENAI_BASE_URL=http://fakes:9000/v1  ELEVENLABS_WS_URL=ws://fakes:9000
+    SMS_API_URL=http://fakes:9000
+
+Behaviour comes from a JSON scenario (see DEFAULT_SCENARIO) with latency distributions:
+    {"dist": "fixed", "ms": 150}
+    {"dist": "uniform", "min_ms": 100, "max_ms": 300}
+    {"dist": "lognormal", "median_ms": 150, "p95_ms": 400}
+
+Usage:
+    python -m app.load_testing.fake_providers --port 9000 [--scenario scenario.json] [--seed 7]
+"""
+import argparse
+import asyncio
+import audioop
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List
+from urllib.parse import parse_qs
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger("fake_providers")
+
+DEFAULT_SCENARIO = {
+    "deepgram": {
+        "speech_rms": 500,             # Caller audio louder than this counts as speech
+        "interim_every_ms": 300,
+        "endpoint_silence_ms": 300,    # Silence that ends an utterance (like endpointing=300)
+        "final_latency": {"dist": "lognormal", "median_ms": 120, "p95_ms": 300},
+        "utterances": ["I'd like to book an appointment for tomorrow.", "Yes, three o'clock works.", "Thank you, goodbye."],
+        "connect_fail_rate": 0.0,      # Refuse the handshake
+        "disconnect_after": None       # Latency dist: drop the socket mid-stream
+    },
+    "openai": {
+        "ttft": {"dist": "lognormal", "median_ms": 350, "p95_ms": 900},
+        "tokens_per_sec": 60,
+        "reply": "Sure, I can help with that. What time works best for you?",
+        # First matching rule (substring of the last user message) calls a tool;
+        # after the tool result comes back, the rule's follow_up is streamed.
+        "tool_script": [
+            {"match": "book", "tool": "check_calendar_availability",
+             "arguments": {"date": "tomorrow", "time": "15:00"},
+             "follow_up": "Good news, three o'clock tomorrow is available. Shall I book it?"}
+        ],
+        "error_rate": 0.0,             # HTTP 500 before streaming
+        "rate_limit_rate": 0.0,        # HTTP 429 before streaming
+        "stall_rate": 0.0,             # Pause mid-stream for stall
+        "stall": {"dist": "fixed", "ms": 5000},
+        # Prompt caching as OpenAI does it: prompts from prompt_cache_min_tokens up reuse the
+        # longest exact prefix (tools + whole messages) seen before, in 128-token increments
+        "prompt_cache": True,
+        "prompt_cache_min_tokens": 1024,
+        # Per-model overrides of the keys above, e.g. a slow primary and a fast hedge model:
+        # {"gpt-4o": {"ttft": {"dist": "fixed", "ms": 3000}}, "gpt-4o-mini": {"tokens_per_sec": 120}}
+        "models": {}
+    },
+    "elevenlabs": {
+        "ttfb": {"dist": "lognormal", "median_ms": 200, "p95_ms": 500},
+        "ms_per_char": 60,             # Audio length per character of text
+        "chunk_ms": 200,
+        "realtime_factor": 4.0,        # Audio generated 4x faster than it plays
+        "error_rate": 0.0              # Close the socket before any audio
+    },
+    "twilio_sms": {
+        "latency": {"dist": "lognormal", "median_ms": 120, "p95_ms": 400},
+        "error_rate": 0.0,             # HTTP 500
+        "rate_limit_rate": 0.0,        # HTTP 429 with Retry-After
+        "retry_after_s": 1
+    }
+}
+
+
+def sample_ms(dist: Dict) -> float:
+    if not dist:
+        return 0.0
+    kind = dist.get("dist", "fixed")
+    if kind == "fixed":
+        return float(dist["ms"])
+    if kind == "uniform":
+        return random.uniform(dist["min_ms"], dist["max_ms"])
+    if kind == "lognormal":
+        mu = math.log(dist["median_ms"])
+        sigma = max(1e-6, (math.log(dist["p95_ms"]) - mu) / 1.645)
+        return random.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    merged = dict(base)
+    for key, value in (override or {}).items():
+        merged[key] = _merge(base[key], value) if isinstance(value, dict) and isinstance(base.get(key), dict) else value
+    return merged
+
+
+def _tone(ms: float, rate: int = 8000) -> bytes:
+    samples = int(rate * ms / 1000)
+    return b"".join(
+        int(3000 * math.sin(2 * math.pi * 220 * i / rate)).to_bytes(2, "little", signed=True)
+        for i in range(samples)
+    )
+
+
+def create_app(scenario: Dict = None) -> FastAPI:
+    config = _merge(DEFAULT_SCENARIO, scenario)
+    app = FastAPI(title="Fake Providers")
+    stats = {
+        "deepgram_sessions": 0, "deepgram_refused": 0, "deepgram_dropped": 0, "deepgram_finals": 0,
+        "openai_requests": 0, "openai_errors": 0, "openai_tool_calls": 0, "openai_cached_tokens": 0,
+        "elevenlabs_sessions": 0, "elevenlabs_errors": 0, "elevenlabs_audio_seconds": 0.0,
+        "sms_requests": 0, "sms_sent": 0, "sms_errors": 0, "sms_by_sender": {},
+    }
+
+    # --- Deepgram live ---
+
+    @app.websocket("/v1/listen")
+    async def deepgram_listen(websocket: WebSocket, sample_rate: int = 8000):
+        dg = config["deepgram"]
+        if random.random() < dg["connect_fail_rate"]:
+            stats["deepgram_refused"] += 1
+            await websocket.close(code=1011)
+            return
+        await websocket.accept()
+        stats["deepgram_sessions"] += 1
+        request_id = str(uuid.uuid4())
+        bytes_per_ms = sample_rate * 2 / 1000
+        drop_at = time.monotonic() + sample_ms(dg["disconnect_after"]) / 1000 if dg["disconnect_after"] else None
+
+        audio_ms = 0.0 # Stream position (Deepgram timestamps are relative to the socket)
+        speech_start = None
+        last_voice = None
+        last_interim = 0.0
+        utterance = 0
+        pending = set()
+
+        def results(text: str, start: float, end: float, is_final: bool) -> str:
+            return json.dumps({
+                "type": "Results", "channel_index": [0, 1],
+                "duration": round((end - start) / 1000, 3), "start": round(start / 1000, 3),
+                "is_final": is_final, "speech_final": is_final,
+                "channel": {"alternatives": [{"transcript": text, "confidence": 0.98, "words": []}]},
+                "metadata": {"request_id": request_id, "model_info": {"name": "fake", "version": "1", "arch": "fake"}, "model_uuid": "fake"},
+            })
+
+        async def send_final(text: str, start: float, end: float):
+            await asyncio.sleep(sample_ms(dg["final_latency"]) / 1000)
+            stats["deepgram_finals"] += 1
+            await websocket.send_text(results(text, start, end, True))
+
+        try:
+            while True:
+                if drop_at and time.monotonic() >= drop_at:
+                    stats["deepgram_dropped"] += 1
+                    await websocket.close(code=1011)
+                    return
+
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text"):
+                    if json.loads(message["text"]).get("type") == "CloseStream":
+                        await websocket.send_text(json.dumps({"type": "Metadata", "request_id": request_id, "duration": audio_ms / 1000, "channels": 1}))
+                        await websocket.close()
+                        return
+                    continue # KeepAlive / Finalize
+                pcm = message.get("bytes") or b""
+                if not pcm:
+                    continue
+
+                chunk_ms = len(pcm) / bytes_per_ms
+                voiced = audioop.rms(pcm, 2) >= dg["speech_rms"]
+                audio_ms += chunk_ms
+                words = dg["utterances"][utterance % len(dg["utterances"])].split()
+
+                if voiced:
+                    if speech_start is None:
+                        speech_start = audio_ms - chunk_ms
+                        await websocket.send_text(json.dumps({"type": "SpeechStarted", "channel": [0], "timestamp": speech_start / 1000}))
+                    last_voice = audio_ms
+                    if audio_ms - last_interim >= dg["interim_every_ms"]:
+                        last_interim = audio_ms
+                        spoken = max(1, min(len(words), int((audio_ms - speech_start) / 250)))
+                        await websocket.send_text(results(" ".join(words[:spoken]), speech_start, audio_ms, False))
+                elif speech_start is not None and audio_ms - last_voice >= dg["endpoint_silence_ms"]:
+                    task = asyncio.create_task(send_final(" ".join(words), speech_start, last_voice))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    speech_start = None
+                    utterance += 1
+        except (WebSocketDisconnect, RuntimeError):
+            return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # --- ElevenLabs stream-input ---
+
+    @app.websocket("/v1/text-to-speech/{voice_id}/stream-input")
+    async def elevenlabs_stream(websocket: WebSocket, voice_id: str, output_format: str = "pcm_8000"):
+        el = config["elevenlabs"]
+        await websocket.accept()
+        stats["elevenlabs_sessions"] += 1
+        if random.random() < el["error_rate"]:
+            stats["elevenlabs_errors"] += 1
+            await websocket.close(code=1011)
+            return
+
+        rate = int(output_format.split("_")[1]) if output_format.startswith("pcm_") else 8000
+        chunk_audio = _tone(el["chunk_ms"], rate)
+        text_chars = 0
+        eos = asyncio.Event()
+        first_text = asyncio.Event()
+
+        async def receive_text():
+            nonlocal text_chars
+            while True:
+                data = json.loads(await websocket.receive_text())
+                text = data.get("text")
+                if text == "":
+                    eos.set()
+                    return
+                if text and text.strip():
+                    text_chars += len(text.strip())
+                    first_text.set()
+
+        receiver = asyncio.create_task(receive_text())
+        try:
+            await first_text.wait()
+            await asyncio.sleep(sample_ms(el["ttfb"]) / 1000)
+            produced_ms = 0.0
+            # Emit audio for the text received so far; keep going until EOS and all text is voiced
+            while True:
+                target_ms = text_chars * el["ms_per_char"]
+                if produced_ms >= target_ms:
+                    if eos.is_set():
+                        break
+                    await asyncio.sleep(0.01)
+                    continue
+                await websocket.send_text(json.dumps({
+                    "audio": base64.b64encode(chunk_audio).decode(), "isFinal": None, "normalizedAlignment": None,
+                }))
+                produced_ms += el["chunk_ms"]
+                stats["elevenlabs_audio_seconds"] += el["chunk_ms"] / 1000
+                await asyncio.sleep(el["chunk_ms"] / el["realtime_factor"] / 1000)
+            await websocket.send_text(json.dumps({"audio": None, "isFinal": True}))
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            receiver.cancel()
+
+    # --- OpenAI chat completions ---
+
+    prompt_cache = OrderedDict() # prefix hash -> None, LRU
+
+    def _prompt_tokens(body: Dict, oa: Dict):
+        """(prompt tokens, cached tokens); ~4 characters per token."""
+        hasher = hashlib.sha256(json.dumps([body.get("model"), body.get("tools")], sort_keys=True).encode())
+        chars = len(json.dumps(body.get("tools") or []))
+        boundaries = [] # (prefix hash, tokens up to and including this message)
+        for message in body.get("messages", []):
+            encoded = json.dumps(message, sort_keys=True)
+            hasher.update(encoded.encode())
+            chars += len(encoded)
+            boundaries.append((hasher.copy().hexdigest(), chars // 4))
+        prompt_tokens = chars // 4
+        if not oa["prompt_cache"] or prompt_tokens < oa["prompt_cache_min_tokens"]:
+            return prompt_tokens, 0
+
+        cached = 0
+        for digest, tokens in boundaries:
+            if digest in prompt_cache:
+                prompt_cache.move_to_end(digest)
+                cached = tokens
+            prompt_cache[digest] = None
+        while len(prompt_cache) > 100_000:
+            prompt_cache.popitem(last=False)
+        cached = cached // 128 * 128 if cached >= oa["prompt_cache_min_tokens"] else 0
+        return prompt_tokens, cached
+
+    def _tool_rule(messages: List[Dict]):
+        """(rule, follow_up?) for the current request, or (None, False)."""
+        last = messages[-1] if messages else {}
+        if last.get("role") == "tool":
+            # Find the rule whose tool was just called
+            for message in reversed(messages):
+                for call in message.get("tool_calls") or []:
+                    for rule in config["openai"]["tool_script"]:
+                        if rule["tool"] == call["function"]["name"]:
+                            return rule, True
+            return None, False
+        user_text = (last.get("content") or "").lower() if last.get("role") == "user" else ""
+        for rule in config["openai"]["tool_script"]:
+            if rule["match"].lower() in user_text:
+                return rule, False
+        return None, False
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["openai_requests"] += 1
+        model = body.get("model", "gpt-4o")
+        oa = _merge(config["openai"], config["openai"]["models"].get(model))
+
+        if random.random() < oa["rate_limit_rate"]:
+            stats["openai_errors"] += 1
+            return JSONResponse({"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}}, status_code=429)
+        if random.random() < oa["error_rate"]:
+            stats["openai_errors"] += 1
+            return JSONResponse({"error": {"message": "Internal error (fake)", "type": "server_error"}}, status_code=500)
+
+        rule, follow_up = _tool_rule(body.get("messages", []))
+        use_tool = rule is not None and not follow_up and body.get("tools")
+        reply = rule["follow_up"] if follow_up else oa["reply"]
+        tokens = [w + " " for w in reply.split()]
+        prompt_tokens, cached_tokens = _prompt_tokens(body, oa)
+        stats["openai_cached_tokens"] += cached_tokens
+        usage = {"prompt_tokens": prompt_tokens, "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        def chunk(delta: Dict, finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        if not body.get("stream"):
+            await asyncio.sleep(sample_ms(oa["ttft"]) / 1000 + len(tokens) / oa["tokens_per_sec"])
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply.strip()}, "finish_reason": "stop"}],
+                "usage": {**usage, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)},
+            })
+
+        async def stream():
+            await asyncio.sleep(sample_ms(oa["ttft"]) / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            stall_at = random.randrange(len(tokens)) if tokens and random.random() < oa["stall_rate"] else None
+            completion_tokens = 0
+
+            if use_tool:
+                stats["openai_tool_calls"] += 1
+                arguments = json.dumps(rule["arguments"])
+                yield chunk({"tool_calls": [{"index": 0, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                                             "function": {"name": rule["tool"], "arguments": ""}}]})
+                for i in range(0, len(arguments), 8):
+                    yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": arguments[i:i + 8]}}]})
+                    await asyncio.sleep(1 / oa["tokens_per_sec"])
+                    completion_tokens += 1
+                yield chunk({}, "tool_calls")
+            else:
+                for i, token in enumerate(tokens):
+                    if i == stall_at:
+                        await asyncio.sleep(sample_ms(oa["stall"]) / 1000)
+                    yield chunk({"content": token})
+                    completion_tokens += 1
+                    await asyncio.sleep(1 / oa["tokens_per_sec"])
+                yield chunk({}, "stop")
+
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield "data: " + json.dumps({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [],
+                    "usage": {**usage, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = []
+        for i, _ in enumerate(inputs):
+            vector = [random.gauss(0, 1) for _ in range(body.get("dimensions", 1536))]
+            norm = math.sqrt(sum(v * v for v in vector))
+            data.append({"object": "embedding", "index": i, "embedding": [v / norm for v in vector]})
+        return {"object": "list", "data": data, "model": body.get("model"), "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+    # --- Twilio SMS ---
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def twilio_messages(account_sid: str, request: Request):
+        # Form-encoded like Twilio's API; parsed by hand so the fake needs no python-multipart
+        form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+        sms = config["twilio_sms"]
+        stats["sms_requests"] += 1
+        await asyncio.sleep(sample_ms(sms["latency"]) / 1000)
+        if random.random() < sms["rate_limit_rate"]:
+            stats["sms_errors"] += 1
+            return JSONResponse({"code": 20429, "message": "Too Many Requests (fake)", "status": 429},
+                                status_code=429, headers={"Retry-After": str(sms["retry_after_s"])})
+        if random.random() < sms["error_rate"]:
+            stats["sms_errors"] += 1
+            return JSONResponse({"code": 20500, "message": "Internal error (fake)", "status": 500}, status_code=500)
+        if not form.get("To") or not form.get("Body"):
+            return JSONResponse({"code": 21604, "message": "A 'To' phone number and 'Body' are required.", "status": 400},
+                                status_code=400)
+
+        stats["sms_sent"] += 1
+        # Per sender line (one agent number per tenant in load scenarios)
+        sender = form.get("From", "")
+        stats["sms_by_sender"][sender] = stats["sms_by_sender"].get(sender, 0) + 1
+        return JSONResponse({
+            "sid": f"SM{uuid.uuid4().hex}", "account_sid": account_sid, "status": "queued",
+            "to": form["To"], "from": sender, "body": form["Body"], "num_segments": str(len(form["Body"]) // 153 + 1),
+        }, status_code=201)
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Deepgram / ElevenLabs / OpenAI servers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--scenario", help="JSON file overriding DEFAULT_SCENARIO")
+    parser.add_argument("--seed", type=int, help="Seed latency/failure sampling for repeatable runs")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    scenario = None
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(create_app(scenario), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
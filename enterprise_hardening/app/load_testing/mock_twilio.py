@@ -0,0 +1,373 @@
+"""
+Asyncio Twilio Media Streams load generator.
+
+Simulates many concurrent Twilio calls against the voice engine from one process:
+- Proper handshake (`connected`, then `start` with the stream metadata).
+- Real speech: a WAV file is converted once to 20ms mu-law frames shared by all calls.
+  Between utterances the caller sends silence, like a real phone line.
+- Plays back the agent audio on a per-call playback clock and echoes `mark` events
+  when playback reaches them (cleared marks are echoed immediately, as Twilio does).
+- Measures mouth-to-ear turn latency: end of caller speech -> first agent audio.
+- Ramps up concurrency and reports latency percentiles per concurrency level, and the
+  highest level that still meets the SLO (capacity).
+
+Usage:
+    python -m app.load_testing.mock_twilio --url ws://voice-engine:8000/api/v1/voice/stream \\
+        --audio caller.wav --calls 500 --rate 10 --turns 5 --slo-ms 1200 --pods 2
+"""
+import argparse
+import asyncio
+import audioop
+import base64
+import json
+import logging
+import math
+import uuid
+import wave
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+import websockets
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("load_test")
+
+FRAME_MS = 20
+SAMPLE_RATE = 8000
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 # mu-law: 1 byte per sample
+SILENCE_FRAME = base64.b64encode(b"\xff" * FRAME_BYTES).decode()
+
+
+def load_speech_frames(path: Optional[str]) -> List[str]:
+    """Returns base64 mu-law 20ms frames for one caller utterance."""
+    if path is None:
+        logger.warning("No --audio given: using a synthetic voiced signal (STT will not transcribe it)")
+        return _synthetic_speech_frames(1.5)
+
+    with wave.open(path, "rb") as wav:
+        pcm = wav.readframes(wav.getnframes())
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+    if channels == 2:
+        pcm = audioop.tomono(pcm, width, 0.5, 0.5)
+    if width != 2:
+        pcm = audioop.lin2lin(pcm, width, 2)
+    if rate != SAMPLE_RATE:
+        pcm, _ = audioop.ratecv(pcm, 2, 1, rate, SAMPLE_RATE, None)
+
+    mulaw = audioop.lin2ulaw(pcm, 2)
+    mulaw += b"\xff" * (-len(mulaw) % FRAME_BYTES)
+    return [
+        base64.b64encode(mulaw[i:i + FRAME_BYTES]).decode()
+        for i in range(0, len(mulaw), FRAME_BYTES)
+    ]
+
+
+def _synthetic_speech_frames(seconds: float) -> List[str]:
+    samples = bytearray()
+    for i in range(int(seconds * SAMPLE_RATE)):
+        t = i / SAMPLE_RATE
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * t) # Syllable-rate modulation
+        value = int(6000 * envelope * math.sin(2 * math.pi * 180 * t))
+        samples += value.to_bytes(2, "little", signed=True)
+    mulaw = audioop.lin2ulaw(bytes(samples), 2)
+    return [base64.b64encode(mulaw[i:i + FRAME_BYTES]).decode() for i in range(0, len(mulaw), FRAME_BYTES)]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return round(ordered[index], 1)
+
+
+class LoadStats:
+    def __init__(self, bucket_size: int):
+        self.bucket_size = bucket_size
+        self.active_calls = 0
+        self.peak_calls = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.marks_echoed = 0
+        self.samples = [] # (concurrency when the turn ended, latency ms)
+        self.sender_lag = [] # ms the generator itself was late sending a frame
+
+    def call_started(self):
+        self.started += 1
+        self.active_calls += 1
+        self.peak_calls = max(self.peak_calls, self.active_calls)
+
+    def call_ended(self):
+        self.active_calls -= 1
+
+    def by_concurrency(self) -> Dict[int, List[float]]:
+        buckets = {}
+        for concurrency, latency in self.samples:
+            bucket = max(1, math.ceil(concurrency / self.bucket_size)) * self.bucket_size
+            buckets.setdefault(bucket, []).append(latency)
+        return dict(sorted(buckets.items()))
+
+
+class SimulatedCall:
+    """One Twilio media stream: sends caller audio in real time, plays back agent audio."""
+
+    def __init__(self, args, speech: List[str], stats: LoadStats):
+        self.args = args
+        self.speech = speech
+        self.stats = stats
+        self.stream_sid = f"MZ{uuid.uuid4().hex}"
+        self.call_sid = f"CA{uuid.uuid4().hex}"
+        self.sequence = 0
+        self.stream_started = 0.0
+
+        # Playback emulation (what Twilio does with the audio we receive)
+        self.playback_until = 0.0 # Loop time when queued agent audio finishes playing
+        self.pending_marks = [] # (TimerHandle, name) for marks not yet reached
+        self.speech_ended_at = None # Set when the caller stops talking; cleared by the first reply audio
+        self.reply_heard = None
+
+    def _next_sequence(self) -> str:
+        self.sequence += 1
+        return str(self.sequence)
+
+    async def run(self):
+        query = urlencode({"direction": "inbound", "phone_number": self.args.phone})
+        url = f"{self.args.url}?{query}"
+        loop = asyncio.get_running_loop()
+        try:
+            async with websockets.connect(url, compression=None, open_timeout=10, max_queue=None) as ws:
+                self.stats.call_started()
+                try:
+                    self.stream_started = loop.time()
+                    await self._handshake(ws)
+                    receiver = asyncio.create_task(self._receive(ws))
+                    try:
+                        await self._converse(ws)
+                        await ws.send(json.dumps({
+                            "event": "stop", "sequenceNumber": self._next_sequence(), "streamSid": self.stream_sid,
+                            "stop": {"accountSid": "ACloadtest", "callSid": self.call_sid},
+                        }))
+                    finally:
+                        receiver.cancel()
+                        for handle, _ in self.pending_marks:
+                            handle.cancel()
+                    self.stats.completed += 1
+                finally:
+                    self.stats.call_ended()
+        except websockets.exceptions.InvalidStatusCode as e:
+            # Admission control refuses the handshake when the pod is full
+            self.stats.rejected += 1
+            logger.debug(f"Call rejected: {e}")
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            self.stats.failed += 1
+            logger.debug(f"Call failed: {e}")
+
+    async def _handshake(self, ws):
+        await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+        await ws.send(json.dumps({
+            "event": "start",
+            "sequenceNumber": self._next_sequence(),
+            "streamSid": self.stream_sid,
+            "start": {
+                "streamSid": self.stream_sid,
+                "accountSid": "ACloadtest",
+                "callSid": self.call_sid,
+                "tracks": ["inbound"],
+                "customParameters": {"phone_number": self.args.phone},
+                "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": SAMPLE_RATE, "channels": 1},
+            },
+        }))
+
+    async def _converse(self, ws):
+        """Speak, then send silence until the agent answers and finishes talking; repeat."""
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time()
+        chunk = 0
+
+        async def send_frame(payload: str):
+            nonlocal next_frame, chunk
+            delay = next_frame - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.stats.sender_lag.append(-delay * 1000)
+            chunk += 1
+            await ws.send(json.dumps({
+                "event": "media",
+                "sequenceNumber": self._next_sequence(),
+                "streamSid": self.stream_sid,
+                "media": {
+                    "track": "inbound",
+                    "chunk": str(chunk),
+                    "timestamp": str(int((next_frame - self.stream_started) * 1000)),
+                    "payload": payload,
+                },
+            }))
+            next_frame += FRAME_MS / 1000
+
+        # Let the agent greet / settle before the first utterance
+        for _ in range(int(self.args.lead_in_ms / FRAME_MS)):
+            await send_frame(SILENCE_FRAME)
+
+        for _ in range(self.args.turns):
+            for payload in self.speech:
+                await send_frame(payload)
+            self.speech_ended_at = next_frame # Wall time the last speech sample leaves the "mouth"
+            self.reply_heard = loop.create_future()
+
+            # Keep the line open (silence) until the reply starts or we give up
+            deadline = next_frame + self.args.response_timeout
+            while not self.reply_heard.done() and next_frame < deadline:
+                await send_frame(SILENCE_FRAME)
+            if not self.reply_heard.done():
+                self.stats.timeouts += 1
+                self.speech_ended_at = None
+
+            # Listen to the rest of the answer (playback_until grows as audio arrives), then think
+            listen_from = next_frame
+            while next_frame < max(self.playback_until, listen_from) + self.args.think_ms / 1000:
+                await send_frame(SILENCE_FRAME)
+
+    async def _receive(self, ws):
+        loop = asyncio.get_running_loop()
+        async for message in ws:
+            data = json.loads(message)
+            event = data.get("event")
+            now = loop.time()
+
+            if event == "media":
+                played = len(base64.b64decode(data["media"]["payload"])) / SAMPLE_RATE
+                starts_at = max(now, self.playback_until)
+                self.playback_until = starts_at + played
+                if self.speech_ended_at is not None and not self.reply_heard.done():
+                    # First agent audio after the caller stopped: it starts playing now
+                    latency = (starts_at - self.speech_ended_at) * 1000
+                    self.stats.samples.append((self.stats.active_calls, latency))
+                    self.speech_ended_at = None
+                    self.reply_heard.set_result(latency)
+
+            elif event == "mark":
+                # Echo when playback reaches the mark (audio sent before it has played)
+                name = data["mark"]["name"]
+                handle = loop.call_at(max(now, self.playback_until), self._echo_mark, ws, name)
+                self.pending_marks = [(h, n) for h, n in self.pending_marks if h.when() > now and not h.cancelled()]
+                self.pending_marks.append((handle, name))
+
+            elif event == "clear":
+                # Playback flushed: cleared marks are returned immediately
+                self.playback_until = now
+                pending, self.pending_marks = self.pending_marks, []
+                for handle, name in pending:
+                    if handle.when() > now and not handle.cancelled():
+                        handle.cancel()
+                        self._echo_mark(ws, name)
+
+    def _echo_mark(self, ws, name: str):
+        self.stats.marks_echoed += 1
+        asyncio.ensure_future(ws.send(json.dumps({
+            "event": "mark",
+            "sequenceNumber": self._next_sequence(),
+            "streamSid": self.stream_sid,
+            "mark": {"name": name},
+        })))
+
+
+def report(stats: LoadStats, args) -> Dict:
+    latencies = [latency for _, latency in stats.samples]
+    levels = []
+    capacity = 0
+    for concurrency, values in stats.by_concurrency().items():
+        p95 = percentile(values, 95)
+        levels.append({
+            "concurrency": concurrency,
+            "turns": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": p95,
+            "p99_ms": percentile(values, 99),
+        })
+        if p95 <= args.slo_ms and len(values) >= args.min_samples:
+            capacity = concurrency
+        elif len(values) >= args.min_samples:
+            break # Capacity is the last level before the SLO is first broken
+
+    attempted = stats.started + stats.rejected + stats.failed
+    return {
+        "calls": {
+            "started": stats.started, "completed": stats.completed,
+            "rejected": stats.rejected, "failed": stats.failed, "peak_concurrent": stats.peak_calls,
+        },
+        "turns": {"measured": len(latencies), "timeouts": stats.timeouts},
+        "mouth_to_ear_ms": {
+            "p50": percentile(latencies, 50), "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95), "p99": percentile(latencies, 99),
+        },
+        "by_concurrency": levels,
+        "slo_ms": args.slo_ms,
+        "capacity_at_slo": capacity,
+        "capacity_per_pod": capacity // args.pods if args.pods else capacity,
+        "marks_echoed": stats.marks_echoed,
+        "rejection_rate": round((stats.rejected + stats.failed) / attempted, 3) if attempted else 0.0,
+        # If the generator itself falls behind, its latency numbers are not trustworthy
+        "generator_lag_p99_ms": percentile(stats.sender_lag, 99) or 0.0,
+    }
+
+
+async def run_load(args) -> Dict:
+    speech = load_speech_frames(args.audio)
+    stats = LoadStats(args.bucket)
+    calls = []
+
+    async def progress():
+        while True:
+            await asyncio.sleep(5)
+            recent = [latency for _, latency in stats.samples[-200:]]
+            logger.info(
+                f"📞 active={stats.active_calls} started={stats.started} rejected={stats.rejected} "
+                f"failed={stats.failed} p95(recent)={percentile(recent, 95)}ms"
+            )
+
+    reporter = asyncio.create_task(progress())
+    try:
+        # Ramp: new calls at a fixed rate, so concurrency climbs through each level
+        for _ in range(args.calls):
+            calls.append(asyncio.create_task(SimulatedCall(args, speech, stats).run()))
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.gather(*calls)
+    finally:
+        reporter.cancel()
+
+    result = report(stats, args)
+    if result["generator_lag_p99_ms"] > 20:
+        logger.warning(f"⚠️ Load generator lagging ({result['generator_lag_p99_ms']}ms p99): run fewer calls per process")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Twilio media streams against the voice engine")
+    parser.add_argument("--url", default="ws://voice-engine:8000/api/v1/voice/stream")
+    parser.add_argument("--phone", default="+15550000000", help="Agent number under test")
+    parser.add_argument("--audio", help="Caller utterance WAV (any rate/width; converted to 8kHz mu-law)")
+    parser.add_argument("--calls", type=int, default=100, help="Total calls to place")
+    parser.add_argument("--rate", type=float, default=5.0, help="New calls per second (ramp)")
+    parser.add_argument("--turns", type=int, default=5, help="Caller utterances per call")
+    parser.add_argument("--lead-in-ms", type=int, default=1000)
+    parser.add_argument("--think-ms", type=int, default=800, help="Pause after the agent finishes")
+    parser.add_argument("--response-timeout", type=float, default=10.0)
+    parser.add_argument("--slo-ms", type=float, default=1200.0, help="p95 mouth-to-ear target")
+    parser.add_argument("--bucket", type=int, default=25, help="Concurrency bucket size for the report")
+    parser.add_argument("--min-samples", type=int, default=20, help="Turns needed to judge a bucket")
+    parser.add_argument("--pods", type=int, default=1, help="Voice engine pods behind --url")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args))
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,46 @@
 import logging
+import re
+from functools import lru_cache
 from typing import List, Optional
-from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 
 logger = logging.getLogger("security")
 
+# Structured PII is caught by precompiled regexes before the NLP pass
+EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+CARD_RE = re.compile(r"\b\d(?:[ -]?\d){12,18}\b")
+SSN_RE = re.compile(r"\b\d{3}[- ]?\d{2}[- ]?\d{4}\b")
+PHONE_RE = re.compile(r"(?:\+?1[ .-]?)?(?:\(\d{3}\)|\b\d{3})[ .-]?\d{3}[ .-]?\d{4}\b")
+
+def _luhn_valid(number: str) -> bool:
+    digits = [int(c) for c in number if c.isdigit()]
+    checksum = 0
+    for i, d in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            d *= 2
+            if d > 9:
+                d -= 9
+        checksum += d
+    return checksum % 10 == 0
+
+def redact_structured(text: str) -> str:
+    text = EMAIL_RE.sub("<EMAIL>", text)
+    text = CARD_RE.sub(lambda m: "<CREDIT_CARD>" if _luhn_valid(m.group()) else m.group(), text)
+    text = SSN_RE.sub("<SSN>", text)
+    return PHONE_RE.sub("<PHONE>", text)
+
+@lru_cache(maxsize=1)
+def get_engines():
+    """Loads the spaCy model once per process, shared by every PIIRedactor."""
+    analyzer = AnalyzerEngine()
+    return analyzer, BatchAnalyzerEngine(analyzer_engine=analyzer), AnonymizerEngine()
+
 class PIIRedactor:
     def __init__(self):
-        # Initialize engines (loads Spacy NLP model)
-        # This takes a few seconds, so it should be a Singleton in production
-        self.analyzer = AnalyzerEngine()
-        self.anonymizer = AnonymizerEngine()
+        # Engines are process-wide; constructing a redactor is cheap
+        self.analyzer, self.batch_analyzer, self.anonymizer = get_engines()
         
         # Define what entities we want to scrub
         self.entities = [
@@ -26,6 +55,13 @@ class PIIRedactor:
             "PERSON" # Use carefully, might redact Agent names
         ]
 
+        self.operators = {
+            "DEFAULT": OperatorConfig("replace", {"new_value": "<REDACTED>"}),
+            "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
+            "CREDIT_CARD": OperatorConfig("replace", {"new_value": "<CREDIT_CARD>"}),
+            "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
+        }
+
     def redact_text(self, text: str) -> str:
         """
         Scans text and replaces PII with <ENTITY_TYPE>.
@@ -34,6 +70,7 @@ class PIIRedactor:
         if not text:
             return ""
 
+        text = redact_structured(text)
         try:
             # 1. Analyze (Detect)
             results = self.analyzer.analyze(
@@ -47,12 +84,7 @@ class PIIRedactor:
             anonymized_result = self.anonymizer.anonymize(
                 text=text,
                 analyzer_results=results,
-                operators={
-                    "DEFAULT": OperatorConfig("replace", {"new_value": "<REDACTED>"}),
-                    "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
-                    "CREDIT_CARD": OperatorConfig("replace", {"new_value": "<CREDIT_CARD>"}),
-                    "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
-                }
+                operators=self.operators
             )
 
             return anonymized_result.text
@@ -62,4 +94,23 @@ class PIIRedactor:
             # Fail closed: If security fails, return raw text? 
             # Better to log error and return text, 
             # OR return "[REDACTION_ERROR]" to be safe.
-            return text
\ No newline at end of file
+            return text
+
+    def redact_many(self, texts: List[str]) -> List[str]:
+        """
+        Batch variant of redact_text: one analyzer pass over the whole list.
+        """
+        cleaned = [redact_structured(t) if t else "" for t in texts]
+        try:
+            results = self.batch_analyzer.analyze_iterator(
+                texts=cleaned,
+                language='en',
+                entities=self.entities
+            )
+            return [
+                self.anonymizer.anonymize(text=text, analyzer_results=findings, operators=self.operators).text
+                for text, findings in zip(cleaned, results)
+            ]
+        except Exception as e:
+            logger.error(f"PII batch redaction failed: {e}")
+            return cleaned
@@ -16,6 +16,12 @@ class Settings(BaseSettings):
     # Voice Engine Webhook (Where Twilio connects when call picks up)
     VOICE_ENGINE_URL: str = "https://your-ngrok-url.app/api/v1/voice/incoming"
 
+    # Observability (Prometheus scrape port + event loop monitor)
+    METRICS_PORT: int = 9100
+    LOOP_MONITOR_INTERVAL_MS: int = 50
+    LOOP_SLOW_CALLBACK_MS: int = 100 # Stalls longer than this are reported with the blocking stack
+    LOOP_STALL_STACK_DEPTH: int = 15
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from prometheus_client import Counter, Histogram
+from app.core.config import settings
+
+logger = logging.getLogger("loop_monitor")
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = Histogram("event_loop_lag_seconds", "How late the event loop woke a sleeping sampler", buckets=LAG_BUCKETS)
+SLOW_CALLBACKS = Histogram(
+    "event_loop_slow_callback_seconds",
+    "Event loop stalls above the slow-callback threshold, by the task that held the loop",
+    ["task"],
+    buckets=LAG_BUCKETS
+)
+STACKS_CAPTURED = Counter("event_loop_stall_stacks_total", "Stalls reported with a captured stack")
+
+
+class LoopMonitor:
+    """
+    Event-loop lag sampler and slow-callback detector.
+
+    - Sampler (on the loop): sleeps `interval` and records how late it woke up.
+    - Watchdog (own thread): if the sampler has not ticked for longer than the
+      slow-callback threshold, the loop is blocked right now, so it captures the
+      loop thread's stack and the running task while the culprit is still on it.
+    When the loop comes back, the stall is recorded against that task.
+    """
+
+    def __init__(self):
+        self.interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        self.slow_threshold = settings.LOOP_SLOW_CALLBACK_MS / 1000
+        self.lag = 0.0 # EWMA, seconds
+        self.max_lag = 0.0
+        self.stalls = 0
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_tick = 0.0
+        self._culprit = None # Task name captured by the watchdog for the current stall
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._last_tick = now
+
+            LOOP_LAG.observe(lag)
+            self.lag = 0.8 * self.lag + 0.2 * lag
+            self.max_lag = max(self.max_lag, lag)
+
+            if lag >= self.slow_threshold:
+                self.stalls += 1
+                culprit, self._culprit = self._culprit or "unknown", None
+                SLOW_CALLBACKS.labels(task=culprit).observe(lag)
+                logger.warning(f"🐌 Event loop blocked for {lag * 1000:.0f}ms (task: {culprit})")
+
+    def _watch(self):
+        reported_tick = None
+        while not self._stop.wait(self.interval):
+            last_tick = self._last_tick
+            stalled_for = time.monotonic() - last_tick
+            # One report per stall: the tick only moves once the loop is free again
+            if stalled_for < self.slow_threshold + self.interval or last_tick == reported_tick:
+                continue
+            reported_tick = last_tick
+            self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+
+        # Read-only peek at the loop's current task from another thread
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coro = task.get_coro()
+            self._culprit = getattr(coro, "__qualname__", None) or task.get_name()
+        else:
+            self._culprit = "callback" # Plain call_soon/call_later callback, not a task
+
+        STACKS_CAPTURED.inc()
+        stack = "".join(traceback.format_stack(frame, limit=settings.LOOP_STALL_STACK_DEPTH))
+        logger.warning(
+            f"🧱 Event loop stalled {stalled_for * 1000:.0f}ms+ in task {self._culprit}. "
+            f"Loop thread stack:\n{stack}"
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "loop_lag_ms": round(self.lag * 1000, 1),
+            "loop_max_lag_ms": round(self.max_lag * 1000, 1),
+            "loop_stalls": self.stalls,
+        }
+
+
+# Process-wide instance (one event loop per process)
+loop_monitor = LoopMonitor()
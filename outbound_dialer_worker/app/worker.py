@@ -1,7 +1,9 @@
 import logging
 import asyncio
 from arq.connections import RedisSettings
+from prometheus_client import start_http_server
 from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
 from app.services.throttler import Throttler
 from app.services.telephony.twilio_dialer import TwilioDialer
 from app.services.campaign.loader import CampaignLoader
@@ -11,9 +13,12 @@ logger = logging.getLogger("worker")
 async def startup(ctx):
     """Initialize services on worker start"""
     ctx['dialer'] = TwilioDialer()
+    start_http_server(settings.METRICS_PORT)
+    loop_monitor.start()
     logger.info("🚀 Outbound Dialer Worker Started")
 
 async def shutdown(ctx):
+    await loop_monitor.stop()
     logger.info("🛑 Outbound Dialer Worker Stopped")
 
 async def dial_number_job(ctx, phone_number: str, campaign_id: str, tenant_id: str, agent_id: str, customer_name: str = None):
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, agents, knowledge
+from app.api.v1.endpoints import auth, agents, knowledge, live
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(agents.router, prefix="/agents", tags=["agents"])
-api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledge"])
\ No newline at end of file
+api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledge"])
+api_router.include_router(live.router, prefix="/live", tags=["live"])
\ No newline at end of file
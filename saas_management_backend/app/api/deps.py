@@ -1,4 +1,4 @@
-from typing import Generator, Annotated
+from typing import Generator, Annotated, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -17,6 +17,25 @@ from sqlalchemy.orm import selectinload
 # Points to the login endpoint so Swagger UI works
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+async def get_user_from_token(db: AsyncSession, token: str) -> Optional[User]:
+    """
+    Resolves a JWT to its user, or None if the token is invalid.
+    Shared by the HTTP dependency below and WebSocket endpoints (token in the query string).
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user_id: str = payload.get("sub")
+        if user_id is None:
+            return None
+        token_data = TokenPayload(sub=user_id)
+    except JWTError:
+        return None
+
+    query = select(User).options(selectinload(User.tenant)).where(User.id == token_data.sub)
+
+    result = await db.execute(query)
+    return result.scalars().first()
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
@@ -26,20 +45,7 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenPayload(sub=user_id)
-    except JWTError:
-        raise credentials_exception
-        
-    query = select(User).options(selectinload(User.tenant)).where(User.id == token_data.sub)
-    
-    result = await db.execute(query)
-    user = result.scalars().first()
-    
+    user = await get_user_from_token(db, token)
     if user is None:
         raise credentials_exception
     return user
@@ -1,12 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Security
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.ratelimit import limiter
 from app.api import deps
 from app.models.agent import Agent
 from app.models.user import User
-from app.schemas.agent import AgentCreate, AgentResponse
+from app.schemas.agent import AgentCreate, AgentResponse, AgentUpdate
 from app.services.cache_service import CacheService
 from fastapi.responses import ORJSONResponse 
 
@@ -73,7 +74,7 @@ async def lookup_agent_by_number(
 @router.put("/{agent_id}", response_model=AgentResponse)
 async def update_agent(
     agent_id: UUID,
-    agent_in: AgentUpdate, # Assuming you have a Pydantic schema for Update
+    agent_in: AgentUpdate,
     current_user: User = Depends(deps.get_current_active_user),
     db: AsyncSession = Depends(deps.get_db)
 ):
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from app.api import deps
+from app.core import security
+from app.db.session import AsyncSessionLocal
+from app.services.live_hub import live_hub
+
+router = APIRouter()
+
+
+@router.websocket("/transcripts")
+async def live_transcripts(
+    websocket: WebSocket,
+    token: str = Query(...),
+    call_id: Optional[str] = None
+):
+    """
+    Streams live call transcripts for the user's tenant (optionally one call).
+    Browsers can't set headers on a WebSocket, so the JWT comes as ?token=.
+    """
+    # Short-lived session: don't hold a pooled DB connection for the life of the socket
+    async with AsyncSessionLocal() as db:
+        user = await deps.get_user_from_token(db, token)
+    if user is None or "agent:read" not in security.get_scopes_for_role(user.role):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    # Tenant comes from the token, never from the client
+    subscriber = await live_hub.subscribe(str(user.tenant_id), call_id)
+
+    async def forward():
+        while True:
+            await websocket.send_text(await subscriber.queue.get())
+
+    async def watch_disconnect():
+        # Nothing is expected from the client; this returns once it goes away
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(watch_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await live_hub.unsubscribe(subscriber)
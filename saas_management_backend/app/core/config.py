@@ -16,6 +16,10 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "saas_voice_db"
     MANAGEMENT_API_URL: str = "http://backend:8080/api/v1"
 
+    # Redis (shared with the Voice Engine: agent config cache, rate limits, live transcripts)
+    REDIS_URL: str = "redis://redis:6379/0"
+    LIVE_CLIENT_QUEUE_SIZE: int = 100 # Messages buffered per dashboard socket before the oldest are dropped
+
     # Vector DB
     QDRANT_HOST: str = "qdrant" # Service name in docker-compose
     QDRANT_PORT: int = 6333
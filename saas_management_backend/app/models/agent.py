@@ -1,6 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Text, DateTime, func,Index 
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Boolean, Integer, Float, func,Index 
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -14,6 +14,15 @@ class Agent(Base):
     system_prompt = Column(Text, nullable=False)
     voice_provider = Column(String, default="elevenlabs")
     voice_id = Column(String, nullable=False) # e.g., 'JBFqnCBsd6RMkjVDRZzb'
+
+    # Voice Engine Tuning (overrides engine defaults, e.g. {"min_silence_ms": 150})
+    turn_detection = Column(JSONB, nullable=True)
+    recording_enabled = Column(Boolean, default=False, nullable=False) # Dual-channel WAV per call
+    enabled_tools = Column(JSONB, nullable=True) # Tool names, e.g. ["book_appointment", "send_sms"]; NULL = defaults, [] = none
+    model_routing = Column(JSONB, nullable=True) # Fast/large model policy, e.g. {"mode": "auto", "fast_max_words": 12}
+    rag = Column(JSONB, nullable=True) # Knowledge base context budget, e.g. {"max_tokens": 500, "min_score": 0.45}
+    llm_first_token_deadline_ms = Column(Integer, nullable=True) # Hedge to the secondary LLM after this; NULL = engine default
+    max_call_cost = Column(Float, nullable=True) # Cut a call off at this billed cost; NULL = engine default
     
     # Telephony Mapping
     phone_number = Column(String, unique=True, index=True, nullable=True)
@@ -1,14 +1,38 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class AgentCreate(BaseModel):
+    model_config = {"protected_namespaces": ()} # `model_routing` is a field, not pydantic's
     name: str
     system_prompt: str
     voice_id: str
     voice_provider: str = "elevenlabs"
     phone_number: Optional[str] = None
+    turn_detection: Optional[dict] = None # Voice Engine turn detector overrides
+    recording_enabled: bool = False
+    enabled_tools: Optional[List[str]] = None # Voice Engine tools for this agent (None = defaults, [] = none)
+    model_routing: Optional[dict] = None # Fast/large model policy overrides
+    rag: Optional[dict] = None # Knowledge base context overrides (token budget, score floor, rerank)
+    llm_first_token_deadline_ms: Optional[int] = Field(None, gt=0) # LLM hedging deadline
+    max_call_cost: Optional[float] = Field(None, ge=0) # Per-call cost cap
+
+class AgentUpdate(BaseModel):
+    """Partial update: only the fields sent are changed."""
+    model_config = {"protected_namespaces": ()}
+    name: Optional[str] = None
+    system_prompt: Optional[str] = None
+    voice_id: Optional[str] = None
+    voice_provider: Optional[str] = None
+    phone_number: Optional[str] = None
+    turn_detection: Optional[dict] = None
+    recording_enabled: Optional[bool] = None
+    enabled_tools: Optional[List[str]] = None
+    model_routing: Optional[dict] = None
+    rag: Optional[dict] = None
+    llm_first_token_deadline_ms: Optional[int] = Field(None, gt=0)
+    max_call_cost: Optional[float] = Field(None, ge=0)
 
 class AgentResponse(AgentCreate):
     id: UUID
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set
+import redis.asyncio as redis
+from app.core.config import settings
+
+logger = logging.getLogger("live")
+
+
+def tenant_channel(tenant_id: str) -> str:
+    # Must match the Voice Engine's publisher (app/services/live_transcript.py)
+    return f"live_transcripts:{tenant_id}"
+
+
+class LiveSubscriber:
+    """One dashboard socket: a bounded queue of raw JSON messages, optionally for a single call."""
+
+    def __init__(self, channel: str, call_id: Optional[str] = None):
+        self.channel = channel
+        self.call_id = call_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LIVE_CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, message: str):
+        # A slow browser must not hold up the other viewers: drop its oldest message instead
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped == 1:
+                logger.warning(f"⚠️ Live viewer on {self.channel} is falling behind, dropping messages")
+        self.queue.put_nowait(message)
+
+
+class LiveTranscriptHub:
+    """
+    Fans live call transcripts from Redis out to dashboard WebSockets.
+
+    One Redis connection per API process, whatever the number of viewers: a tenant's
+    channel is SUBSCRIBEd when its first viewer connects and UNSUBSCRIBEd when the
+    last one leaves. A single reader task takes each message once and hands the
+    same string to every viewer of that tenant (parsed at most once, only when a
+    viewer follows a single call).
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._pubsub = None
+        self._reader = None
+        self._channels: Dict[str, Set[LiveSubscriber]] = {}
+        self._active = asyncio.Event() # Set while any channel is subscribed
+        self._lock = asyncio.Lock() # Serializes (UN)SUBSCRIBE against the refcounts
+
+    async def subscribe(self, tenant_id: str, call_id: Optional[str] = None) -> LiveSubscriber:
+        channel = tenant_channel(tenant_id)
+        subscriber = LiveSubscriber(channel, call_id)
+        async with self._lock:
+            if self._pubsub is None:
+                self._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+                self._pubsub = self._redis.pubsub()
+            if channel not in self._channels:
+                await self._pubsub.subscribe(channel)
+                self._channels[channel] = set()
+            self._channels[channel].add(subscriber)
+            self._active.set()
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read(), name="live_hub_reader")
+        return subscriber
+
+    async def unsubscribe(self, subscriber: LiveSubscriber):
+        async with self._lock:
+            viewers = self._channels.get(subscriber.channel)
+            if viewers is None:
+                return
+            viewers.discard(subscriber)
+            if not viewers:
+                del self._channels[subscriber.channel]
+                if not self._channels:
+                    self._active.clear()
+                try:
+                    await self._pubsub.unsubscribe(subscriber.channel)
+                except Exception as e:
+                    logger.warning(f"Live unsubscribe from {subscriber.channel} failed: {e}")
+
+    async def _read(self):
+        while True:
+            await self._active.wait()
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.error(f"❌ Live hub Redis read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                self._dispatch(message["channel"], message["data"])
+
+    def _dispatch(self, channel: str, data: str):
+        call_id = None
+        for subscriber in self._channels.get(channel, ()):
+            if subscriber.call_id:
+                if call_id is None:
+                    try:
+                        call_id = json.loads(data).get("call_id", "")
+                    except ValueError:
+                        call_id = ""
+                if subscriber.call_id != call_id:
+                    continue
+            subscriber.offer(data)
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            await self._redis.aclose()
+
+
+live_hub = LiveTranscriptHub()
@@ -3,6 +3,7 @@ from app.core.config import settings
 from app.api.api import api_router
 from app.middleware.correlation import CorrelationIdMiddleware
 from app.core.logging_config import setup_json_logging
+from app.services.live_hub import live_hub
 
 setup_json_logging()
 app = FastAPI(title=settings.PROJECT_NAME)
@@ -11,6 +12,10 @@ app.add_middleware(CorrelationIdMiddleware)
 # Include API Router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await live_hub.close()
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "component": "management_api"}
\ No newline at end of file
@@ -0,0 +1,41 @@
+import secrets
+from fastapi import APIRouter, Header, HTTPException
+from app.core.config import settings
+from app.services.drain import drain
+from app.services.listen_in import listen_hub, sign_listen_token
+
+router = APIRouter()
+
+def _verify_key(x_api_key: str):
+    if not x_api_key or not secrets.compare_digest(x_api_key, settings.API_SECRET_KEY):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@router.post("/drain")
+async def start_drain(shutdown: bool = False, x_api_key: str = Header(None)):
+    """
+    Puts this pod into drain mode (same as SIGTERM, but the process stays up
+    afterwards unless `shutdown=true`).
+    """
+    _verify_key(x_api_key)
+    drain.begin(shutdown=shutdown)
+    return drain.snapshot()
+
+@router.get("/drain")
+async def drain_status(x_api_key: str = Header(None)):
+    _verify_key(x_api_key)
+    return drain.snapshot()
+
+@router.post("/listen/{call_id}")
+async def listen_token(call_id: str, x_api_key: str = Header(None)):
+    """
+    Mints a short-lived listen-in URL for a call live on this pod, for the
+    dashboard to hand to a supervisor's browser (which can't send the API key).
+    """
+    _verify_key(x_api_key)
+    if not listen_hub.get(call_id):
+        raise HTTPException(status_code=404, detail="Call is not active on this pod")
+    expires, token = sign_listen_token(call_id)
+    return {
+        "url": f"/api/v1/voice/listen/{call_id}?expires={expires}&token={token}",
+        "expires": expires
+    }
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, WebSocket, Request, Response, Depends
+import asyncio
+from urllib.parse import quote
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request, Response, Depends
 from app.services.orchestrator import StreamOrchestrator
 from app.services.config_service import ConfigService
+from app.services.admission import admission
+from app.services.pod_registry import pod_registry
+from app.services.drain import drain
+from app.services.listen_in import listen_hub, verify_listen_token, MODES, ENCODINGS
+from app.utils.audio_buffer import SAMPLE_RATE
+from app.core.config import settings
 
 router = APIRouter()
 config_service = ConfigService()
 
+BUSY_TWIML = """<?xml version="1.0" encoding="UTF-8"?>
+    <Response>
+        <Say>All of our agents are busy right now. Please call back in a few minutes.</Say>
+        <Hangup/>
+    </Response>
+    """
+
 @router.post("/incoming")
 async def incoming_call_webhook(request: Request):
     form_data = await request.form()
@@ -23,8 +38,23 @@ async def incoming_call_webhook(request: Request):
     
     # Detection results
     answered_by = form_data.get("AnsweredBy") # human, machine_start, etc.
+    # The caller's phone: the only number the agent may text (send_sms)
+    caller_number = form_data.get("To" if direction == "outbound" else "From") or ""
     
-    host = request.headers.get("host")
+    # Route the media stream to the least-loaded healthy pod, not the one the LB picked for this webhook
+    host = await pod_registry.pick_stream_host()
+
+    if not host:
+        # No routable pod in the registry: this pod takes the stream if it can
+        host = request.headers.get("host")
+
+        # Admission: shed new calls before Twilio opens a stream to an overloaded pod
+        reason = admission.rejection_reason()
+        if reason:
+            admission.reject(reason)
+            if not settings.OVERFLOW_STREAM_HOST:
+                return Response(content=BUSY_TWIML, media_type="application/xml")
+            host = settings.OVERFLOW_STREAM_HOST
     
     # Pass metadata to WebSocket via URL params
     stream_url = (
@@ -32,6 +62,7 @@ async def incoming_call_webhook(request: Request):
         f"?direction={direction}"
         f"&answered_by={answered_by}"
         f"&customer_name={customer_name}"
+        f"&caller_number={quote(caller_number)}" # E.164 '+' must be escaped
     )
     
     # TwiML
@@ -45,14 +76,23 @@ async def incoming_call_webhook(request: Request):
     return Response(content=twiml, media_type="application/xml")
 
 @router.websocket("/stream")
-async def websocket_stream(websocket: WebSocket, direction: str = "inbound", answered_by: str = None, customer_name: str = None, phone_number: str = None):
+async def websocket_stream(websocket: WebSocket, direction: str = "inbound", answered_by: str = None, customer_name: str = None, phone_number: str = None, caller_number: str = None):
     """
     1. Accept WS.
     2. Fetch Config for 'phone_number'.
     3. Start Orchestrator.
     """
-    await websocket.accept()
-    
+    if not admission.has_free_slot():
+        admission.reject("capacity")
+        # Closing before accept rejects the handshake (HTTP 403)
+        await websocket.close(code=1013, reason="Pod at capacity")
+        return
+
+    async with admission.call_slot():
+        await websocket.accept()
+        await _run_stream(websocket, direction, answered_by, customer_name, phone_number, caller_number)
+
+async def _run_stream(websocket: WebSocket, direction: str, answered_by: str, customer_name: str, phone_number: str, caller_number: str = None):
     # 1. Fetch Config
     agent_config = await config_service.get_agent_config(phone_number)
     
@@ -65,9 +105,63 @@ async def websocket_stream(websocket: WebSocket, direction: str = "inbound", ans
     agent_config['call_context'] = {
         "direction": direction,
         "answered_by": answered_by,
-        "customer_name": customer_name
+        "customer_name": customer_name,
+        "caller_number": caller_number
     }
 
     # 2. Initialize Orchestrator with Config
     orchestrator = StreamOrchestrator(websocket, agent_config)
-    await orchestrator.handle_stream()
\ No newline at end of file
+    drain.calls.add(orchestrator)
+    try:
+        await orchestrator.handle_stream()
+    finally:
+        drain.calls.discard(orchestrator)
+
+@router.websocket("/listen/{call_id}")
+async def listen_stream(websocket: WebSocket, call_id: str, expires: int = 0, token: str = None,
+                        mode: str = "mixed", encoding: str = "pcm16"):
+    """
+    Supervisor listen-in: binary WebSocket frames of the call's audio at 8 kHz,
+    as heard by the caller ("mixed", mono) or split per party ("dual", stereo:
+    left = caller, right = agent). Token from POST /api/v1/admin/listen/{call_id}.
+    """
+    tap = listen_hub.get(call_id)
+    if not verify_listen_token(call_id, expires, token) or mode not in MODES or encoding not in ENCODINGS:
+        await websocket.close(code=1008)
+        return
+    listener = tap.add_listener(mode, encoding) if tap else None
+    if not listener:
+        # Call ended (or is on another pod) or has its maximum of listeners
+        await websocket.close(code=1013, reason="Call not available for listen-in")
+        return
+
+    await websocket.accept()
+
+    async def forward():
+        await websocket.send_json({
+            "event": "start", "call_id": call_id, "sample_rate": SAMPLE_RATE,
+            "channels": 2 if mode == "dual" else 1, "encoding": encoding
+        })
+        while True:
+            frame = await listener.queue.get()
+            if frame is None:
+                await websocket.send_json({"event": "stop"})
+                await websocket.close()
+                return
+            await websocket.send_bytes(frame)
+
+    async def watch_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(watch_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        tap.remove_listener(listener)
@@ -1,3 +1,4 @@
+import socket
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -11,20 +12,140 @@ class Settings(BaseSettings):
     
     # Security
     API_SECRET_KEY: str = "changeme"
+
+    # Management API (agent config lookup)
+    MANAGEMENT_API_URL: str = "http://backend:8080/api/v1"
+    INTERNAL_API_KEY: str = "changeme_shared_secret"
     
     # AI Providers
     OPENAI_API_KEY: Optional[str] = None
     DEEPGRAM_API_KEY: Optional[str] = None
     ELEVENLABS_API_KEY: Optional[str] = None
+
+    # Provider endpoints (point at enterprise_hardening's fake_providers for load tests)
+    DEEPGRAM_URL: Optional[str] = None # None = Deepgram cloud
+    OPENAI_BASE_URL: Optional[str] = None # None = api.openai.com
+    ELEVENLABS_WS_URL: str = "wss://api.elevenlabs.io"
     
+    # LLM Routing (hedge to a secondary model/endpoint when the first token is late)
+    LLM_MODEL: str = "gpt-4o"
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_MODEL: str = "gpt-4o-mini"
+    LLM_HEDGE_BASE_URL: Optional[str] = None # None = same endpoint as the primary
+    LLM_HEDGE_API_KEY: Optional[str] = None
+    LLM_FIRST_TOKEN_DEADLINE_MS: int = 900 # Per-agent override: agent_config["llm_first_token_deadline_ms"]
+    LLM_HEDGE_OBSERVE_SECONDS: float = 5.0 # Loser kept until its first token (to measure the gain), at most this long
+    LLM_FALLBACK_REPLY: str = "Sorry, could you say that again?" # Spoken when every route failed
+
+    # Model Routing (per turn: fast model for simple turns, LLM_MODEL for the rest)
+    LLM_ROUTING_MODE: str = "auto" # auto | fast | large; per-agent agent_config["model_routing"]
+    LLM_FAST_MODEL: str = "gpt-4o-mini"
+
     # Telephony
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
 
+    # SMS Tool (Twilio Messages API via a pod-wide outbox; fake_providers serves it for load tests)
+    SMS_API_URL: str = "https://api.twilio.com"
+    SMS_FROM_NUMBER: Optional[str] = None # Sender when the agent's own number isn't known
+    SMS_DEFAULT_COUNTRY_CODE: str = "+1" # For bare 10-digit numbers
+    SMS_MAX_CONNECTIONS: int = 20 # Pooled keep-alive connections to the SMS API
+    SMS_FLUSH_INTERVAL_MS: int = 200 # Outbox gathers messages this long before a flush
+    SMS_BATCH_SIZE: int = 10 # Per tenant per flush
+    SMS_MAX_ATTEMPTS: int = 4
+    SMS_RETRY_BASE_DELAY: float = 1.0 # Seconds, doubled per attempt
+    SMS_OUTBOX_MAX: int = 1000
+    SMS_MAX_PER_CALL: int = 2 # send_sms calls allowed per call (a prompt-injected loop can't pump texts)
+
     # RAG Configuration
     QDRANT_HOST: str = "qdrant" # Docker service name
     QDRANT_PORT: int = 6333
     QDRANT_COLLECTION_NAME: str = "enterprise_knowledge_base"
+    RAG_CANDIDATES: int = 8 # Hits fetched per query, before dedup/merge/budget
+    RAG_MIN_SCORE: float = 0.45
+    RAG_CONTEXT_MAX_TOKENS: int = 500 # Per-agent override: agent_config["rag"]["max_tokens"]
+    RAG_RERANK: bool = True # Local lexical rerank (no model call)
+    RAG_PREFETCH_ENABLED: bool = True # Start lookups on interim transcripts, while the caller talks
+    RAG_PREFETCH_MIN_TERMS: int = 2 # Content words needed before a speculative lookup
+    RAG_PREFETCH_MIN_SIMILARITY: float = 0.6 # Query-term overlap to reuse a prefetch for the final text
+    RAG_PREFETCH_MAX_PER_TURN: int = 3 # Bounds embedding calls per user turn
+
+    # Inbound Audio (Twilio -> STT)
+    STT_CHUNK_MS: int = 60 # Coalesce 20ms frames into 40-100ms STT sends
+    STT_REPLAY_SECONDS: float = 5.0 # Audio retained per call for reconnect replay
+    STT_RECONNECT_BASE_DELAY: float = 0.25 # Exponential backoff start (seconds)
+    STT_RECONNECT_MAX_DELAY: float = 5.0
+
+    # Turn Detection (per-agent overrides via agent_config["turn_detection"])
+    TURN_DETECTION_ENABLED: bool = True
+    TURN_POLL_INTERVAL_MS: int = 20
+
+    # Call Pipeline (bounded queues between stages)
+    PIPELINE_INBOUND_AUDIO_QUEUE: int = 250 # 20ms frames (5s)
+    PIPELINE_TRANSCRIPT_QUEUE: int = 100
+    PIPELINE_TEXT_QUEUE: int = 512 # LLM tokens
+    PIPELINE_AUDIO_OUT_QUEUE: int = 64 # TTS chunks
+
+    # Cost Meter (live estimate vs tenant credit; rate card + balances published to Redis by the billing worker)
+    BILLING_METER_ENABLED: bool = True
+    BILLING_SYNC_SECONDS: float = 15.0 # Push our estimate / refresh the balance at most this often (also the idle check period)
+    BILLING_MAX_CALL_COST: float = 5.0 # Runaway guard per call, billed $ (0 = off); agent config "max_call_cost" overrides
+    BILLING_WARN_RATIO: float = 0.8 # Warn at this share of the per-call limit
+    BILLING_LOW_BALANCE_WARN: float = 1.0 # Warn when the tenant's remaining credit drops below this ($)
+    BILLING_INFLIGHT_TTL: int = 120 # Seconds a call's in-flight estimate counts after its last sync (crashed pods)
+    BILLING_CUTOFF_MESSAGE: str = "I'm sorry, but I have to end our call here. Please get in touch with us again later. Goodbye."
+    BILLING_GOODBYE_TIMEOUT: float = 10.0 # Max wait for the cutoff message to play before hanging up
+
+    # Supervisor Listen-in (WS /api/v1/voice/listen/{call_id}, token from POST /api/v1/admin/listen/{call_id})
+    LISTEN_IN_ENABLED: bool = True
+    LISTEN_FRAME_MS: int = 100 # Audio per message to a listener
+    LISTEN_QUEUE_FRAMES: int = 20 # ~2s per listener; older frames are dropped beyond this
+    LISTEN_MAX_LISTENERS: int = 5 # Per call
+    LISTEN_TOKEN_TTL: int = 300 # Seconds a listen-in token can be used to connect
+
+    # Live Transcripts (Redis pub/sub per tenant, fanned out by the backend's dashboard WebSocket)
+    LIVE_TRANSCRIPT_ENABLED: bool = True
+    LIVE_TRANSCRIPT_MAX_RATE_HZ: float = 4.0 # Messages per call per second; interims in between are coalesced
+
+    # Playback Tracking (Twilio marks after every outbound chunk)
+    PLAYBACK_MS_PER_CHAR: float = 65.0 # Speech rate assumed for text still being synthesized
+
+    # Admission Control (per pod)
+    MAX_CONCURRENT_CALLS: int = 50
+    ADMISSION_MAX_LOOP_LAG_MS: float = 50.0 # Refuse new calls above this smoothed lag
+    OVERFLOW_STREAM_HOST: Optional[str] = None # Send new streams here when saturated
+
+    # Drain (SIGTERM / admin endpoint); pod terminationGracePeriodSeconds must exceed deadline + flush
+    DRAIN_DEADLINE_SECONDS: int = 300
+    DRAIN_FLUSH_TIMEOUT: float = 5.0
+
+    # Pod Registry (capacity-aware stream routing across pods)
+    POD_ID: str = socket.gethostname()
+    POD_STREAM_HOST: Optional[str] = None # Host that reaches this pod directly; unset = not a routing target
+    POD_HEARTBEAT_INTERVAL: float = 2.0
+
+    # Event Loop Monitor (lag histogram + stall stacks)
+    LOOP_MONITOR_INTERVAL_MS: int = 50
+    LOOP_SLOW_CALLBACK_MS: int = 100 # Stalls longer than this are reported with the blocking stack
+    LOOP_STALL_STACK_DEPTH: int = 15
+
+    # Call Recording (per-agent opt-in via agent_config["recording_enabled"])
+    RECORDING_ENABLED: bool = True # Global kill switch
+    RECORDING_DIR: str = "/tmp/recordings" # Mount a volume (or sync to object storage) in production
+    RECORDING_BATCH_MS: int = 1000 # Audio handed to the writer thread per batch
+    RECORDING_CLOSE_TIMEOUT: float = 5.0
+
+    # Call Capture (Twilio stream + provider responses for offline replay; contains raw audio)
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_DIR: str = "/tmp/captures"
+    CAPTURE_MAX_SECONDS: int = 600
+
+    # PII Redaction (regex tier always on; Presidio tier runs in a process pool)
+    PII_NLP_ENABLED: bool = True
+    PII_NLP_WORKERS: int = 2
+    PII_NLP_TIMEOUT: float = 2.0
+    PII_BATCH_SIZE: int = 16
+    PII_BATCH_WINDOW_MS: int = 50
 
     class Config:
         env_file = ".env"
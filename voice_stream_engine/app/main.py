@@ -1,7 +1,14 @@
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.core.config import settings
-from app.api.v1.endpoints import voice
+from app.api.v1.endpoints import admin, voice
+from app.security.pii_redactor import pii_redactor
+from app.core.loop_monitor import loop_monitor
+from app.services.admission import admission
+from app.services.pod_registry import pod_registry
+from app.services.drain import drain
+from app.services.tools.sms_tool import sms_outbox
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -10,11 +17,47 @@ app = FastAPI(title=settings.PROJECT_NAME)
 
 # Include Routers
 app.include_router(voice.router, prefix="/api/v1/voice", tags=["voice"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
+
+@app.on_event("startup")
+async def startup():
+    loop_monitor.start()
+    pod_registry.start()
+    # SIGTERM drains calls before shutting down (rolling deploys)
+    drain.install_signal_handler()
+    # Load spaCy in the redaction workers before the first call arrives
+    await pii_redactor.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Queued confirmation texts go out before the pod exits
+    await sms_outbox.close()
+    await pod_registry.stop()
+    await loop_monitor.stop()
+    pii_redactor.shutdown()
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "voice_stream_engine"}
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: fails while draining so the pod leaves the Service endpoints."""
+    if drain.draining:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "draining", **drain.snapshot()}
+    return {"status": "ready"}
+
+@app.get("/capacity")
+async def capacity():
+    """Live call count and saturation for this pod."""
+    return admission.snapshot()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint (voice_active_calls / voice_saturation feed the HPA)."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=settings.PORT)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from app.core.config import settings
+
+logger = logging.getLogger("security")
+
+# --- Tier 1: Structured PII (inline, microseconds) ---
+# Order matters: cards before SSNs/phones so a 16-digit card is not half-matched as a phone.
+EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+CARD_RE = re.compile(r"\b\d(?:[ -]?\d){12,18}\b")
+# SSNs only as written (123-45-6789 / 123 45 6789) and never with an area/group/serial
+# the SSA doesn't issue: a bare run of 9 digits is an order or account number.
+SSN_RE = re.compile(r"\b(?!000|666|9\d\d)\d{3}([- ])(?!00)\d{2}\1(?!0000)\d{4}\b")
+# NANP numbers: area code and exchange never start with 0/1, which keeps most reference numbers readable
+PHONE_RE = re.compile(r"(?:\+?1[ .-]?)?(?:\([2-9]\d{2}\)|\b[2-9]\d{2})[ .-]?[2-9]\d{2}[ .-]?\d{4}\b")
+
+
+def _luhn_valid(number: str) -> bool:
+    digits = [int(c) for c in number if c.isdigit()]
+    checksum = 0
+    for i, d in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            d *= 2
+            if d > 9:
+                d -= 9
+        checksum += d
+    return checksum % 10 == 0
+
+
+def _card_sub(match: re.Match) -> str:
+    # Only real card numbers; order IDs and long reference numbers stay readable
+    return "<CREDIT_CARD>" if _luhn_valid(match.group()) else match.group()
+
+
+def redact_structured(text: str) -> str:
+    text = EMAIL_RE.sub("<EMAIL>", text)
+    text = CARD_RE.sub(_card_sub, text)
+    text = SSN_RE.sub("<SSN>", text)
+    return PHONE_RE.sub("<PHONE>", text)
+
+
+# --- Tier 2: NLP PII (Presidio, in a warm process pool) ---
+# Engines live in the worker processes only; spaCy is loaded once per worker.
+NLP_ENTITIES = [
+    "CREDIT_CARD",
+    "CRYPTO",
+    "EMAIL_ADDRESS",
+    "IBAN_CODE",
+    "IP_ADDRESS",
+    "PHONE_NUMBER",
+    "US_SSN",
+    "US_DRIVER_LICENSE",
+    "PERSON" # Use carefully, might redact Agent names
+]
+
+_analyzer = None
+_anonymizer = None
+_operators = None
+
+
+def _init_nlp_worker():
+    global _analyzer, _anonymizer, _operators
+    from presidio_analyzer import AnalyzerEngine
+    from presidio_anonymizer import AnonymizerEngine
+    from presidio_anonymizer.entities import OperatorConfig
+
+    _analyzer = AnalyzerEngine()
+    _anonymizer = AnonymizerEngine()
+    _operators = {
+        "DEFAULT": OperatorConfig("replace", {"new_value": "<REDACTED>"}),
+        "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
+        "CREDIT_CARD": OperatorConfig("replace", {"new_value": "<CREDIT_CARD>"}),
+        "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
+    }
+
+
+def _nlp_redact_batch(texts: List[str]) -> List[str]:
+    results = []
+    for text in texts:
+        findings = _analyzer.analyze(text=text, entities=NLP_ENTITIES, language="en")
+        results.append(
+            _anonymizer.anonymize(text=text, analyzer_results=findings, operators=_operators).text
+        )
+    return results
+
+
+class PIIRedactor:
+    """
+    Shared, tiered PII redaction for the voice engine.
+
+    - `redact_text`: regex tier only. Safe to call inline on the event loop.
+    - `redact` / `redact_many`: regex tier, then Presidio in a process pool.
+      Single-text calls from all active calls are coalesced into batches.
+    If Presidio is not installed, the NLP tier is skipped and the regex result is returned.
+    """
+
+    def __init__(self):
+        self.nlp_enabled = settings.PII_NLP_ENABLED and importlib.util.find_spec("presidio_analyzer") is not None
+        if settings.PII_NLP_ENABLED and not self.nlp_enabled:
+            logger.warning("Presidio not installed: PII redaction limited to the regex tier")
+        self._pool = None
+        self._pending = []
+        self._flush_handle = None
+
+    def redact_text(self, text: str) -> str:
+        if not text:
+            return ""
+        return redact_structured(text)
+
+    async def redact_many(self, texts: List[str]) -> List[str]:
+        cleaned = [self.redact_text(t) for t in texts]
+        if not self.nlp_enabled or not cleaned:
+            return cleaned
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._get_pool(), _nlp_redact_batch, cleaned),
+                timeout=settings.PII_NLP_TIMEOUT
+            )
+        except Exception as e:
+            # Structured PII is already gone; keep going with the regex result
+            logger.error(f"PII NLP tier failed: {e}")
+            return cleaned
+
+    async def redact(self, text: str) -> str:
+        """Full redaction of one text, batched with concurrent requests from other calls."""
+        if not self.nlp_enabled:
+            return self.redact_text(text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= settings.PII_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(settings.PII_BATCH_WINDOW_MS / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        results = await self.redact_many([text for text, _ in batch])
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawn (not fork): the parent runs an event loop and SDK threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PII_NLP_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_nlp_worker
+            )
+        return self._pool
+
+    async def warm_up(self):
+        """Starts the pool and loads spaCy in every worker before the first call needs it."""
+        if not self.nlp_enabled:
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            await asyncio.gather(*[
+                loop.run_in_executor(pool, _nlp_redact_batch, ["warm up"])
+                for _ in range(settings.PII_NLP_WORKERS)
+            ])
+            logger.info(f"🛡️ PII NLP pool warm ({settings.PII_NLP_WORKERS} workers)")
+        except Exception as e:
+            logger.error(f"PII NLP warm-up failed, disabling NLP tier: {e}")
+            self.nlp_enabled = False
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Process-wide instance shared by all calls
+pii_redactor = PIIRedactor()
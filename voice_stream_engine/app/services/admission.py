@@ -0,0 +1,86 @@
+import logging
+from contextlib import asynccontextmanager
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+
+logger = logging.getLogger("admission")
+
+ACTIVE_CALLS = Gauge("voice_active_calls", "Calls currently streaming on this pod")
+SATURATION = Gauge("voice_saturation", "Pod load: max(active/limit, loop_lag/lag_limit); 1.0 = full")
+LOOP_LAG = Gauge("voice_event_loop_lag_seconds", "Smoothed event-loop scheduling lag")
+REJECTED_CALLS = Counter("voice_rejected_calls_total", "New streams refused by admission control", ["reason"])
+
+
+class AdmissionController:
+    """
+    Per-pod admission control.
+
+    A new stream is admitted only while the pod has call slots left and the
+    event loop still has headroom (smoothed scheduling lag under the limit).
+    Shedding new calls keeps the calls already on the pod clean.
+    """
+
+    def __init__(self):
+        self.max_calls = settings.MAX_CONCURRENT_CALLS
+        self.max_loop_lag = settings.ADMISSION_MAX_LOOP_LAG_MS / 1000
+        self.active_calls = 0
+        self.draining = False # Set by the drain controller
+
+        ACTIVE_CALLS.set_function(lambda: self.active_calls)
+        SATURATION.set_function(self.saturation)
+        LOOP_LAG.set_function(lambda: self.loop_lag)
+
+    @property
+    def loop_lag(self) -> float:
+        # Smoothed lag from the shared loop monitor (started in main.py)
+        return loop_monitor.lag
+
+    def saturation(self) -> float:
+        return round(max(self.active_calls / self.max_calls, self.loop_lag / self.max_loop_lag), 3)
+
+    def rejection_reason(self):
+        """None if a new call can be admitted, else why not."""
+        if self.draining:
+            return "draining"
+        if self.active_calls >= self.max_calls:
+            return "capacity"
+        if self.loop_lag > self.max_loop_lag:
+            return "loop_lag"
+        return None
+
+    def can_admit(self) -> bool:
+        return self.rejection_reason() is None
+
+    def has_free_slot(self) -> bool:
+        """Hard limit only; used when the stream arrives (already admitted at the webhook)."""
+        return self.active_calls < self.max_calls
+
+    @asynccontextmanager
+    async def call_slot(self):
+        """Holds one call slot for the lifetime of a stream."""
+        self.active_calls += 1
+        try:
+            yield
+        finally:
+            self.active_calls -= 1
+
+    def reject(self, reason: str):
+        REJECTED_CALLS.labels(reason=reason).inc()
+        logger.warning(
+            f"🚫 Rejected new stream ({reason}): {self.active_calls}/{self.max_calls} calls, "
+            f"loop lag {self.loop_lag * 1000:.0f}ms"
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "active_calls": self.active_calls,
+            "max_calls": self.max_calls,
+            "loop_lag_ms": round(self.loop_lag * 1000, 1),
+            "saturation": self.saturation(),
+            "accepting": self.can_admit(),
+        }
+
+
+# Process-wide instance (one event loop per pod)
+admission = AdmissionController()
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncGenerator, Optional
+from app.core.config import settings
+from app.services.llm.events import to_dict
+
+logger = logging.getLogger("capture")
+
+CAPTURE_VERSION = 2 # v2: llm items are serialized events (v1 items still replay)
+
+# Capture file (version 2): JSON lines, `t` = seconds since the call started.
+#   {"type": "call", "version": 2, "call_id": ..., "agent_config": {...}}
+#   {"type": "twilio", "t": 0.02, "message": "<raw Twilio media stream frame>"}
+#   {"type": "stt", "t": 1.84, "text": "what time", "is_final": false, "start": 1.1, "end": 1.7}
+#   {"type": "speech_started", "t": 1.2}
+#   {"type": "llm", "t": 2.1, "model": ..., "items": [[ms_since_request, {"type": "ContentDelta", ...}], ...]}
+#   {"type": "tool", "t": 2.5, "name": ..., "arguments": ..., "result": ..., "latency_ms": 120}
+#   {"type": "tts", "t": 2.3, "text": ..., "chunks": [[ms_since_first_text, audio_bytes], ...]}
+# LLM items are events serialized by llm.events.to_dict (ContentDelta, ToolCallComplete,
+# Usage, StreamError, Timing). Version 1 files are read the same way: events.from_dict
+# also accepts their plain-text deltas and {"type": "tool_call_request"} / {"type": "usage"} items.
+# stt start/end: the transcribed audio in seconds of inbound call audio (absent if unknown).
+# Provider entries are replayed in order (nth LLM request gets the nth "llm" entry).
+
+
+def load_capture(path: str) -> dict:
+    """Parses a capture file into {"call": header, "<type>": [entries...]}."""
+    capture = {"call": {}, "twilio": [], "stt": [], "speech_started": [], "llm": [], "tool": [], "tts": []}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["type"] == "call":
+                capture["call"] = entry
+            else:
+                capture[entry["type"]].append(entry)
+    return capture
+
+
+class CallCapture:
+    """
+    Records a call's Twilio stream and provider responses (with timing) so the
+    call can be replayed offline (tests/replay). Captures contain raw caller
+    audio: enable only for test numbers or debugging sessions.
+    """
+
+    def __init__(self, call_id: str, agent_config: dict):
+        self.call_id = call_id
+        self.path = os.path.join(settings.CAPTURE_DIR, f"{call_id}.jsonl")
+        self.started = time.monotonic()
+        self.max_seconds = settings.CAPTURE_MAX_SECONDS
+        self.entries = [{
+            "type": "call",
+            "version": CAPTURE_VERSION,
+            "call_id": call_id,
+            "agent_config": {k: v for k, v in agent_config.items() if k != "call_context"},
+            "call_context": agent_config.get("call_context", {}),
+        }]
+
+    def _now(self) -> float:
+        return round(time.monotonic() - self.started, 4)
+
+    def record(self, entry_type: str, **fields):
+        t = self._now()
+        if t <= self.max_seconds:
+            self.entries.append({"type": entry_type, "t": t, **fields})
+
+    def twilio(self, message: str):
+        self.record("twilio", message=message)
+
+    def stt(self, text: str, is_final: bool, start: float = None, end: float = None):
+        timing = {"start": round(start, 3), "end": round(end, 3)} if start is not None else {}
+        self.record("stt", text=text, is_final=is_final, **timing)
+
+    def speech_started(self):
+        self.record("speech_started")
+
+    # --- Provider wrappers (same interface as the wrapped service) ---
+
+    def wrap_llm(self, llm):
+        return _CapturingLLM(llm, self)
+
+    def wrap_tts(self, tts):
+        return _CapturingTTS(tts, self)
+
+    def wrap_tools(self, tool_executor):
+        return _CapturingTools(tool_executor, self)
+
+    async def save(self) -> Optional[str]:
+        """Writes the capture off the event loop. Returns the path."""
+        def write():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                for entry in self.entries:
+                    f.write(json.dumps(entry) + "\n")
+        try:
+            await asyncio.to_thread(write)
+            return self.path
+        except Exception as e:
+            logger.error(f"Failed to save capture {self.path}: {e}")
+            return None
+
+
+class _CapturingLLM:
+    def __init__(self, llm, capture: CallCapture):
+        self._llm = llm
+        self._capture = capture
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def stream(self, messages: list, model: str = None, **kwargs) -> AsyncGenerator:
+        started = time.monotonic()
+        items = []
+        self._capture.record("llm", model=model, items=items)
+        async for event in self._llm.stream(messages, model=model, **kwargs):
+            items.append([round((time.monotonic() - started) * 1000, 1), to_dict(event)])
+            yield event
+
+
+class _CapturingTTS:
+    def __init__(self, tts, capture: CallCapture):
+        self._tts = tts
+        self._capture = capture
+
+    def __getattr__(self, name):
+        return getattr(self._tts, name)
+
+    async def stream_audio(self, text_iterator: AsyncGenerator[str, None]) -> AsyncGenerator[bytes, None]:
+        text = []
+        chunks = []
+        first_text = None
+
+        async def tee():
+            nonlocal first_text
+            async for chunk in text_iterator:
+                if first_text is None:
+                    first_text = time.monotonic()
+                text.append(chunk)
+                yield chunk
+
+        try:
+            async for audio in self._tts.stream_audio(tee()):
+                chunks.append([round((time.monotonic() - (first_text or time.monotonic())) * 1000, 1), len(audio)])
+                yield audio
+        finally:
+            self._capture.record("tts", text="".join(text), chunks=chunks)
+
+
+class _CapturingTools:
+    def __init__(self, tool_executor, capture: CallCapture):
+        self._tools = tool_executor
+        self._capture = capture
+
+    def __getattr__(self, name):
+        return getattr(self._tools, name)
+
+    async def execute(self, name: str, raw_args: str) -> str:
+        started = time.monotonic()
+        result = await self._tools.execute(name, raw_args)
+        self._capture.record(
+            "tool",
+            name=name,
+            arguments=raw_args,
+            result=result,
+            latency_ms=round((time.monotonic() - started) * 1000, 1)
+        )
+        return result
@@ -0,0 +1,162 @@
+import asyncio
+import audioop
+import logging
+import os
+import queue
+import threading
+import wave
+from concurrent.futures import Future
+from typing import Optional
+from app.core.config import settings
+from app.utils.audio_buffer import PCM_BYTES_PER_MS, SAMPLE_RATE, SAMPLE_WIDTH
+
+logger = logging.getLogger("recording")
+
+
+class _RecordingFile:
+    """
+    Writer-thread side of one call: lays both channels on the caller's timeline
+    and writes interleaved stereo WAV (left = caller, right = agent).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.left = bytearray()  # Caller audio not yet written
+        self.right = bytearray() # Agent audio not yet written (may run ahead of the caller)
+        self.written = 0 # Bytes per channel already on disk
+        self.wav = None
+
+    def add(self, inbound, outbound):
+        for view in inbound:
+            self.left += view
+        for offset, view in outbound:
+            start = offset - self.written
+            if view is None:
+                # Playback cleared: anything queued past this point was never heard
+                del self.right[max(0, start):]
+                continue
+            if start > len(self.right):
+                self.right += bytes(start - len(self.right))
+            self.right[start:start + len(view)] = view
+
+    def write(self, final: bool):
+        # Write up to where the caller timeline has reached; on close, drain both channels
+        n = max(len(self.left), len(self.right)) if final else len(self.left)
+        if n == 0:
+            return
+        left = bytes(self.left[:n]).ljust(n, b"\0")
+        right = bytes(self.right[:n]).ljust(n, b"\0")
+        del self.left[:n]
+        del self.right[:n]
+
+        stereo = audioop.add(
+            audioop.tostereo(left, SAMPLE_WIDTH, 1, 0),
+            audioop.tostereo(right, SAMPLE_WIDTH, 0, 1),
+            SAMPLE_WIDTH
+        )
+        if self.wav is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.wav = wave.open(self.path, "wb")
+            self.wav.setnchannels(2)
+            self.wav.setsampwidth(SAMPLE_WIDTH)
+            self.wav.setframerate(SAMPLE_RATE)
+        # writeframesraw: no header rewrite per batch; close() patches the sizes
+        self.wav.writeframesraw(stereo)
+        self.written += n
+
+    def close(self) -> float:
+        if self.wav:
+            self.wav.close()
+        return self.written / PCM_BYTES_PER_MS / 1000
+
+
+class RecordingWriter:
+    """Single background thread doing all recording encode + disk I/O for the pod."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, recording: _RecordingFile, inbound: list, outbound: list, done: Optional[Future] = None):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((recording, inbound, outbound, done))
+
+    def _run(self):
+        while True:
+            recording, inbound, outbound, done = self._queue.get()
+            try:
+                recording.add(inbound, outbound)
+                recording.write(final=done is not None)
+                if done is not None:
+                    done.set_result(recording.close())
+            except Exception as e:
+                logger.error(f"Recording write failed for {recording.path}: {e}")
+                if done is not None and not done.done():
+                    done.set_exception(e)
+
+
+# Process-wide writer thread
+recording_writer = RecordingWriter()
+
+
+class CallRecorder:
+    """
+    Event-loop side of a dual-channel call recording.
+
+    The transport tees PCM in here; per frame this is a list append of a
+    memoryview plus a counter. Frames are handed to the writer thread in
+    batches of RECORDING_BATCH_MS.
+    """
+
+    def __init__(self, tenant_id: str, call_id: str):
+        self.path = os.path.join(settings.RECORDING_DIR, str(tenant_id or "unknown"), f"{call_id}.wav")
+        self._file = _RecordingFile(self.path)
+        self._batch_bytes = settings.RECORDING_BATCH_MS * PCM_BYTES_PER_MS
+        self._inbound = []
+        self._outbound = []
+        self._pending_bytes = 0
+        self._in_pos = 0  # Caller bytes received (the call timeline)
+        self._out_pos = 0 # End of agent audio queued for playback on that timeline
+        self.closed = False
+
+    def write_inbound(self, pcm: bytes):
+        self._inbound.append(memoryview(pcm))
+        self._in_pos += len(pcm)
+        self._pending_bytes += len(pcm)
+        if self._pending_bytes >= self._batch_bytes:
+            self._submit()
+
+    def write_outbound(self, pcm: bytes):
+        # Twilio plays sent audio back to back, starting now if nothing is queued
+        start = max(self._out_pos, self._in_pos)
+        self._outbound.append((start, memoryview(pcm)))
+        self._out_pos = start + len(pcm)
+
+    def truncate_outbound(self):
+        """Playback was cleared (barge-in): drop agent audio queued after this instant."""
+        self._outbound.append((self._in_pos, None))
+        self._out_pos = self._in_pos
+
+    def _submit(self, done: Optional[Future] = None):
+        inbound, self._inbound = self._inbound, []
+        outbound, self._outbound = self._outbound, []
+        self._pending_bytes = 0
+        recording_writer.submit(self._file, inbound, outbound, done)
+
+    async def finish(self) -> Optional[float]:
+        """Flushes the tail and closes the file. Returns the recorded seconds (None on failure)."""
+        if self.closed:
+            return None
+        self.closed = True
+        done = Future()
+        self._submit(done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(done), settings.RECORDING_CLOSE_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Recording {self.path} not finalized: {e}")
+            return None
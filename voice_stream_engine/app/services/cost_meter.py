@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger("cost_meter")
+
+# Published by the billing worker (analytics_billing_worker/app/services/balance_publisher.py)
+RATE_CARD_KEY = "billing:rate_card"
+
+
+def balance_key(tenant_id: str) -> str:
+    return f"billing:balance:{tenant_id}"
+
+
+def inflight_key(tenant_id: str) -> str:
+    """
+    Hash of the tenant's calls still running (or not yet billed), across pods:
+    call_id -> {"cost": estimate, "at": unix time of the call's last sync}.
+    """
+    return f"billing:inflight:{tenant_id}"
+
+
+def inflight_total(entries: dict, now: float) -> Tuple[float, list]:
+    """Sum of the fresh in-flight estimates, and the call_ids of stale ones (pod died mid-call)."""
+    total, stale = 0.0, []
+    for call_id, raw in (entries or {}).items():
+        entry = json.loads(raw)
+        if now - entry["at"] > settings.BILLING_INFLIGHT_TTL:
+            stale.append(call_id)
+        else:
+            total += entry["cost"]
+    return total, stale
+
+
+OK, WARN, STOP = "ok", "warn", "stop"
+
+
+class CostMeter:
+    """
+    Running cost estimate for one call, priced with the billing worker's rate card
+    (same formula as its CostCalculator), checked against the tenant's credit.
+
+    check() is plain arithmetic on the call's running totals: no I/O on the turn
+    path. Every BILLING_SYNC_SECONDS a background sync writes our estimate under
+    our call_id in the tenant's in-flight hash and reads back the balance and the
+    other calls' estimates, so concurrent calls of one tenant share the remaining
+    credit. The billing worker deletes our entry when it bills the call; an entry
+    not synced for BILLING_INFLIGHT_TTL (its pod died) stops counting and is pruned.
+
+    Fails open: with no rate card or balance published, calls are not cut off.
+    """
+
+    def __init__(self, redis, tenant_id: str, call_id: str, max_call_cost: Optional[float] = None):
+        self.redis = redis
+        self.tenant_id = tenant_id
+        self.call_id = call_id
+        self.max_call_cost = settings.BILLING_MAX_CALL_COST if max_call_cost is None else max_call_cost
+        self.rates = None # None: meter inactive
+        self.balance = None # Tenant credit at the last sync (None: unknown)
+        self.tenant_inflight = 0.0 # In-flight total at the last sync, our share included
+        self.synced = 0.0 # Our share of it
+        self.cost = 0.0
+        self.warned = False
+        self.stop_reason = None
+        self._last_sync = 0.0
+        self._sync_task = None
+
+    async def start(self):
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(RATE_CARD_KEY)
+                pipe.get(balance_key(self.tenant_id))
+                pipe.hgetall(inflight_key(self.tenant_id))
+                rate_card, balance, inflight = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cost meter disabled for this call, Redis unavailable: {e}")
+            return
+        if not rate_card:
+            logger.warning("⚠️ No rate card published by the billing worker; cost meter disabled")
+            return
+        self.rates = json.loads(rate_card)
+        self.balance = float(balance) if balance is not None else None
+        self.tenant_inflight, _ = inflight_total(inflight, time.time())
+        self._last_sync = time.monotonic()
+
+    def estimate(self, seconds: float, metrics: dict, fast: dict) -> float:
+        """
+        Billed cost so far, including margin (mirrors CostCalculator.calculate).
+        `metrics` are the call's running totals, `fast` the fast route's token counts.
+        """
+        r = self.rates
+        fast_input = fast["input_tokens"]
+        fast_output = fast["output_tokens"]
+        raw = (
+            seconds / 60 * r["per_minute"]
+            + fast_input / 1000 * r["llm_fast_input_1k"]
+            + fast_output / 1000 * r["llm_fast_output_1k"]
+            + max(0, metrics["input_tokens"] - fast_input) / 1000 * r["llm_input_1k"]
+            + max(0, metrics["output_tokens"] - fast_output) / 1000 * r["llm_output_1k"]
+            + metrics["tts_characters"] / 1000 * r["tts_1k_chars"]
+        )
+        return raw * (1 + r["margin"])
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.balance is None:
+            return None
+        others = max(0.0, self.tenant_inflight - self.synced)
+        return self.balance - others - self.cost
+
+    def update(self, seconds: float, metrics: dict, fast: dict):
+        if self.rates is not None:
+            self.cost = self.estimate(seconds, metrics, fast)
+
+    def check(self, seconds: float, metrics: dict, fast: dict) -> str:
+        """OK, WARN (once) or STOP (from then on). O(1); any Redis sync runs in the background."""
+        if self.rates is None:
+            return OK
+        self.update(seconds, metrics, fast)
+        if time.monotonic() - self._last_sync >= settings.BILLING_SYNC_SECONDS and not self._syncing:
+            self._sync_task = asyncio.create_task(self.sync())
+
+        if self.stop_reason:
+            return STOP
+        remaining = self.remaining
+        if self.max_call_cost and self.cost >= self.max_call_cost:
+            self.stop_reason = "call_cost_limit"
+        elif remaining is not None and remaining <= 0:
+            self.stop_reason = "credit_exhausted"
+        if self.stop_reason:
+            return STOP
+
+        if not self.warned and (
+            (remaining is not None and remaining <= settings.BILLING_LOW_BALANCE_WARN)
+            or (self.max_call_cost and self.cost >= self.max_call_cost * settings.BILLING_WARN_RATIO)
+        ):
+            self.warned = True
+            return WARN
+        return OK
+
+    @property
+    def _syncing(self) -> bool:
+        return self._sync_task is not None and not self._sync_task.done()
+
+    async def sync(self):
+        """Publishes our estimate and refreshes balance + tenant in-flight total."""
+        self._last_sync = time.monotonic()
+        cost = self.cost
+        key = inflight_key(self.tenant_id)
+        now = time.time()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, self.call_id, json.dumps({"cost": cost, "at": now}))
+                # Whole hash goes once the tenant has been idle that long
+                pipe.expire(key, settings.BILLING_INFLIGHT_TTL)
+                pipe.hgetall(key)
+                pipe.get(balance_key(self.tenant_id))
+                _, _, inflight, balance = await pipe.execute()
+            self.tenant_inflight, stale = inflight_total(inflight, now)
+            if stale:
+                # Left by pods that died mid-call: no one else will take them out
+                await self.redis.hdel(key, *stale)
+        except Exception as e:
+            logger.warning(f"Cost meter sync failed: {e}")
+            return
+        self.synced = cost
+        if balance is not None:
+            self.balance = float(balance)
+
+    async def close(self) -> dict:
+        """Final sync: the estimate reported with call_ended is exactly what is in the in-flight total."""
+        if self.rates is None:
+            return {}
+        if self._sync_task:
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+        if self.cost != self.synced:
+            await self.sync()
+        return {
+            "cost_estimate": round(self.synced, 6),
+            "cost_warned": int(self.warned),
+            "cost_stop_reason": self.stop_reason or "",
+        }
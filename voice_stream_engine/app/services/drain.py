@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import signal
+import time
+from prometheus_client import Gauge
+from app.core.config import settings
+from app.services.admission import admission
+from app.services.pod_registry import pod_registry
+
+logger = logging.getLogger("drain")
+
+DRAINING = Gauge("voice_draining", "1 while this pod is draining calls before shutdown")
+
+
+class DrainController:
+    """
+    Graceful drain for rollouts.
+
+    Triggered by SIGTERM (Kubernetes pod termination) or the admin endpoint:
+    1. Mark the pod unready (/ready -> 503) and stop admitting new calls.
+    2. Let in-flight calls finish, up to DRAIN_DEADLINE_SECONDS.
+    3. End the calls still running so their telemetry is flushed, then report them.
+    4. On SIGTERM, hand over to uvicorn's normal shutdown.
+    Keep terminationGracePeriodSeconds above the deadline plus the flush timeout.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self.started_at = None
+        self.remaining_calls = None # Calls that hit the deadline (set when the drain completes)
+        self.calls = set() # Live StreamOrchestrators on this pod
+        self._task = None
+
+        DRAINING.set_function(lambda: int(self.draining))
+
+    def install_signal_handler(self):
+        # Replaces uvicorn's SIGTERM handler; SIGINT still exits immediately
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self.begin, True)
+        except (RuntimeError, NotImplementedError) as e:
+            # Not on the main thread (e.g. test client) or no loop signal support
+            logger.warning(f"SIGTERM drain not installed: {e}")
+
+    def begin(self, shutdown: bool = False):
+        if self.draining:
+            return
+        self.draining = True
+        self.started_at = time.time()
+        admission.draining = True
+        logger.warning(f"🚰 Draining: {admission.active_calls} active calls, deadline {settings.DRAIN_DEADLINE_SECONDS}s")
+        self._task = asyncio.create_task(self._drain(shutdown))
+
+    async def _drain(self, shutdown: bool):
+        # Tell the router now instead of at the next heartbeat
+        if pod_registry.enabled:
+            try:
+                await pod_registry.heartbeat()
+            except Exception as e:
+                logger.error(f"Failed to publish draining state: {e}")
+
+        # 1. Wait for calls to end on their own
+        deadline = self.started_at + settings.DRAIN_DEADLINE_SECONDS
+        last_log = 0.0
+        while admission.active_calls and time.time() < deadline:
+            if time.time() - last_log >= 10:
+                last_log = time.time()
+                logger.info(f"⏳ Waiting on {admission.active_calls} calls ({deadline - time.time():.0f}s left)")
+            await asyncio.sleep(1)
+
+        # 2. Deadline: end what's left; each call emits call_ended from its own shutdown path
+        self.remaining_calls = admission.active_calls
+        if self.calls:
+            logger.warning(f"⌛ Drain deadline reached, ending {len(self.calls)} calls")
+            await asyncio.gather(
+                *[call.end_call("drain_deadline") for call in list(self.calls)],
+                return_exceptions=True
+            )
+
+        # 3. Give them time to flush telemetry
+        flush_deadline = time.time() + settings.DRAIN_FLUSH_TIMEOUT
+        while admission.active_calls and time.time() < flush_deadline:
+            await asyncio.sleep(0.1)
+
+        logger.warning(
+            f"✅ Drain complete in {time.time() - self.started_at:.0f}s: "
+            f"{self.remaining_calls} calls cut at deadline, {admission.active_calls} not flushed"
+        )
+
+        if shutdown:
+            # uvicorn's own SIGINT handler performs the server shutdown
+            signal.raise_signal(signal.SIGINT)
+
+    def snapshot(self) -> dict:
+        return {
+            "draining": self.draining,
+            "active_calls": admission.active_calls,
+            "elapsed_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "deadline_seconds": settings.DRAIN_DEADLINE_SECONDS,
+            "remaining_calls": self.remaining_calls,
+            "complete": self._task is not None and self._task.done(),
+        }
+
+
+# Process-wide instance
+drain = DrainController()
@@ -0,0 +1,181 @@
+import asyncio
+import audioop
+import hashlib
+import hmac
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+from app.utils.audio_buffer import PCM_BYTES_PER_MS, SAMPLE_WIDTH
+
+logger = logging.getLogger("listen_in")
+
+LISTENERS = Gauge("listen_in_listeners", "Supervisors listening to calls on this pod")
+DROPPED_FRAMES = Counter("listen_in_dropped_frames_total", "Listen-in frames dropped for slow listeners")
+
+MODES = ("mixed", "dual") # Mono caller+agent, or stereo (left = caller, right = agent)
+ENCODINGS = ("pcm16", "mulaw") # 8 kHz, little-endian 16-bit or G.711 mu-law
+
+
+def sign_listen_token(call_id: str, ttl: int = None) -> Tuple[int, str]:
+    """(expires, token) granting listen-in to one call until `expires` (unix seconds)."""
+    expires = int(time.time()) + (ttl or settings.LISTEN_TOKEN_TTL)
+    return expires, _signature(call_id, expires)
+
+
+def verify_listen_token(call_id: str, expires: int, token: str) -> bool:
+    if not token or expires < time.time():
+        return False
+    return hmac.compare_digest(token, _signature(call_id, expires))
+
+
+def _signature(call_id: str, expires: int) -> str:
+    message = f"listen:{call_id}:{expires}".encode()
+    return hmac.new(settings.API_SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+class Listener:
+    """One supervisor socket. Frames are shared, immutable bytes; None marks the end of the call."""
+
+    def __init__(self, mode: str, encoding: str):
+        self.mode = mode
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LISTEN_QUEUE_FRAMES)
+        self.dropped = 0
+
+    def offer(self, frame: Optional[bytes]):
+        # Never wait on a listener: a slow one loses its oldest audio, the call doesn't notice
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            DROPPED_FRAMES.inc()
+        self.queue.put_nowait(frame)
+
+
+class ListenTap:
+    """
+    Per-call tap the transport feeds with the PCM it already decodes/sends.
+
+    Agent audio is laid on the caller's timeline the way Twilio plays it (back
+    to back, from now if nothing is queued; dropped on clear), so listeners hear
+    the conversation as the caller does. Every LISTEN_FRAME_MS of caller audio,
+    each (mode, encoding) in use is mixed and encoded once and the same bytes
+    object is queued to every listener that asked for it: adding a listener
+    adds a queue put, not codec work. With nobody listening, a frame costs a
+    slice of the agent timeline.
+    """
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.listeners: List[Listener] = []
+        self._agent = bytearray() # Agent audio queued for playback, starting at the caller's "now"
+        self._caller = bytearray() # Caller audio of the frame being built
+        self._agent_frame = bytearray()
+        self._frame_bytes = settings.LISTEN_FRAME_MS * PCM_BYTES_PER_MS
+        self.closed = False
+
+        self.peak_listeners = 0
+        self.frames = 0 # Frames encoded (per mode/encoding in use)
+        self._dropped = 0 # By listeners that already left
+
+    # --- Transport side (hot path) ---
+
+    def inbound(self, pcm: bytes):
+        n = len(pcm)
+        agent = self._agent[:n]
+        del self._agent[:n]
+        if not self.listeners:
+            return
+        self._caller += pcm
+        self._agent_frame += agent.ljust(n, b"\0")
+        if len(self._caller) >= self._frame_bytes:
+            self._emit()
+
+    def outbound(self, pcm: bytes):
+        self._agent += pcm
+
+    def clear(self):
+        """Playback cleared (barge-in): the caller never hears what was still queued."""
+        self._agent.clear()
+
+    def _emit(self):
+        caller, self._caller = bytes(self._caller), bytearray()
+        agent, self._agent_frame = bytes(self._agent_frame), bytearray()
+        encoded: Dict[Tuple[str, str], bytes] = {}
+        for listener in self.listeners:
+            key = (listener.mode, listener.encoding)
+            frame = encoded.get(key)
+            if frame is None:
+                frame = encoded[key] = self._encode(caller, agent, *key)
+                self.frames += 1
+            listener.offer(frame)
+
+    @staticmethod
+    def _encode(caller: bytes, agent: bytes, mode: str, encoding: str) -> bytes:
+        if mode == "dual":
+            pcm = audioop.add(
+                audioop.tostereo(caller, SAMPLE_WIDTH, 1, 0),
+                audioop.tostereo(agent, SAMPLE_WIDTH, 0, 1),
+                SAMPLE_WIDTH
+            )
+        else:
+            pcm = audioop.add(caller, agent, SAMPLE_WIDTH) # Saturates rather than wraps
+        return audioop.lin2ulaw(pcm, SAMPLE_WIDTH) if encoding == "mulaw" else pcm
+
+    # --- Listener side ---
+
+    def add_listener(self, mode: str, encoding: str) -> Optional[Listener]:
+        if self.closed or len(self.listeners) >= settings.LISTEN_MAX_LISTENERS:
+            return None
+        listener = Listener(mode, encoding)
+        self.listeners.append(listener)
+        self.peak_listeners = max(self.peak_listeners, len(self.listeners))
+        LISTENERS.inc()
+        logger.info(f"🎧 Listener joined call {self.call_id} ({mode}/{encoding}, {len(self.listeners)} listening)")
+        return listener
+
+    def remove_listener(self, listener: Listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+            self._dropped += listener.dropped
+            LISTENERS.dec()
+            if not self.listeners:
+                # Half-built frame belongs to nobody now
+                self._caller.clear()
+                self._agent_frame.clear()
+
+    def close(self):
+        self.closed = True
+        for listener in self.listeners:
+            listener.offer(None)
+
+    def stats(self) -> dict:
+        return {
+            "listen_in_peak_listeners": self.peak_listeners,
+            "listen_in_frames": self.frames,
+            "listen_in_dropped_frames": self._dropped + sum(listener.dropped for listener in self.listeners),
+        }
+
+
+class ListenHub:
+    """Calls on this pod that can be listened to, by call_id."""
+
+    def __init__(self):
+        self.taps: Dict[str, ListenTap] = {}
+
+    def open(self, call_id: str) -> ListenTap:
+        tap = self.taps[call_id] = ListenTap(call_id)
+        return tap
+
+    def get(self, call_id: str) -> Optional[ListenTap]:
+        return self.taps.get(call_id)
+
+    def close(self, call_id: str) -> Optional[ListenTap]:
+        tap = self.taps.pop(call_id, None)
+        if tap:
+            tap.close()
+        return tap
+
+
+listen_hub = ListenHub()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger("live_transcript")
+
+
+def tenant_channel(tenant_id: str) -> str:
+    """One pub/sub channel per tenant; the backend hub subscribes once per tenant it has viewers for."""
+    return f"live_transcripts:{tenant_id}"
+
+
+class LiveTranscriptPublisher:
+    """
+    Publishes a call's live transcript to Redis pub/sub for dashboards.
+
+    Updates are coalesced to at most LIVE_TRANSCRIPT_MAX_RATE_HZ messages per
+    call: each message carries every line finalized since the previous one plus
+    the latest in-progress text per role (superseded interims are never sent).
+    Nothing on the audio path waits: update() only records state and schedules
+    a flush. Text is redacted (regex tier) once per flush, not per interim.
+
+    Message: {"type": "transcript", "call_id", "agent_id", "seq", "ts",
+              "finals": [{"role", "text", "interrupted"?}], "partials": {"user": "...", "assistant": "..."}}
+    plus {"type": "call_started" | "call_ended"} around the call. An assistant final
+    with "interrupted" replaces the previous assistant line with what the caller heard.
+    """
+
+    def __init__(self, redis, call_id: str, tenant_id: str, agent_id: Optional[str],
+                 redact: Callable[[str], str] = None):
+        self.redis = redis
+        self.call_id = call_id
+        self.agent_id = agent_id
+        self.channel = tenant_channel(tenant_id)
+        self._redact = redact or (lambda text: text)
+        self.min_interval = 1 / settings.LIVE_TRANSCRIPT_MAX_RATE_HZ
+        self.seq = 0
+        self._finals: List[dict] = []
+        self._partials = {}
+        self._dirty = False
+        self._last_publish = 0.0
+        self._flush_task = None
+        self._assistant = [] # Reply text spoken so far this turn
+
+        # Per-call counters
+        self.updates = 0
+        self.published = 0
+
+    # --- Inputs (sync, called from the call's stages) ---
+
+    def update(self, role: str, text: str, is_final: bool, **extra):
+        text = (text or "").strip()
+        if not text:
+            return
+        self.updates += 1
+        if is_final:
+            self._finals.append({"role": role, "text": text, **extra})
+            self._partials.pop(role, None)
+        else:
+            self._partials[role] = text
+        self._dirty = True
+        self._schedule()
+
+    def assistant_delta(self, text: str):
+        self._assistant.append(text)
+        self.update("assistant", "".join(self._assistant), is_final=False)
+
+    def assistant_done(self, heard: Optional[str] = None):
+        """Closes the reply; `heard` replaces it when the caller cut it short."""
+        if heard is not None:
+            self.update("assistant", heard, is_final=True, interrupted=True)
+        elif self._assistant:
+            self.update("assistant", "".join(self._assistant), is_final=True)
+        self._assistant = []
+        self._partials.pop("assistant", None)
+
+    # --- Publishing ---
+
+    def _schedule(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Loops so updates arriving while a publish is in flight still go out
+        while self._dirty:
+            wait = self._last_publish + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._flush()
+
+    async def _flush(self):
+        if not self._dirty:
+            return
+        finals, self._finals = self._finals, []
+        self._dirty = False
+        self._last_publish = time.monotonic()
+        await self._publish({
+            "type": "transcript",
+            "finals": [{**line, "text": self._redact(line["text"])} for line in finals],
+            "partials": {role: self._redact(text) for role, text in self._partials.items()},
+        })
+
+    async def _publish(self, payload: dict):
+        self.seq += 1
+        message = json.dumps({"call_id": self.call_id, "agent_id": self.agent_id, "seq": self.seq, "ts": time.time(), **payload})
+        try:
+            await self.redis.publish(self.channel, message)
+            self.published += 1
+        except Exception as e:
+            # Live view is best effort; the call and the stored transcript don't depend on it
+            logger.warning(f"Live transcript publish failed: {e}")
+
+    async def notice(self, kind: str, **fields):
+        """Call-level event for the dashboard (e.g. cost_warning), outside the transcript coalescing."""
+        await self._publish({"type": kind, **fields})
+
+    async def started(self, direction: Optional[str] = None):
+        await self._publish({"type": "call_started", "direction": direction})
+
+    async def ended(self, status: str):
+        """Flushes what is pending (ignoring the rate limit) and announces the end."""
+        self.assistant_done()
+        self._partials.clear()
+        await self._flush()
+        if self._flush_task:
+            # Not cancelled: it may be mid-publish; with nothing dirty it exits after its wait
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self._publish({"type": "call_ended", "status": status})
@@ -0,0 +1,68 @@
+"""
+Typed events yielded by OpenAIService.stream() (and anything wrapping it).
+
+A request yields ContentDelta / ToolCallComplete items as they arrive, then
+Usage (when the provider reports it) and Timing; a failure ends the stream
+with StreamError instead of raising.
+"""
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Union
+
+
+@dataclass
+class ContentDelta:
+    text: str
+
+
+@dataclass
+class ToolCallComplete:
+    id: str
+    name: str
+    arguments: str # Raw JSON, as generated
+
+
+@dataclass
+class Usage:
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cached_input_tokens: int = 0 # Part of input_tokens served from the provider's prompt cache
+
+
+@dataclass
+class StreamError:
+    message: str
+    retryable: bool = False # Worth another route (timeout, 429, 5xx, connection)
+
+
+@dataclass
+class Timing:
+    model: str
+    ttft_ms: Optional[float] # None if nothing was generated
+    total_ms: float
+    output_tokens: int
+    tokens_per_sec: float
+
+
+LLMEvent = Union[ContentDelta, ToolCallComplete, Usage, StreamError, Timing]
+EVENT_TYPES = {cls.__name__: cls for cls in (ContentDelta, ToolCallComplete, Usage, StreamError, Timing)}
+
+
+def to_dict(event: LLMEvent) -> dict:
+    return {"type": type(event).__name__, **asdict(event)}
+
+
+def from_dict(data) -> List[LLMEvent]:
+    """
+    Events from a serialized item (call captures). Also reads the pre-event
+    capture items: plain text, {"type": "tool_call_request"} and {"type": "usage"}.
+    """
+    if isinstance(data, str):
+        return [ContentDelta(data)]
+    data = dict(data)
+    kind = data.pop("type")
+    if kind == "tool_call_request":
+        return [ToolCallComplete(c["id"], c["function"]["name"], c["function"]["arguments"]) for c in data["calls"]]
+    if kind == "usage":
+        return [Usage(data.get("model", ""), data["input_tokens"], data["output_tokens"])]
+    return [EVENT_TYPES[kind](**data)]
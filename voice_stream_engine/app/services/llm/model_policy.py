@@ -0,0 +1,78 @@
+import re
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.services.turn.turn_detector import SHORT_ANSWERS
+
+FAST = "fast"
+LARGE = "large"
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Turns likely to need a tool call (argument extraction is where small models slip)
+TOOL_WORDS = {
+    "book", "booking", "appointment", "schedule", "reschedule", "available", "availability",
+    "calendar", "meeting", "slot", "reserve", "text", "sms",
+}
+
+# Open-ended or sensitive requests worth the large model
+COMPLEX_WORDS = {
+    "why", "explain", "compare", "difference", "recommend", "should", "complaint",
+    "complain", "cancel", "refund", "problem", "wrong", "issue", "angry", "manager",
+}
+
+
+class ModelPolicy:
+    """
+    Per-turn choice between a fast/cheap model and the large one.
+
+    Agents set `agent_config["model_routing"]`:
+        {"mode": "auto" | "fast" | "large", "fast_model": ..., "large_model": ..., "fast_max_words": 12}
+
+    In "auto" mode a turn goes to the large model when it looks like it needs a
+    tool (in the user's words, or because the agent's last line was about one),
+    is open-ended/sensitive, or is long without grounding context. Short replies
+    ("yes", "okay") and short questions answered from retrieved context go fast.
+    """
+
+    DEFAULTS = {
+        "mode": None, # None = settings.LLM_ROUTING_MODE
+        "fast_model": None,
+        "large_model": None,
+        "fast_max_words": 12,
+        "rag_fast_max_words": 20, # Grounded (RAG hit) questions may be a bit longer
+    }
+
+    def __init__(self, config: dict = None, tools_enabled: bool = True):
+        self.config = {**self.DEFAULTS, **(config or {})}
+        self.tools_enabled = tools_enabled # Tool-less agents have no tool turns to protect
+        self.mode = self.config["mode"] or settings.LLM_ROUTING_MODE
+        self.models = {
+            FAST: self.config["fast_model"] or settings.LLM_FAST_MODEL,
+            LARGE: self.config["large_model"] or settings.LLM_MODEL,
+        }
+
+    def classify(self, user_text: str, last_assistant: Optional[str] = None, rag_hit: bool = False) -> Tuple[str, str]:
+        """Returns (route, reason)."""
+        if self.mode in (FAST, LARGE):
+            return self.mode, "policy"
+
+        words = _WORD_RE.findall((user_text or "").lower())
+        previous = set(_WORD_RE.findall((last_assistant or "").lower()))
+
+        if self.tools_enabled and TOOL_WORDS.intersection(words):
+            return LARGE, "tool"
+        if self.tools_enabled and TOOL_WORDS.intersection(previous) and (last_assistant or "").rstrip().endswith("?"):
+            # "Yes" to "Shall I book that?" is a tool call in disguise
+            return LARGE, "tool_followup"
+        if COMPLEX_WORDS.intersection(words):
+            return LARGE, "complex"
+        if not words or " ".join(words) in SHORT_ANSWERS or len(words) <= 3:
+            return FAST, "short"
+        if len(words) <= self.config["fast_max_words"]:
+            return FAST, "simple"
+        if rag_hit and len(words) <= self.config["rag_fast_max_words"]:
+            return FAST, "rag"
+        return LARGE, "long"
+
+    def model_for(self, route: str) -> str:
+        return self.models[route]
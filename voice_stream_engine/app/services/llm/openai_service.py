@@ -1,139 +1,105 @@
-from openai import AsyncOpenAI
+import time
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from app.core.config import settings
 from typing import AsyncGenerator
+from app.services.llm.events import ContentDelta, LLMEvent, StreamError, Timing, ToolCallComplete, Usage
 
-class OpenAIService:
-    def __init__(self, system_prompt: str):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.system_prompt = system_prompt
-
-    async def get_response_stream(self, user_text: str, conversation_history: list = None) -> AsyncGenerator[str, None]:
-        """
-        Generate streaming response from GPT-4o
-        """
-        messages = [{"role": "system", "content": self.system_prompt}]
-        
-        if conversation_history:
-            messages.extend(conversation_history)
-        
-        messages.append({"role": "user", "content": user_text})
-
-        try:
-            stream = await self.client.chat.completions.create(
-                model="gpt-4o", # Use gpt-3.5-turbo if 4o is too expensive/slow for dev
-                messages=messages,
-                stream=True,
-                max_tokens=150
-            )
-
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
 
-        except Exception as e:
-            yield f"Error generating response: {str(e)}"
 
-    async def get_response_stream_from_messages(self, messages: list) -> AsyncGenerator[str, None]:
-        """
-        Directly streams response based on the provided list of messages.
-        Used when RAG modifies the context dynamically.
-        """
-        # Ensure System Prompt is first if not present (defensive coding)
-        if not messages or messages[0].get("role") != "system":
-            messages.insert(0, {"role": "system", "content": self.system_prompt})
+def _chunk_usage(chunk):
+    """(input, output, cached input) tokens from a stream chunk; openai 1.13 keeps usage as an unparsed dict extra."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    details = usage.get("prompt_tokens_details") or {}
+    return usage["prompt_tokens"], usage["completion_tokens"], details.get("cached_tokens") or 0
 
-        try:
-            stream = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                stream=True,
-                max_tokens=250 # Concise answers for voice
-            )
-
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-
-        except Exception as e:
-            yield f" I'm having trouble thinking right now. {str(e)}"
+class OpenAIService:
+    def __init__(self, system_prompt: str, model: str = None, base_url: str = None, api_key: str = None):
+        self.client = AsyncOpenAI(
+            api_key=api_key or settings.OPENAI_API_KEY,
+            base_url=base_url or settings.OPENAI_BASE_URL
+        )
+        self.system_prompt = system_prompt
+        self.model = model or settings.LLM_MODEL
 
-    async def get_response_stream_with_tools(self, messages: list) -> AsyncGenerator[Union[str, Dict], None]:
+    async def stream(self, messages: list, model: str = None, tools: list = None,
+                     max_tokens: int = None) -> AsyncGenerator[LLMEvent, None]:
         """
-        Yields strings (tokens) for TTS 
-        OR 
-        Yields a Dictionary (Tool Call Request) if the AI decides to use a tool.
+        The one streaming path. Yields typed events (see events.py):
+        ContentDelta for text to speak, ToolCallComplete once a tool call's
+        arguments are complete, then Usage and Timing. Errors end the stream
+        with a StreamError; they are never yielded as text.
         """
-        # Ensure System Prompt
+        model = model or self.model
+        # System prompt goes on a copy; the caller's history stays as it is
         if not messages or messages[0].get("role") != "system":
-            messages.insert(0, {"role": "system", "content": self.system_prompt})
+            messages = [{"role": "system", "content": self.system_prompt}] + list(messages)
+
+        request = {"model": model, "messages": messages, "stream": True,
+                   # stream_options predates our pinned SDK; send it raw
+                   "extra_body": {"stream_options": {"include_usage": True}}}
+        if tools:
+            request.update(tools=tools, tool_choice="auto")
+        if max_tokens:
+            request["max_tokens"] = max_tokens
+
+        started = time.monotonic()
+        first_at = None
+        deltas = 0
+        usage = None
+        tool_calls = {} # index -> {"id", "name", "arguments"}
+        stream = None
 
         try:
-            stream = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                stream=True,
-                tools=AVAILABLE_TOOLS,
-                tool_choice="auto"
-            )
-
-            tool_calls_buffer = []
-            
+            stream = await self.client.chat.completions.create(**request)
             async for chunk in stream:
+                # Usage arrives in a final chunk with no choices
+                usage = _chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
                 delta = chunk.choices[0].delta
-                
+                if first_at is None and (delta.content or delta.tool_calls):
+                    first_at = time.monotonic()
+
                 # Case 1: Text Content (Speak it)
                 if delta.content:
-                    yield delta.content
-
-                # Case 2: Tool Call (Buffer it)
-                if delta.tool_calls:
-                    for tc in delta.tool_calls:
-                        # OpenAI sends tool calls in partial chunks
-                        if len(tool_calls_buffer) <= tc.index:
-                            tool_calls_buffer.append({
-                                "id": tc.id,
-                                "function": {"name": tc.function.name, "arguments": ""}
-                            })
-                        
-                        if tc.function.arguments:
-                            tool_calls_buffer[tc.index]["function"]["arguments"] += tc.function.arguments
-
-            # End of Stream: Check if we have buffered tools
-            if tool_calls_buffer:
-                # Yield the structured tool call request
-                yield {"type": "tool_call_request", "calls": tool_calls_buffer}
-
-        except Exception as e:
-            yield f"Error: {str(e)}"
-
-    async def get_response_stream_with_usage(self, messages: list) -> AsyncGenerator[dict, None]:
-        """
-        Yields content chunks AND final usage stats.
-        """
-        if not messages or messages[0].get("role") != "system":
-            messages.insert(0, {"role": "system", "content": self.system_prompt})
-
-        try:
-            stream = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                stream=True,
-                # CRITICAL: Request usage stats in stream
-                stream_options={"include_usage": True} 
-            )
-
-            async for chunk in stream:
-                # 1. Content
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield {"type": "content", "text": chunk.choices[0].delta.content}
-                
-                # 2. Usage Stats (Usually in the last chunk where choices is empty)
-                if chunk.usage:
-                    yield {
-                        "type": "usage", 
-                        "input_tokens": chunk.usage.prompt_tokens,
-                        "output_tokens": chunk.usage.completion_tokens
-                    }
-
+                    deltas += 1
+                    yield ContentDelta(delta.content)
+
+                # Case 2: Tool Call (Buffer it; OpenAI sends arguments in partial chunks)
+                for tc in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tc.index, {"id": tc.id, "name": "", "arguments": ""})
+                    if tc.function.name:
+                        call["name"] = tc.function.name
+                    if tc.function.arguments:
+                        call["arguments"] += tc.function.arguments
+                        deltas += 1
         except Exception as e:
-            yield {"type": "error", "text": str(e)}
\ No newline at end of file
+            yield StreamError(f"{type(e).__name__}: {e}", retryable=isinstance(e, RETRYABLE_ERRORS))
+            return
+        finally:
+            if stream is not None:
+                # Abandoned (interrupted / lost a hedge race): release the HTTP stream now
+                await stream.close()
+
+        for index in sorted(tool_calls):
+            call = tool_calls[index]
+            yield ToolCallComplete(call["id"], call["name"], call["arguments"])
+
+        if usage:
+            yield Usage(model, usage[0], usage[1], cached_input_tokens=usage[2])
+
+        finished = time.monotonic()
+        output_tokens = usage[1] if usage else deltas # Deltas are ~1 token each
+        generating = finished - first_at if first_at else 0.0
+        yield Timing(
+            model=model,
+            ttft_ms=round((first_at - started) * 1000, 1) if first_at else None,
+            total_ms=round((finished - started) * 1000, 1),
+            output_tokens=output_tokens,
+            tokens_per_sec=round(output_tokens / generating, 1) if generating > 0 else 0.0
+        )
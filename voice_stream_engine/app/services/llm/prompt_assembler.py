@@ -0,0 +1,34 @@
+import json
+from typing import List, Optional
+
+CONTEXT_HEADER = "Use the following context to answer the user's last message if relevant:"
+
+
+class PromptAssembler:
+    """
+    Builds the messages for every LLM request of a call so the prompt prefix
+    stays byte-identical from request to request. Provider prompt caching only
+    reuses an exact prefix, so the order is:
+
+        tools -> system prompt -> conversation history -> volatile context
+
+    Tool schemas (the registry's shared, read-only list for the agent's enabled
+    tools) and the system prompt are fixed when the call starts. History
+    is append-only, and per-turn context (RAG) goes after the latest message.
+    It is never spliced into the history, so the next turn's prefix still matches.
+    """
+
+    def __init__(self, system_prompt: Optional[str], tools: Optional[list] = None):
+        self.system = {"role": "system", "content": system_prompt or ""}
+        self.tools = tools or None # None: no tool schemas sent at all
+
+    def build(self, history: List[dict], context: Optional[str] = None) -> List[dict]:
+        messages = [self.system, *history]
+        if context:
+            messages.append({"role": "system", "content": f"{CONTEXT_HEADER}\n{context}"})
+        return messages
+
+    @property
+    def prefix_chars(self) -> int:
+        """Size of the static part (schemas + system prompt), for logs."""
+        return len(json.dumps(self.tools or [])) + len(self.system["content"])
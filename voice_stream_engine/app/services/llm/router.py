@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncGenerator
+from prometheus_client import Counter, Histogram
+from app.core.config import settings
+from app.services.llm.events import LLMEvent, StreamError
+from app.services.rag.context_packer import estimate_tokens
+
+logger = logging.getLogger("llm_router")
+
+FIRST_TOKEN = Histogram(
+    "llm_first_token_seconds", "LLM request -> first event, after hedging",
+    buckets=(0.2, 0.4, 0.6, 0.8, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+)
+RACES = Counter("llm_hedge_races_total", "Requests that went to a second route, by who answered", ["outcome"])
+SAVED = Histogram(
+    "llm_hedge_saved_seconds", "First-token time saved when the hedge won",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+)
+
+_EMPTY = object() # Route finished without any output
+
+
+async def _first_item(stream):
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return _EMPTY
+    except Exception as e:
+        return StreamError(f"{type(e).__name__}: {e}")
+
+
+class _Route:
+    """One in-flight request: its stream plus a task pulling the first item."""
+
+    def __init__(self, name: str, service, messages: list, **kwargs):
+        self.name = name
+        self.model = kwargs.get("model") or service.model
+        # Billed by the provider even if we drop the stream before its usage is reported
+        self.prompt_tokens = estimate_tokens(json.dumps(messages, default=str) + json.dumps(kwargs.get("tools") or []))
+        self.stream = service.stream(messages, **kwargs)
+        self.first = asyncio.ensure_future(_first_item(self.stream))
+        self.first_at = None
+        self.abandoned = False
+        self.first.add_done_callback(lambda _: setattr(self, "first_at", time.monotonic()))
+
+    @property
+    def ok(self) -> bool:
+        return self.first.done() and not self.first.cancelled() and not isinstance(self.first.result(), StreamError)
+
+    async def close(self):
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        await self.stream.aclose()
+
+
+class LLMRouter:
+    """
+    Hedged streaming across a primary and a secondary LLM (model and/or endpoint).
+
+    The primary starts at once. If it has no first event by the first-token
+    deadline, the same request also goes to the secondary and whichever answers
+    first is streamed; a primary whose first event is a StreamError fails over
+    straight away. Once a route has produced output we stay on it.
+
+    The losing request is closed when its own first item arrives (at most
+    LLM_HEDGE_OBSERVE_SECONDS later), which is how the time saved is measured.
+    Its prompt is still billed but never reports usage: an estimate of it is
+    kept per model in `abandoned` for the caller to price (take_abandoned()).
+
+    `routes` maps primary model names to route names (fast/large) for the
+    per-route hedge counts in stats().
+    """
+
+    def __init__(self, primary, secondary, first_token_deadline_ms: int = None, routes: dict = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.deadline = (first_token_deadline_ms or settings.LLM_FIRST_TOKEN_DEADLINE_MS) / 1000
+        self.routes = routes or {}
+        self._observers = {} # observer task -> losing route
+
+        # Per-call counters (merged into the call metrics, i.e. per agent in analytics)
+        self.requests = 0
+        self.hedged = 0
+        self.hedged_by_route = {route: 0 for route in self.routes.values()}
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.failed = 0
+        self.first_token_total = 0.0
+        self.first_token_max = 0.0
+        self.saved_total = 0.0
+        self.abandoned = {} # model -> estimated input tokens of requests dropped before reporting usage
+        self.abandoned_total = 0
+
+    async def stream(self, messages: list, model: str = None, **kwargs) -> AsyncGenerator[LLMEvent, None]:
+        """Same events as OpenAIService.stream(). `model` is for the primary; the hedge keeps its own."""
+        self.requests += 1
+        started = time.monotonic()
+        winner, first = await self._race(messages, model, **kwargs)
+
+        waited = time.monotonic() - started
+        self.first_token_total += waited
+        self.first_token_max = max(self.first_token_max, waited)
+        FIRST_TOKEN.observe(waited)
+
+        try:
+            if first is _EMPTY:
+                return
+            yield first
+            if isinstance(first, StreamError):
+                return # Every route failed
+            async for item in winner.stream:
+                yield item
+        finally:
+            await winner.stream.aclose()
+
+    async def _race(self, messages: list, model: str = None, **kwargs):
+        """Returns (winning route, its first event); the first event is a StreamError if every route failed."""
+        primary = _Route("primary", self.primary, messages, model=model, **kwargs)
+        secondary = None
+        try:
+            await asyncio.wait({primary.first}, timeout=self.deadline)
+            if primary.ok:
+                return primary, primary.first.result()
+
+            failover = primary.first.done()
+            if failover:
+                self.failovers += 1
+                logger.warning(f"⚠️ Primary LLM failed before first token, failing over: {primary.first.result().message}")
+            else:
+                self.hedged += 1
+                route = self.routes.get(primary.model)
+                if route:
+                    self.hedged_by_route[route] += 1
+                logger.info(f"⏱️ No first token after {self.deadline * 1000:.0f}ms, hedging to {self.secondary.model}")
+
+            secondary = _Route("hedge", self.secondary, messages, **kwargs)
+            pending = {secondary.first} if failover else {primary.first, secondary.first}
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for route, other in ((secondary, primary), (primary, secondary)):
+                    if route.ok:
+                        RACES.labels("failover" if failover else route.name).inc()
+                        if not failover:
+                            self.hedge_wins += route is secondary
+                            self._observe_loser(other, winner=route)
+                        return route, route.first.result()
+        except BaseException:
+            # Turn cancelled mid-race: don't leave requests streaming
+            await asyncio.gather(*(self._abandon(r) for r in (primary, secondary) if r), return_exceptions=True)
+            raise
+
+        self.failed += 1
+        RACES.labels("failed").inc()
+        await primary.close()
+        return secondary, secondary.first.result()
+
+    def _observe_loser(self, loser: _Route, winner: _Route):
+        """Waits (bounded) for the loser's first item to learn what hedging saved, then closes it."""
+        async def observe():
+            try:
+                await asyncio.wait({loser.first}, timeout=settings.LLM_HEDGE_OBSERVE_SECONDS)
+                if winner.name == "hedge":
+                    # Lower bound if the primary never answered within the window
+                    loser_at = loser.first_at if loser.ok else time.monotonic()
+                    saved = max(0.0, loser_at - winner.first_at)
+                    self.saved_total += saved
+                    SAVED.observe(saved)
+            finally:
+                await self._abandon(loser)
+
+        task = asyncio.create_task(observe())
+        self._observers[task] = loser
+        task.add_done_callback(lambda t: self._observers.pop(t, None))
+
+    async def _abandon(self, route: _Route):
+        """Closes a request whose usage we will never see, counting its prompt as billed."""
+        if route.abandoned:
+            return
+        route.abandoned = True
+        if not (route.first.done() and not route.ok):
+            # Failed requests aren't billed; anything else reached the model
+            self.abandoned[route.model] = self.abandoned.get(route.model, 0) + route.prompt_tokens
+            self.abandoned_total += route.prompt_tokens
+        await route.close()
+
+    def take_abandoned(self) -> dict:
+        """Estimated input tokens abandoned since the last call, per model."""
+        abandoned, self.abandoned = self.abandoned, {}
+        return abandoned
+
+    async def close(self):
+        observers = dict(self._observers)
+        for task in observers:
+            task.cancel()
+        await asyncio.gather(*observers, return_exceptions=True)
+        # An observer cancelled before it ever ran never reached its finally
+        await asyncio.gather(*(self._abandon(loser) for loser in observers.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "llm_requests": self.requests,
+            "llm_hedged": self.hedged,
+            **{f"llm_{route}_hedged": count for route, count in self.hedged_by_route.items()},
+            "llm_hedge_wins": self.hedge_wins,
+            "llm_failovers": self.failovers,
+            "llm_failed": self.failed,
+            "llm_first_token_avg_ms": round(self.first_token_total * 1000 / self.requests, 1) if self.requests else 0.0,
+            "llm_first_token_max_ms": round(self.first_token_max * 1000, 1),
+            "llm_hedge_saved_ms": round(self.saved_total * 1000, 1),
+            "llm_abandoned_input_tokens": self.abandoned_total,
+        }
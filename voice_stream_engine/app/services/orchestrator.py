@@ -1,178 +1,735 @@
 import asyncio
 import logging
 import time
+import uuid
+from typing import Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from app.services.telephony.twilio_service import TwilioTransport
 from app.services.stt.deepgram_service import DeepgramService
+from app.services.stt.audio_forwarder import InboundAudioForwarder
+from app.services.turn.turn_detector import TurnDetector
 from app.services.llm.openai_service import OpenAIService
+from app.services.llm.router import LLMRouter
+from app.services.llm.model_policy import ModelPolicy, FAST, LARGE
+from app.services.llm.events import ContentDelta, StreamError, Timing, ToolCallComplete, Usage
+from app.services.llm.prompt_assembler import PromptAssembler
 from app.services.tts.elevenlabs_service import ElevenLabsService
 from app.services.rag.retrieval_service import RetrievalService
-from app.services.tools.executor import ToolExecutor 
+from app.services.rag.context_packer import ContextPacker
+from app.services.rag.prefetch import RagPrefetcher
+from app.services.tools.executor import ToolExecutor
+from app.services.tools.registry import tool_registry
 from app.services.telemetry_service import TelemetryService
-from app.security.pii_redactor import PIIRedactor
+from app.services.call_recorder import CallRecorder
+from app.services.call_capture import CallCapture
+from app.services.live_transcript import LiveTranscriptPublisher
+from app.services.listen_in import listen_hub
+from app.services.cost_meter import CostMeter, STOP, WARN
+from app.services.pipeline import StageQueue, SEGMENT_END, TURN_END
+from app.core.config import settings
+from app.security.pii_redactor import pii_redactor
 
 logger = logging.getLogger("orchestrator")
 
 class StreamOrchestrator:
+    """
+    Per-call pipeline. Each stage is a long-lived task connected by bounded queues:
+
+        Twilio WS --inbound_audio--> STT stage (forwarder + VAD) --> Deepgram
+        Deepgram --transcripts--> Turn stage (turn detector) --> turn task (LLM/tools)
+        turn task --text_chunks--> TTS stage (ElevenLabs) --audio_out--> Transport stage --> Twilio
+
+    Text and audio items carry the turn epoch they were produced in. An interruption
+    bumps the epoch, cancels the turn task and clears the queues; stages drop any
+    stale item they still see. On hang-up every stage task is cancelled and awaited.
+    """
+
     def __init__(self, websocket: WebSocket, agent_config: dict):
         self.websocket = websocket
-        self.config = agent_config 
+        self.config = agent_config
+        self.call_context = self.config.get("call_context", {})
         self.tenant_id = self.config.get("tenant_id")
         self.transport = TwilioTransport(websocket)
         self.stt = DeepgramService(self.on_transcript, self.on_interruption)
+        self.audio_forwarder = InboundAudioForwarder(self.stt)
+        self.turn_detector = TurnDetector(self.config.get("turn_detection"))
+        # Only the agent's enabled tools are executable and sent to the LLM
+        tool_names = tool_registry.resolve(self.config.get("enabled_tools"))
+        _, tool_schemas = tool_registry.select(tool_names)
+        self.model_policy = ModelPolicy(self.config.get("model_routing"), tools_enabled=bool(tool_schemas))
         self.llm = OpenAIService(system_prompt=self.config.get("system_prompt"))
+        self.llm_router = None
+        if settings.LLM_HEDGE_ENABLED:
+            hedge = OpenAIService(
+                system_prompt=self.config.get("system_prompt"),
+                model=settings.LLM_HEDGE_MODEL,
+                base_url=settings.LLM_HEDGE_BASE_URL,
+                api_key=settings.LLM_HEDGE_API_KEY
+            )
+            self.llm_router = LLMRouter(
+                self.llm, hedge, self.config.get("llm_first_token_deadline_ms"),
+                routes={self.model_policy.model_for(route): route for route in (FAST, LARGE)}
+            )
+            self.llm = self.llm_router
+        self.prompt = PromptAssembler(self.config.get("system_prompt"), tool_schemas)
         self.tts = ElevenLabsService(voice_id=self.config.get("voice_id"))
-        self.rag = RetrievalService() 
+        self.rag = RetrievalService()
+        self.context_packer = ContextPacker(self.config.get("rag"))
+        # Only perform RAG if tenant_id is present
+        self.rag_prefetch = RagPrefetcher(self._lookup_context) if self.tenant_id else None
         self.conversation_history = []
         self.is_ai_speaking = False
-        self.interrupt_event = asyncio.Event()
-        self.tool_executor = ToolExecutor()
         self.telemetry = TelemetryService()
+        self.pii_redactor = pii_redactor
+
+        # Pipeline
+        self.inbound_audio = StageQueue("inbound_audio", settings.PIPELINE_INBOUND_AUDIO_QUEUE)
+        self.transcripts = StageQueue("transcripts", settings.PIPELINE_TRANSCRIPT_QUEUE)
+        self.text_chunks = StageQueue("text_chunks", settings.PIPELINE_TEXT_QUEUE)
+        self.audio_out = StageQueue("audio_out", settings.PIPELINE_AUDIO_OUT_QUEUE)
+        self.queues = [self.inbound_audio, self.transcripts, self.text_chunks, self.audio_out]
+        self.turn_epoch = 0
+        self._turn_task = None
+        self._tts_segment = None # TTS stream of the segment being synthesized
+        self._stage_tasks = []
+        self.ended_by_server = False
+        self._turn_reply = None # History entry of the current turn's spoken reply
 
         # Metrics State
         self.call_id = str(uuid.uuid4())
         self.start_time = time.time()
+        self.tool_executor = ToolExecutor(tool_names, context={
+            "tenant_id": self.tenant_id,
+            "agent_id": self.config.get("id"),
+            "call_id": self.call_id,
+            "from_number": self.config.get("phone_number"), # The agent's line: texts come from the number they called
+            "caller_number": self.call_context.get("caller_number"), # The only number send_sms texts
+        })
         self.metrics = {
             "call_id": self.call_id,
             "tenant_id": self.config.get("tenant_id"),
             "agent_id": self.config.get("id"),
             "input_tokens": 0,
             "output_tokens": 0,
+            "cached_input_tokens": 0,
             "tts_characters": 0,
+            "interrupted_turns": 0,
+            "history_chars_trimmed": 0,
+            "rag_lookups": 0,
+            "rag_hits": 0,
+            "rag_context_tokens": 0,
+            "rag_context_tokens_max": 0,
             "status": "completed"
         }
+        # Per model route (fast/large): latency, and tokens by the model that produced them (priced by the billing worker)
+        self.route_stats = {
+            route: {"turns": 0, "requests": 0, "input_tokens": 0, "output_tokens": 0, "cached_input_tokens": 0,
+                    "first_token_total": 0.0}
+            for route in (FAST, LARGE)
+        }
+        # Provider-side generation timing (Timing events, one per LLM request)
+        self.llm_timing = {"requests": 0, "ttft_total": 0.0, "ttft_max": 0.0, "output_tokens": 0, "generating": 0.0}
+
+        # Live transcript for dashboards (Redis pub/sub, coalesced)
+        self.live = None
+        if settings.LIVE_TRANSCRIPT_ENABLED and self.tenant_id:
+            self.live = LiveTranscriptPublisher(
+                self.telemetry.redis, self.call_id, self.tenant_id, self.config.get("id"),
+                redact=self.pii_redactor.redact_text
+            )
+
+        # Running cost vs the tenant's credit (checked per turn, synced in the background)
+        self.cost_meter = None
+        self._cost_cutoff = None # Goodbye-and-hang-up task once a limit is hit
+        if settings.BILLING_METER_ENABLED and self.tenant_id:
+            self.cost_meter = CostMeter(self.telemetry.redis, self.tenant_id, self.call_id, self.config.get("max_call_cost"))
+
+        # Optional dual-channel recording, teed from the transport
+        if settings.RECORDING_ENABLED and self.config.get("recording_enabled"):
+            self.transport.recorder = CallRecorder(self.tenant_id, self.call_id)
+
+        # Optional replay capture (tests/replay): provider wrappers record responses and timing
+        self.capture = None
+        if settings.CAPTURE_ENABLED:
+            self.capture = CallCapture(self.call_id, self.config)
+            self.llm = self.capture.wrap_llm(self.llm)
+            self.tts = self.capture.wrap_tts(self.tts)
+            self.tool_executor = self.capture.wrap_tools(self.tool_executor)
 
     async def handle_stream(self):
-        await self.websocket.accept()
+        # The endpoint has already accepted the socket
         if not await self.stt.connect():
             await self.websocket.close()
             return
-        
+
+        # Supervisor listen-in, teed from the transport like the recording.
+        # Opened only once the call is really starting: _shutdown() is what closes it.
+        if settings.LISTEN_IN_ENABLED:
+            self.transport.listen_tap = listen_hub.open(self.call_id)
+
+        self._start_stages()
+        if self.live:
+            await self.live.started(self.call_context.get("direction"))
+        if self.cost_meter:
+            await self.cost_meter.start()
+            # No credit left: the cutoff message replaces the greeting
+            self._check_cost()
+
         # --- OUTBOUND LOGIC START ---
-        if self.call_context.get("direction") == "outbound":
+        if self.call_context.get("direction") == "outbound" and not self._cost_cutoff:
             answered_by = self.call_context.get("answered_by")
-            
+
             if answered_by == "machine_start":
                 logger.info("🤖 Answering Machine Detected.")
                 # Logic: Leave voicemail or hang up
                 # For now, let's hang up to save money
                 logger.info("Hanging up on machine.")
+                await self._shutdown()
                 return # Exits loop, closes socket
-                
+
             elif answered_by == "human" or answered_by is None:
                 # Initiate conversation
                 logger.info("👤 Human Detected. Starting conversation.")
                 name = self.call_context.get("customer_name", "there")
-                
+
                 # Dynamic Greeting
                 opening_line = f"Hello {name}, I am calling from Acme Corp. Is this a good time?"
-                
+
                 # We artificially inject this into the history so the LLM knows it "said" it
-                self.conversation_history.append({"role": "assistant", "content": opening_line})
-                
+                greeting = {"role": "assistant", "content": opening_line}
+                self.conversation_history.append(greeting)
+
                 # Speak it immediately
-                asyncio.create_task(self.tts_speak_immediate(opening_line))
+                self._start_turn(self.tts_speak_immediate(opening_line))
+                self._turn_reply = greeting
         # --- OUTBOUND LOGIC END ---
 
         try:
             while True:
                 message = await self.websocket.receive_text()
+                if self.capture:
+                    self.capture.twilio(message)
                 audio_chunk = await self.transport.process_incoming_message(message)
                 if audio_chunk:
-                    await self.stt.send_audio(audio_chunk)
+                    # Blocks only if the STT stage has fallen a full queue behind
+                    await self.inbound_audio.put(audio_chunk)
         except WebSocketDisconnect:
             logger.info("Client disconnected")
         except Exception as e:
-            self.metrics["status"] = "failed"
-            self.metrics["end_reason"] = str(e)
-            logger.error(f"Stream error: {e}")
+            # Receiving on a socket we closed ourselves (end_call) is not a failure
+            if not self.ended_by_server:
+                self.metrics["status"] = "failed"
+                self.metrics["end_reason"] = str(e)
+                logger.error(f"Stream error: {e}")
         finally:
-            # CALL ENDED LOGIC
-            duration = time.time() - self.start_time
-            self.metrics["duration_seconds"] = duration
-            self.metrics["end_time"] = time.time()
-            
-            # Flush Telemetry
-            await self.telemetry.emit_call_ended(self.metrics)
-            await self.stt.finish()
+            await self._shutdown()
+
+    async def end_call(self, reason: str):
+        """Hangs up from our side (e.g. drain deadline). handle_stream then runs its normal shutdown."""
+        self.ended_by_server = True
+        self.metrics["end_reason"] = reason
+        logger.info(f"📴 Ending call {self.call_id}: {reason}")
+        try:
+            # Closing the media stream ends <Connect>; Twilio hangs up
+            await self.websocket.close()
+        except Exception as e:
+            logger.error(f"Failed to close stream: {e}")
+
+    async def _shutdown(self):
+        # CALL ENDED LOGIC
+        duration = time.time() - self.start_time
+        self.metrics["duration_seconds"] = duration
+        self.metrics["end_time"] = time.time()
+
+        await self._cancel_turn()
+        if self._cost_cutoff and not self.ended_by_server:
+            # Caller hung up during the goodbye
+            self._cost_cutoff.cancel()
+        for task in self._stage_tasks:
+            task.cancel()
+        await asyncio.gather(*self._stage_tasks, return_exceptions=True)
+        self._stage_tasks = []
+
+        await self.audio_forwarder.stop()
+        await self.stt.finish()
+
+        # STT resilience counters
+        self.metrics["stt_reconnects"] = self.stt.reconnects
+        self.metrics["stt_failed_sends"] = self.stt.failed_sends
+        self.metrics["stt_buffered_seconds"] = round(self.audio_forwarder.buffered_seconds, 2)
+        self.metrics["stt_dropped_seconds"] = round(self.audio_forwarder.dropped_seconds, 2)
+
+        # Recording file reference
+        recorder = self.transport.recorder
+        if recorder:
+            seconds = await recorder.finish()
+            if seconds is not None:
+                self.metrics["recording_path"] = recorder.path
+                self.metrics["recording_seconds"] = round(seconds, 2)
+
+        # Listen-in: tell listeners the call is over
+        if self.transport.listen_tap:
+            listen_hub.close(self.call_id)
+            self.metrics.update(self.transport.listen_tap.stats())
+
+        if self.capture:
+            capture_path = await self.capture.save()
+            if capture_path:
+                self.metrics["capture_path"] = capture_path
+
+        # LLM hedging / failover (closed first: abandoned hedge requests count in the route totals)
+        if self.llm_router:
+            await self.llm_router.close()
+            self._record_abandoned_usage()
+            self.metrics.update(self.llm_router.stats())
+
+        # Model routing
+        for route, stats in self.route_stats.items():
+            self.metrics[f"llm_{route}_turns"] = stats["turns"]
+            self.metrics[f"llm_{route}_input_tokens"] = stats["input_tokens"]
+            self.metrics[f"llm_{route}_output_tokens"] = stats["output_tokens"]
+            self.metrics[f"llm_{route}_cached_input_tokens"] = stats["cached_input_tokens"]
+            self.metrics[f"llm_{route}_first_token_avg_ms"] = (
+                round(stats["first_token_total"] * 1000 / stats["requests"], 1) if stats["requests"] else 0.0
+            )
+
+        # RAG prefetch (lookups started on interim transcripts)
+        if self.rag_prefetch:
+            await self.rag_prefetch.close()
+            self.metrics.update(self.rag_prefetch.stats())
+
+        # RAG context size (per turn that had context)
+        self.metrics["rag_context_tokens_avg"] = (
+            round(self.metrics["rag_context_tokens"] / self.metrics["rag_hits"], 1) if self.metrics["rag_hits"] else 0.0
+        )
+
+        # Prompt caching (share of input tokens the provider served from its prefix cache)
+        self.metrics["prompt_cache_hit_rate"] = (
+            round(self.metrics["cached_input_tokens"] / self.metrics["input_tokens"], 3) if self.metrics["input_tokens"] else 0.0
+        )
+
+        timing = self.llm_timing
+        self.metrics["llm_ttft_avg_ms"] = round(timing["ttft_total"] / timing["requests"], 1) if timing["requests"] else 0.0
+        self.metrics["llm_ttft_max_ms"] = round(timing["ttft_max"], 1)
+        self.metrics["llm_tokens_per_sec"] = (
+            round(timing["output_tokens"] / timing["generating"], 1) if timing["generating"] else 0.0
+        )
+
+        # Playback (time to audible response, from Twilio marks)
+        self.metrics.update(self.transport.playback.stats())
+
+        # Stage queue depth / wait metrics
+        for queue in self.queues:
+            self.metrics.update(queue.stats())
+
+        # Cost meter: final estimate (the billing worker deletes the call's in-flight entry when it bills it)
+        if self.cost_meter:
+            self.cost_meter.update(duration, self.metrics, self.route_stats[FAST])
+            self.metrics.update(await self.cost_meter.close())
+
+        # Live view: last lines + end marker
+        if self.live:
+            await self.live.ended(self.metrics["status"])
+            self.metrics["live_transcript_updates"] = self.live.updates
+            self.metrics["live_transcript_published"] = self.live.published
+
+        # Flush Telemetry
+        await self.telemetry.emit_call_ended(self.metrics)
+
+    # --- Stages ---
+
+    def _start_stages(self):
+        self.audio_forwarder.start()
+        self._stage_tasks = [
+            asyncio.create_task(self._stt_stage(), name=f"stt:{self.call_id}"),
+            asyncio.create_task(self._turn_stage(), name=f"turn:{self.call_id}"),
+            asyncio.create_task(self._tts_stage(), name=f"tts:{self.call_id}"),
+            asyncio.create_task(self._transport_stage(), name=f"transport:{self.call_id}"),
+        ]
+        if self.cost_meter:
+            self._stage_tasks.append(asyncio.create_task(self._cost_stage(), name=f"cost:{self.call_id}"))
+
+    async def _stt_stage(self):
+        """inbound_audio -> forwarder ring buffer (sent to Deepgram on its timer) + local VAD"""
+        while True:
+            frame = await self.inbound_audio.get()
+            self.audio_forwarder.push(frame)
+            if self.turn_detector.enabled:
+                self.turn_detector.on_audio(frame)
+
+    async def _turn_stage(self):
+        """transcripts -> turn detector -> user turn commit"""
+        poll_interval = settings.TURN_POLL_INTERVAL_MS / 1000
+        while True:
+            try:
+                text, is_final, start = await self.transcripts.get(timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                if self.turn_detector.enabled:
+                    self.turn_detector.on_transcript(text, is_final, start=start)
+                elif is_final and text.strip():
+                    self.commit_user_turn(text)
+                    continue
+                if self.rag_prefetch and settings.RAG_PREFETCH_ENABLED:
+                    # Speculative lookup on what the caller has said so far
+                    self.rag_prefetch.observe(self.turn_detector.pending_text if self.turn_detector.enabled else text)
+
+            if self.turn_detector.enabled:
+                text = self.turn_detector.poll()
+                if text:
+                    self.commit_user_turn(text)
+
+    async def _cost_stage(self):
+        """Re-checks the cost meter while nobody takes a turn (duration keeps costing)"""
+        while not self._cost_cutoff:
+            await asyncio.sleep(settings.BILLING_SYNC_SECONDS)
+            self._check_cost()
+
+    async def _tts_stage(self):
+        """text_chunks -> ElevenLabs (one socket per segment) -> audio_out"""
+        held = None # Item a segment read but doesn't own (its TURN_END, or the next turn's text)
+        while True:
+            if held:
+                (epoch, item), held = held, None
+            else:
+                epoch, item = await self.text_chunks.get()
+            if epoch != self.turn_epoch or item == SEGMENT_END:
+                continue
+            if item == TURN_END:
+                await self.audio_out.put((epoch, TURN_END))
+                continue
+
+            # Text handed to TTS for this segment; the transport stage maps it onto playback time
+            spoken = {"text": [], "done": False}
+            await self.audio_out.put((epoch, spoken))
+
+            async def segment(first=item, segment_epoch=epoch):
+                nonlocal held
+                spoken["text"].append(first)
+                self.metrics["tts_characters"] += len(first)
+                yield first
+                while True:
+                    seg_epoch, chunk = await self.text_chunks.get()
+                    if seg_epoch != segment_epoch:
+                        # Interrupted mid-segment: newer text starts its own segment, never this stale one
+                        if seg_epoch == self.turn_epoch:
+                            held = (seg_epoch, chunk)
+                        return
+                    if chunk == SEGMENT_END:
+                        return
+                    if chunk == TURN_END:
+                        # Turn ended without an explicit segment end; pass it on after the audio
+                        held = (seg_epoch, TURN_END)
+                        return
+                    spoken["text"].append(chunk)
+                    self.metrics["tts_characters"] += len(chunk)
+                    yield chunk
+
+            async def synthesize(segment_epoch=epoch):
+                try:
+                    async for audio_chunk in self.tts.stream_audio(segment()):
+                        if segment_epoch != self.turn_epoch:
+                            break # Closes the TTS socket; stale audio is never queued
+                        await self.audio_out.put((segment_epoch, audio_chunk))
+                    spoken["done"] = True
+                except Exception as e:
+                    logger.error(f"TTS stage error: {e}")
+
+            # A task of its own so an interruption can close the TTS socket at once (_cancel_turn)
+            self._tts_segment = asyncio.create_task(synthesize(), name=f"tts_segment:{self.call_id}")
+            await asyncio.gather(self._tts_segment, return_exceptions=True)
+            self._tts_segment = None
+
+    async def _transport_stage(self):
+        """audio_out -> Twilio"""
+        while True:
+            epoch, item = await self.audio_out.get()
+            if epoch != self.turn_epoch:
+                continue
+            if item == TURN_END:
+                self.is_ai_speaking = False
+                continue
+            if isinstance(item, dict):
+                self.transport.playback.start_segment(item)
+                continue
+            await self.transport.send_audio(item)
+
+    # --- Turn Management ---
+
+    def _start_turn(self, coro):
+        """Runs a turn coroutine as the single active turn for this call."""
+        self.is_ai_speaking = True
+        self._turn_reply = None
+        self.transport.playback.begin_turn()
+        if self.live:
+            self.live.assistant_done()
+        self._turn_task = asyncio.create_task(coro, name=f"turn_task:{self.call_id}")
+
+    async def _cancel_turn(self):
+        """Cancels the active turn and discards everything it queued downstream."""
+        self.turn_epoch += 1
+        if self._tts_segment and not self._tts_segment.done():
+            self._tts_segment.cancel()
+        task, self._turn_task = self._turn_task, None
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.text_chunks.clear()
+        self.audio_out.clear()
+        self.is_ai_speaking = False
+
+    async def _speak(self, text: str):
+        """Queues text for the TTS stage under the current turn epoch."""
+        if self.live:
+            self.live.assistant_delta(text)
+        await self.text_chunks.put((self.turn_epoch, text))
+
+    async def _end_segment(self):
+        await self.text_chunks.put((self.turn_epoch, SEGMENT_END))
+
+    async def _end_turn(self):
+        if self.live:
+            self.live.assistant_done()
+        await self.text_chunks.put((self.turn_epoch, TURN_END))
 
     async def tts_speak_immediate(self, text: str):
         """Helper to speak text without LLM generation"""
-        self.is_ai_speaking = True
-        try:
-            # Create a simple generator that yields the text
-            async def text_gen():
-                yield text
-            
-            async for audio in self.tts.stream_audio(text_gen()):
-                await self.transport.send_audio(audio)
-        finally:
-            self.is_ai_speaking = False
+        await self._speak(text)
+        await self._end_segment()
+        await self._end_turn()
 
     def on_interruption(self):
-        if self.is_ai_speaking:
+        if self.capture:
+            self.capture.speech_started()
+        # Audio already sent may still be playing after the turn has finished generating
+        if self._cost_cutoff:
+            return # The goodbye plays out
+        if self.is_ai_speaking or self.transport.playback.is_playing:
             logger.info("⚠️ INTERRUPTION: Clearing Queues")
-            self.interrupt_event.set()
-            asyncio.create_task(self.transport.send_clear_message())
+            asyncio.create_task(self._interrupt())
+
+    async def _interrupt(self):
+        heard = self.transport.playback.heard_text()
+        await self._cancel_turn()
+        await self.transport.send_clear_message()
+        self._truncate_reply(heard)
+
+    def _truncate_reply(self, heard: str):
+        """Keeps only what the caller actually heard of the interrupted reply in the history."""
+        self.metrics["interrupted_turns"] += 1
+        if self.live:
+            # Supersedes the reply line already shown
+            self.live.assistant_done(heard=heard)
+        reply = self._turn_reply
+        self._turn_reply = None
+        if reply is None:
+            # Cut off while still generating: the reply was never stored
+            if heard:
+                self.conversation_history.append({"role": "assistant", "content": heard})
+            return
+
+        self.metrics["history_chars_trimmed"] += max(0, len(reply["content"] or "") - len(heard))
+        if heard:
+            reply["content"] = heard
+        else:
+            self.conversation_history.remove(reply)
+        logger.info(f"✂️ Reply truncated to what was heard: {heard!r}")
+
+    def on_transcript(self, text: str, is_final: bool, start: float = None, end: float = None):
+        # Called from the Deepgram socket; never block it.
+        # start/end: the transcribed audio, in seconds of inbound call audio (None if unknown)
+        if self.capture:
+            self.capture.stt(text, is_final, start, end)
+        if self.live:
+            self.live.update("user", text, is_final)
+        self.transcripts.offer((text, is_final, start))
+
+    def commit_user_turn(self, text: str):
+        if self._check_cost():
+            return
+        # Regex tier only: microseconds, safe on the audio loop
+        clean_text = self.pii_redactor.redact_text(text)
+        logger.info(f"User: {clean_text}")
+        self.conversation_history.append({"role": "user", "content": clean_text})
+        # Context lookup (or the prefetched one) runs while the previous turn is torn down
+        rag_lookup = self.rag_prefetch.take(clean_text) if self.rag_prefetch else None
+        asyncio.create_task(self._run_new_turn(rag_lookup))
+        asyncio.create_task(self._emit_user_transcript(clean_text))
+
+    def _check_cost(self) -> bool:
+        """O(1) cost check; True once the call is being ended for cost."""
+        if not self.cost_meter:
+            return False
+        if self._cost_cutoff:
+            return True
+        verdict = self.cost_meter.check(time.time() - self.start_time, self.metrics, self.route_stats[FAST])
+        if verdict == WARN:
+            remaining = self.cost_meter.remaining
+            logger.warning(f"💸 Call {self.call_id} nearing its cost limit: ${self.cost_meter.cost:.2f} so far, "
+                           f"{'$%.2f' % remaining if remaining is not None else 'unknown'} credit left")
+            if self.live:
+                asyncio.create_task(self.live.notice("cost_warning", cost=round(self.cost_meter.cost, 4), remaining=remaining))
+        elif verdict == STOP:
+            logger.warning(f"🛑 Ending call {self.call_id} for cost ({self.cost_meter.stop_reason}): ${self.cost_meter.cost:.2f}")
+            self._cost_cutoff = asyncio.create_task(self._end_for_cost(self.cost_meter.stop_reason))
+            return True
+        return False
+
+    async def _end_for_cost(self, reason: str):
+        """Says goodbye instead of answering, and hangs up once it has played."""
+        await self._cancel_turn()
+        self._start_turn(self.tts_speak_immediate(settings.BILLING_CUTOFF_MESSAGE))
+        await asyncio.gather(self._turn_task, return_exceptions=True)
+        deadline = time.monotonic() + settings.BILLING_GOODBYE_TIMEOUT
+        while (self.is_ai_speaking or self.transport.playback.is_playing) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        await self.end_call(reason)
 
-    def on_transcript(self, text: str, is_final: bool):
-        if is_final and text.strip():
-            logger.info(f"User: {text}")
-            clean_text = self.pii_redactor.redact_text(text)
-            self.conversation_history.append({"role": "user", "content": clean_text})
-            asyncio.create_task(self.process_turn())
+    async def _run_new_turn(self, rag_lookup: Optional[asyncio.Future] = None):
+        # A new user turn supersedes whatever the assistant was still doing
+        await self._cancel_turn()
+        self._start_turn(self.process_turn(rag_lookup))
 
+    async def _emit_user_transcript(self, text: str):
+        """Stored transcripts also get the NLP tier (names etc.), off the event loop."""
+        redacted = await self.pii_redactor.redact(text)
+        await self.telemetry.emit_transcript(self.call_id, "user", redacted)
 
-    async def process_turn(self):
+    async def process_turn(self, rag_lookup: Optional[asyncio.Future] = None):
         """
         Manages the Turn Loop: LLM -> Tool -> LLM -> Tool -> TTS
         """
-        self.is_ai_speaking = True
-        self.interrupt_event.clear()
-
-        # 1. Prepare Context (RAG)
-        # (Same RAG logic as Phase 3.3)
-        current_messages = self.conversation_history # + RAG injection if applicable
-        
-        # 2. Tool/Generation Loop (Max 3 turns to prevent infinite loops)
-        for _ in range(3): 
-            if self.interrupt_event.is_set(): break
-            
-            should_continue = await self._run_llm_step(current_messages)
-            if not should_continue:
+        # 1. Prepare Context (RAG). It rides at the end of each request, never in the history
+        rag_context = await self._await_context(rag_lookup)
+
+        # 2. Pick the model for this turn (all its tool steps stay on it)
+        route = self._route_turn(rag_hit=rag_context is not None)
+
+        # 3. Tool/Generation Loop (Max 3 turns to prevent infinite loops)
+        try:
+            for _ in range(3):
+                should_continue = await self._run_llm_step(route, rag_context)
+                if not should_continue:
+                    break
+        finally:
+            if not asyncio.current_task().cancelling():
+                await self._end_turn()
+
+    async def _lookup_context(self, query: str):
+        # Interim text hasn't been through commit_user_turn; redact before it leaves for embedding
+        return await self.rag.retrieve(self.pii_redactor.redact_text(query), self.tenant_id, self.context_packer)
+
+    async def _await_context(self, rag_lookup: Optional[asyncio.Future]) -> Optional[str]:
+        if rag_lookup is None:
+            return None
+        self.metrics["rag_lookups"] += 1
+        packed = await rag_lookup
+        if not packed:
+            return None
+        self.metrics["rag_hits"] += 1
+        self.metrics["rag_context_tokens"] += packed.tokens
+        self.metrics["rag_context_tokens_max"] = max(self.metrics["rag_context_tokens_max"], packed.tokens)
+        logger.info(
+            f"✅ RAG Context: ~{packed.tokens} tokens from {packed.used}/{packed.hits} hits "
+            f"({packed.merged} merged, {packed.duplicates} duplicates)"
+        )
+        return packed.text
+
+    def _route_turn(self, rag_hit: bool = False) -> str:
+        """Classifies the latest user turn into the fast or large model route."""
+        user_text, last_assistant = "", None
+        for message in reversed(self.conversation_history):
+            if message["role"] == "user" and not user_text:
+                user_text = message["content"]
+            elif message["role"] == "assistant" and message.get("content") and user_text:
+                last_assistant = message["content"]
                 break
-        
-        self.is_ai_speaking = False
 
-    async def _run_llm_step(self, messages) -> bool:
+        route, reason = self.model_policy.classify(user_text, last_assistant, rag_hit)
+        self.route_stats[route]["turns"] += 1
+        logger.info(f"🧭 Route: {route} ({self.model_policy.model_for(route)}) - {reason}")
+        return route
+
+    def _record_llm_timing(self, timing: Timing):
+        t = self.llm_timing
+        t["requests"] += 1
+        if timing.ttft_ms is not None:
+            t["ttft_total"] += timing.ttft_ms
+            t["ttft_max"] = max(t["ttft_max"], timing.ttft_ms)
+            t["output_tokens"] += timing.output_tokens
+            t["generating"] += (timing.total_ms - timing.ttft_ms) / 1000
+
+    def _record_usage(self, usage: Usage, route: str):
         """
-        Runs one step of LLM generation. 
+        Adds token usage to the call's cost totals. Tokens are priced by the model that
+        produced them, not the turn's route: a large-route turn answered by the hedge
+        (LLM_HEDGE_MODEL) counts at fast rates when the hedge is the fast model.
+        A model that is neither stays on the turn's route.
+        """
+        if usage.model == self.model_policy.model_for(FAST):
+            route = FAST
+        elif usage.model == self.model_policy.model_for(LARGE):
+            route = LARGE
+        stats = self.route_stats[route]
+        stats["input_tokens"] += usage.input_tokens
+        stats["output_tokens"] += usage.output_tokens
+        stats["cached_input_tokens"] += usage.cached_input_tokens
+        self.metrics["input_tokens"] += usage.input_tokens
+        self.metrics["output_tokens"] += usage.output_tokens
+        self.metrics["cached_input_tokens"] += usage.cached_input_tokens
+
+    def _record_abandoned_usage(self):
+        """Prompts of hedge requests dropped mid-race were billed too (estimated, no usage report)."""
+        for model, tokens in self.llm_router.take_abandoned().items():
+            self._record_usage(Usage(model, tokens, 0), LARGE)
+
+    async def _run_llm_step(self, route: str = LARGE, rag_context: Optional[str] = None) -> bool:
+        """
+        Runs one step of LLM generation over the history so far (tool results included).
         Returns True if a tool was called and we need to run again.
         Returns False if text was generated (turn over).
         """
-        llm_stream = self.llm.get_response_stream_with_tools(messages)
-        
+        stats = self.route_stats[route]
+        stats["requests"] += 1
+        started = time.monotonic()
+        messages = self.prompt.build(self.conversation_history, rag_context)
+        llm_stream = self.llm.stream(messages, model=self.model_policy.model_for(route), tools=self.prompt.tools)
+
         full_response_text = []
-        tool_requests = None
-
-        # Wrapper to handle the mixed stream (Text vs Dict)
-        async def stream_processor():
-            nonlocal tool_requests
-            async for item in llm_stream:
-                if isinstance(item, str):
-                    full_response_text.append(item)
-                    yield item
-                elif isinstance(item, dict) and item.get("type") == "tool_call_request":
-                    tool_requests = item["calls"]
-        
-        # Pipe to TTS
+        tool_requests = []
+        failed = False
+        first_event = True
+
+        # Typed events: text goes straight to the TTS stage.
         # If the LLM is calling a tool, it usually outputs NO text, or very brief text.
         try:
-            async for audio_chunk in self.tts.stream_audio(stream_processor()):
-                if self.interrupt_event.is_set(): return False
-                await self.transport.send_audio(audio_chunk)
+            async for event in llm_stream:
+                if first_event:
+                    stats["first_token_total"] += time.monotonic() - started
+                    first_event = False
+                if isinstance(event, ContentDelta):
+                    full_response_text.append(event.text)
+                    await self._speak(event.text)
+                elif isinstance(event, ToolCallComplete):
+                    tool_requests.append({"id": event.id, "function": {"name": event.name, "arguments": event.arguments}})
+                elif isinstance(event, Usage):
+                    self._record_usage(event, route)
+                elif isinstance(event, Timing):
+                    self._record_llm_timing(event)
+                elif isinstance(event, StreamError):
+                    logger.error(f"Gen Error: {event.message}")
+                    failed = True
         except Exception as e:
             logger.error(f"Gen Error: {e}")
+            failed = True
+        if failed and not full_response_text and not tool_requests:
+            # Never speak the error itself
+            await self._speak(settings.LLM_FALLBACK_REPLY)
+        await self._end_segment()
+        if self.llm_router:
+            # Losers of earlier races, so the live cost meter sees them too
+            self._record_abandoned_usage()
 
         # Handle Tool Execution
         if tool_requests:
@@ -183,7 +740,7 @@ class StreamOrchestrator:
                 "content": None,
                 "tool_calls": []
             }
-            
+
             for req in tool_requests:
                 tool_calls_msg["tool_calls"].append({
                     "id": req["id"],
@@ -193,128 +750,48 @@ class StreamOrchestrator:
                         "arguments": req["function"]["arguments"]
                     }
                 })
-            
+
             self.conversation_history.append(tool_calls_msg)
 
             # 2. Execute Tools
-            for req in tool_requests:
-                logger.info(f"🛠️ EXECUTING TOOL: {req['function']['name']}")
-                
-                # Mock objects for the execute call
-                # In production, clean this up to match class structure
-                class MockToolCall:
-                    class Func:
-                        def __init__(self, n, a): self.name=n; self.arguments=a
-                    def __init__(self, f): self.function=f
-
-                mock_obj = MockToolCall(MockToolCall.Func(req['function']['name'], req['function']['arguments']))
-                
-                tool_result_str = await self.tool_executor.execute(mock_obj)
-                
-                logger.info(f"✅ TOOL RESULT: {tool_result_str}")
-
-                # 3. Append Result to History
-                self.conversation_history.append({
-                    "role": "tool",
-                    "tool_call_id": req["id"],
-                    "content": tool_result_str
-                })
+            answered = 0
+            try:
+                for req in tool_requests:
+                    logger.info(f"🛠️ EXECUTING TOOL: {req['function']['name']}")
+
+                    tool_result_str = await self.tool_executor.execute(req["function"]["name"], req["function"]["arguments"])
+
+                    logger.info(f"✅ TOOL RESULT: {tool_result_str}")
+
+                    # 3. Append Result to History
+                    self.conversation_history.append({
+                        "role": "tool",
+                        "tool_call_id": req["id"],
+                        "content": tool_result_str
+                    })
+                    answered += 1
+            except asyncio.CancelledError:
+                # Caller spoke mid-tool. Every tool call still needs its result, right after the
+                # call (the new user line may already be in), or the API rejects every later request
+                at = next(i for i, m in enumerate(self.conversation_history) if m is tool_calls_msg) + 1 + answered
+                self.conversation_history[at:at] = [
+                    {
+                        "role": "tool",
+                        "tool_call_id": req["id"],
+                        "content": "Cancelled: the caller interrupted before this finished; it may not have completed."
+                    }
+                    for req in tool_requests[answered:]
+                ]
+                raise
 
             # Return True to signal the loop to run the LLM again (to read the result)
             return True
-        
+
         # If no tools, we just spoke text. Save it and exit.
         if full_response_text:
-            self.conversation_history.append(
-                {"role": "assistant", "content": "".join(full_response_text)}
-            )
+            # Kept as a reference: an interruption trims it to what was heard
+            self._turn_reply = {"role": "assistant", "content": "".join(full_response_text)}
+            self.conversation_history.append(self._turn_reply)
             return False # Turn Complete
 
         return False
-
-    async def generate_and_speak(self, user_text: str):
-        self.is_ai_speaking = True
-        self.interrupt_event.clear()
-        
-        start_time = time.time() # Latency Tracking
-
-
-       # --- RAG ENRICHMENT START ---
-        # Only perform RAG if tenant_id is present
-        if self.tenant_id:
-            logger.info("🔍 Searching Knowledge Base...")
-            rag_context = await self.rag.retrieve(user_text, self.tenant_id)
-            
-            if rag_context:
-                logger.info("✅ RAG Context Found")
-                # We inject context temporarily for this turn
-                # Strategy: Create a temporary message list for the LLM
-                # We don't want to pollute the permanent history with massive text chunks
-                
-                system_instruction = {
-                    "role": "system", 
-                    "content": f"Use the following context to answer the user question if relevant:\n{rag_context}"
-                }
-                
-                # Prepend RAG context instruction immediately after the main system prompt
-                # Copy history to avoid modifying the permanent state reference
-                current_messages = [self.conversation_history[0]] + [system_instruction] + self.conversation_history[1:]
-            else:
-                current_messages = self.conversation_history
-        else:
-            current_messages = self.conversation_history
-        # --- RAG ENRICHMENT END ---
-
-
-        # 1. LLM Stream
-        llm_stream = self.llm.get_response_stream_from_messages(user_text, current_messages)
-        
-        # 2. Wrapper to capture full text for history while streaming
-        full_response_text = []
-
-        async def text_iterator():
-            full_response = []
-            async for item in llm_stream:
-                if item["type"] == "content":
-                    token = item["text"]
-                    full_response.append(token)
-                    yield token
-                elif item["type"] == "usage":
-                    # Capture Costs
-                    self.metrics["input_tokens"] += item["input_tokens"]
-                    self.metrics["output_tokens"] += item["output_tokens"]
-
-                   # Log Transcript (Async)
-            if full_response:
-                text = "".join(full_response)
-                self.metrics["tts_characters"] += len(text) # Estimate TTS cost
-                # Emit transcript line for dashboard
-                asyncio.create_task(self.telemetry.emit_transcript(self.call_id, "assistant", text))
-
-        # 3. TTS Stream (WebSocket)
-        try:
-            first_byte_received = False
-            
-            async for audio_chunk in self.tts.stream_audio(text_iterator()):
-                if self.interrupt_event.is_set():
-                    break
-                
-                # Latency Logging: Time from STT_Final to First Audio Byte sent
-                if not first_byte_received:
-                    latency_ms = (time.time() - start_time) * 1000
-                    logger.info(f"⚡ Latency (STT->TTS): {latency_ms:.0f}ms")
-                    first_byte_received = True
-
-                # Send directly (Audio is already 8kHz PCM)
-                await self.transport.send_audio(audio_chunk)
-
-            # Save assistant response to history
-            if full_response_text:
-                self.conversation_history.append(
-                    {"role": "assistant", "content": "".join(full_response_text)}
-                )
-                
-        except Exception as e:
-            logger.error(f"Generation Error: {e}")
-        finally:
-            self.is_ai_speaking = False
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger("pipeline")
+
+# Control markers that travel through the text/audio queues with the payloads
+SEGMENT_END = "__segment_end__" # One TTS utterance is complete (flush to TTS)
+TURN_END = "__turn_end__"       # The assistant turn is complete
+
+
+class StageQueue:
+    """
+    Bounded asyncio.Queue between two pipeline stages.
+
+    Tracks depth and two kinds of wait time:
+    - put wait: how long the producer was blocked by a full queue (backpressure)
+    - queue wait: how long an item sat in the queue before the consumer took it
+    """
+
+    def __init__(self, name: str, maxsize: int, slow_wait_ms: float = 500):
+        self.name = name
+        self.maxsize = maxsize
+        self.slow_wait_ms = slow_wait_ms
+        self._queue = asyncio.Queue(maxsize)
+
+        # Metrics
+        self.items = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.put_wait_total = 0.0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, item: Any):
+        if self._queue.full():
+            started = time.monotonic()
+            await self._queue.put((item, time.monotonic()))
+            self.put_wait_total += time.monotonic() - started
+        else:
+            self._queue.put_nowait((item, time.monotonic()))
+        self._record_put()
+
+    def offer(self, item: Any) -> bool:
+        """Non-blocking put for sync callbacks. Drops (and counts) when full."""
+        try:
+            self._queue.put_nowait((item, time.monotonic()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._record_put()
+        return True
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        """Next item; raises asyncio.TimeoutError if `timeout` elapses first."""
+        if timeout is None:
+            item, enqueued_at = await self._queue.get()
+        else:
+            item, enqueued_at = await asyncio.wait_for(self._queue.get(), timeout)
+
+        waited = time.monotonic() - enqueued_at
+        self.queue_wait_total += waited
+        if waited > self.queue_wait_max:
+            self.queue_wait_max = waited
+            if waited * 1000 > self.slow_wait_ms:
+                logger.warning(f"🐢 Stage '{self.name}' item waited {waited * 1000:.0f}ms (depth {self.depth})")
+        return item
+
+    def clear(self) -> int:
+        """Discards everything queued (used on interruption). Returns the count."""
+        cleared = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            cleared += 1
+        return cleared
+
+    def _record_put(self):
+        self.items += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def stats(self) -> dict:
+        """Flat metrics (call_events stream values must be scalars)."""
+        prefix = f"queue_{self.name}"
+        return {
+            f"{prefix}_items": self.items,
+            f"{prefix}_dropped": self.dropped,
+            f"{prefix}_max_depth": self.max_depth,
+            f"{prefix}_put_wait_ms": round(self.put_wait_total * 1000, 1),
+            f"{prefix}_avg_wait_ms": round(self.queue_wait_total * 1000 / self.items, 2) if self.items else 0.0,
+            f"{prefix}_max_wait_ms": round(self.queue_wait_max * 1000, 1),
+        }
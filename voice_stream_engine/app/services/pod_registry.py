@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+import redis.asyncio as redis
+from app.core.config import settings
+from app.services.admission import admission
+
+logger = logging.getLogger("pod_registry")
+
+PODS_KEY = "voice_pods"             # SET of pod ids
+POD_KEY = "voice_pod:{}"            # HASH per pod, expires if the pod stops heartbeating
+ROUTED_KEY = "voice_pod_routed:{}"  # Streams routed to the pod since its last heartbeat
+
+
+class PodRegistry:
+    """
+    Redis-backed registry of voice engine pods and their live capacity.
+
+    Every pod heartbeats its admission snapshot. /incoming picks the least-loaded
+    healthy pod for the TwiML <Stream>, so media streams spread across pods
+    instead of following whichever pod the HTTP load balancer chose for the webhook.
+    """
+
+    def __init__(self):
+        self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self.pod_id = settings.POD_ID
+        self.stream_host = settings.POD_STREAM_HOST
+        self.interval = settings.POD_HEARTBEAT_INTERVAL
+        self.ttl = max(1, int(self.interval * 3))
+        self._task = None
+
+    @property
+    def enabled(self) -> bool:
+        # A pod without a directly reachable host cannot be a routing target
+        return bool(self.stream_host)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.enabled:
+            try:
+                await self.deregister()
+            except Exception as e:
+                logger.error(f"Failed to deregister pod: {e}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Pod heartbeat failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def heartbeat(self, **extra):
+        snapshot = admission.snapshot()
+        entry = {
+            "host": self.stream_host,
+            "active_calls": snapshot["active_calls"],
+            "max_calls": snapshot["max_calls"],
+            "saturation": snapshot["saturation"],
+            "accepting": int(snapshot["accepting"]),
+            "ts": time.time(),
+            **extra,
+        }
+        key = POD_KEY.format(self.pod_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=entry)
+            pipe.expire(key, self.ttl)
+            pipe.sadd(PODS_KEY, self.pod_id)
+            # Our active count now includes the streams routed to us
+            pipe.delete(ROUTED_KEY.format(self.pod_id))
+            await pipe.execute()
+
+    async def deregister(self):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(POD_KEY.format(self.pod_id))
+            pipe.srem(PODS_KEY, self.pod_id)
+            await pipe.execute()
+
+    async def pick_stream_host(self) -> Optional[str]:
+        """
+        Host of the least-loaded healthy pod, or None if the registry has no candidate
+        (the caller then falls back to the pod that received the webhook).
+        """
+        try:
+            pod_ids = list(await self.redis.smembers(PODS_KEY))
+            if not pod_ids:
+                return None
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for pod_id in pod_ids:
+                    pipe.hgetall(POD_KEY.format(pod_id))
+                    pipe.get(ROUTED_KEY.format(pod_id))
+                results = await pipe.execute()
+
+            now = time.time()
+            candidates = []
+            stale = []
+            for i, pod_id in enumerate(pod_ids):
+                entry, routed = results[2 * i], int(results[2 * i + 1] or 0)
+                if not entry:
+                    stale.append(pod_id) # Heartbeat expired
+                    continue
+                if entry.get("accepting") != "1" or now - float(entry["ts"]) > self.ttl:
+                    continue
+                max_calls = int(entry["max_calls"])
+                # Count streams routed since the last heartbeat so a burst doesn't all land on one pod
+                call_load = (int(entry["active_calls"]) + routed) / max_calls
+                if call_load >= 1:
+                    continue
+                load = max(call_load, float(entry["saturation"]))
+                candidates.append((load, random.random(), pod_id, entry["host"]))
+
+            if stale:
+                await self.redis.srem(PODS_KEY, *stale)
+            if not candidates:
+                return None
+
+            _, _, pod_id, host = min(candidates)
+            routed_key = ROUTED_KEY.format(pod_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(routed_key)
+                pipe.expire(routed_key, self.ttl)
+                await pipe.execute()
+            return host
+
+        except Exception as e:
+            logger.error(f"Pod routing unavailable, using local pod: {e}")
+            return None
+
+
+# Process-wide instance
+pod_registry = PodRegistry()
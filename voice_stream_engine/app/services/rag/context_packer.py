@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+from app.core.config import settings
+
+CHARS_PER_TOKEN = 4 # Close enough for English with OpenAI tokenizers; no tokenizer on the hot path
+SEPARATOR = "\n---\n"
+
+# Ingestion splits at 1000 chars with a 200-char overlap (RecursiveCharacterTextSplitter).
+# The splitter may shorten the overlap to land on a separator, so look a bit wider.
+MAX_OVERLAP_CHARS = 300
+MIN_OVERLAP_CHARS = 40
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SENTENCE_END_RE = re.compile(r"[.!?](\s|$)")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "at", "for", "and",
+    "or", "do", "does", "did", "you", "your", "i", "me", "my", "we", "our", "it", "its", "can",
+    "what", "when", "where", "how", "which", "who", "with", "this", "that", "there", "have", "has",
+}
+
+
+@dataclass
+class Passage:
+    content: str
+    source: Optional[str]
+    score: float # Vector similarity (then the reranked score)
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    hits: int # Candidates above the score floor
+    used: int # Passages in the packed text (after merging)
+    merged: int = 0 # Overlapping neighbours stitched together
+    duplicates: int = 0
+    sources: List[str] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1}
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of `right`'s prefix that `left` ends with (the splitter's chunk overlap), else 0."""
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    start = max(0, len(left) - MAX_OVERLAP_CHARS)
+    while True:
+        index = left.find(probe, start)
+        if index < 0:
+            return 0
+        tail = left[index:]
+        if right.startswith(tail):
+            return len(tail)
+        start = index + 1
+
+
+class ContextPacker:
+    """
+    Turns vector search hits into the context block for one turn:
+
+    1. Drop hits under the score floor and exact/contained duplicates.
+    2. Stitch chunks that overlap (neighbours from the same document) into one passage.
+    3. Optionally rerank with a local lexical scorer (query term coverage blended
+       with the vector score); no model call, microseconds per passage.
+    4. Add passages best-first while they fit the agent's token budget; a top
+       passage larger than the whole budget is cut at a sentence boundary.
+
+    Per-agent overrides come from `agent_config["rag"]`:
+        {"max_tokens": 500, "min_score": 0.45, "rerank": True, "rerank_weight": 0.35}
+    """
+
+    DEFAULTS = {
+        "max_tokens": None, # None = settings.RAG_CONTEXT_MAX_TOKENS
+        "min_score": None, # None = settings.RAG_MIN_SCORE
+        "rerank": None, # None = settings.RAG_RERANK
+        "rerank_weight": 0.35, # Share of the lexical score in the reranked score
+        "candidates": None, # None = settings.RAG_CANDIDATES
+    }
+
+    def __init__(self, config: dict = None):
+        self.config = {**self.DEFAULTS, **(config or {})}
+        self.max_tokens = self.config["max_tokens"] or settings.RAG_CONTEXT_MAX_TOKENS
+        self.min_score = self.config["min_score"] if self.config["min_score"] is not None else settings.RAG_MIN_SCORE
+        self.rerank = self.config["rerank"] if self.config["rerank"] is not None else settings.RAG_RERANK
+        self.candidates = self.config["candidates"] or settings.RAG_CANDIDATES
+
+    def pack(self, query: str, hits: List[Passage]) -> Optional[PackedContext]:
+        passages = [p for p in hits if p.content and p.score >= self.min_score]
+        if not passages:
+            return None
+        hit_count = len(passages)
+
+        passages, duplicates = self._dedupe(passages)
+        passages, merged = self._merge(passages)
+        if self.rerank:
+            self._rerank(query, passages)
+        passages.sort(key=lambda p: p.score, reverse=True)
+
+        budget = self.max_tokens * CHARS_PER_TOKEN # In characters; separators count too
+        chosen = [] # (passage, text)
+        for passage in passages:
+            cost = len(passage.content) + (len(SEPARATOR) if chosen else 0)
+            if cost <= budget:
+                chosen.append((passage, passage.content))
+                budget -= cost
+            elif not chosen:
+                # Best passage alone is over budget: keep as much as fits, ending on a sentence
+                chosen.append((passage, self._trim(passage.content, budget)))
+                budget = 0
+            if budget <= MIN_OVERLAP_CHARS:
+                break
+
+        chosen = [(p, t) for p, t in chosen if t]
+        if not chosen:
+            return None
+        text = SEPARATOR.join(t for _, t in chosen)
+        return PackedContext(
+            text=text,
+            tokens=estimate_tokens(text),
+            hits=hit_count,
+            used=len(chosen),
+            merged=merged,
+            duplicates=duplicates,
+            sources=sorted({p.source for p, _ in chosen if p.source}),
+        )
+
+    def _dedupe(self, passages: List[Passage]):
+        """Drops passages whose text is already contained in a higher-scoring one."""
+        kept = []
+        for passage in sorted(passages, key=lambda p: p.score, reverse=True):
+            normalized = " ".join(passage.content.split())
+            if any(normalized in k_norm for _, k_norm in kept):
+                continue
+            kept.append((passage, normalized))
+        return [p for p, _ in kept], len(passages) - len(kept)
+
+    def _merge(self, passages: List[Passage]):
+        """Stitches overlapping chunks of the same source; repeats so runs of 3+ collapse."""
+        merged = 0
+        changed = True
+        while changed:
+            changed = False
+            for left in passages:
+                for right in passages:
+                    if left is right or left.source != right.source:
+                        continue
+                    overlap = _overlap(left.content, right.content)
+                    if overlap:
+                        left.content += right.content[overlap:]
+                        left.score = max(left.score, right.score)
+                        passages.remove(right)
+                        merged += 1
+                        changed = True
+                        break
+                if changed:
+                    break
+        return passages, merged
+
+    def _rerank(self, query: str, passages: List[Passage]):
+        query_terms = _terms(query)
+        if not query_terms:
+            return
+        weight = self.config["rerank_weight"]
+        for passage in passages:
+            coverage = len(query_terms & _terms(passage.content)) / len(query_terms)
+            passage.score = (1 - weight) * passage.score + weight * coverage
+
+    @staticmethod
+    def _trim(text: str, max_chars: int) -> str:
+        if max_chars <= 0:
+            return ""
+        cut = text[:max_chars]
+        ends = [m.end() for m in _SENTENCE_END_RE.finditer(cut)]
+        if ends and ends[-1] > max_chars // 2:
+            return cut[:ends[-1]].rstrip()
+        return cut[:cut.rfind(" ")].rstrip() if " " in cut else cut
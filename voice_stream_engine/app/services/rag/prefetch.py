@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, List, Optional
+from prometheus_client import Counter, Histogram
+from app.core.config import settings
+
+logger = logging.getLogger("rag_prefetch")
+
+PREFETCH = Counter("rag_prefetch_total", "User turns by whether a speculative RAG lookup was reused", ["outcome"])
+SAVED = Histogram(
+    "rag_prefetch_saved_seconds", "Retrieval time taken off the critical path by a reused prefetch",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0)
+)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Words that don't change what a knowledge base lookup should return
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "to", "of", "in", "on", "at", "for", "and", "or",
+    "do", "does", "you", "your", "i", "me", "my", "we", "it", "can", "could", "please", "um", "uh",
+    "so", "like", "just", "what", "how", "have", "has", "there", "that", "this", "if", "about",
+}
+
+
+def query_terms(text: str) -> frozenset:
+    return frozenset(w for w in _WORD_RE.findall(text.lower()) if w not in FILLER_WORDS)
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Lookup:
+    def __init__(self, query: str, terms: frozenset, coro):
+        self.query = query
+        self.terms = terms
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.task = asyncio.ensure_future(coro)
+        self.task.add_done_callback(lambda _: setattr(self, "finished_at", time.monotonic()))
+
+
+class RagPrefetcher:
+    """
+    Starts RAG lookups while the caller is still talking.
+
+    The turn stage feeds it the pending transcript (interims included). A lookup
+    starts once the text has enough content words, and again whenever the query
+    has drifted from every lookup already running (at most `max_per_turn` per
+    turn, to bound embedding calls). When the turn commits, `take()` reuses the
+    closest lookup if it is similar enough to the final text, finished or still
+    running. Otherwise it starts one at once, so it overlaps with cancelling the
+    previous turn and preparing the LLM request instead of running after them.
+
+    Saved time = how much of the reused lookup had already run when the turn
+    committed, i.e. retrieval latency that never reached the critical path.
+    """
+
+    def __init__(self, retrieve: Callable[[str], Awaitable], min_terms: int = None,
+                 min_similarity: float = None, max_per_turn: int = None):
+        self._retrieve = retrieve
+        self.min_terms = min_terms or settings.RAG_PREFETCH_MIN_TERMS
+        self.min_similarity = min_similarity or settings.RAG_PREFETCH_MIN_SIMILARITY
+        self.max_per_turn = max_per_turn or settings.RAG_PREFETCH_MAX_PER_TURN
+        self._lookups: List[_Lookup] = []
+        self._pending = set() # Handed out by take(), not yet finished
+
+        # Per-call counters
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_total = 0.0
+
+    def observe(self, partial_text: str):
+        """Pending user text (interim or final) from the turn stage. Never blocks."""
+        terms = query_terms(partial_text)
+        if len(terms) < self.min_terms or len(self._lookups) >= self.max_per_turn:
+            return
+        if any(similarity(terms, lookup.terms) >= self.min_similarity for lookup in self._lookups):
+            return # An equivalent lookup is already running
+        self.started += 1
+        self._lookups.append(_Lookup(partial_text, terms, self._retrieve(partial_text)))
+
+    def take(self, final_text: str) -> asyncio.Future:
+        """Context for the committed turn: a reused prefetch when close enough, else a lookup started now."""
+        terms = query_terms(final_text)
+        best: Optional[_Lookup] = max(self._lookups, key=lambda l: similarity(terms, l.terms), default=None)
+        if best and similarity(terms, best.terms) < self.min_similarity:
+            best = None
+        for lookup in self._lookups:
+            if lookup is not best:
+                lookup.task.cancel()
+        self._lookups = []
+
+        if best:
+            self.hits += 1
+            PREFETCH.labels("hit").inc()
+            future = asyncio.ensure_future(self._claim(best, committed_at=time.monotonic()))
+        else:
+            self.misses += 1
+            PREFETCH.labels("miss").inc()
+            future = asyncio.ensure_future(self._retrieve(final_text))
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    async def _claim(self, lookup: _Lookup, committed_at: float):
+        result = await lookup.task
+        # Everything the lookup did before the commit is off the critical path
+        saved = max(0.0, min(lookup.finished_at or committed_at, committed_at) - lookup.started_at)
+        self.saved_total += saved
+        SAVED.observe(saved)
+        logger.info(f"⚡ Prefetched RAG reused ({saved * 1000:.0f}ms saved): {lookup.query!r}")
+        return result
+
+    async def close(self):
+        tasks = [lookup.task for lookup in self._lookups] + list(self._pending)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._lookups = []
+
+    def stats(self) -> dict:
+        turns = self.hits + self.misses
+        return {
+            "rag_prefetch_started": self.started,
+            "rag_prefetch_hits": self.hits,
+            "rag_prefetch_hit_rate": round(self.hits / turns, 3) if turns else 0.0,
+            "rag_prefetch_saved_ms": round(self.saved_total * 1000, 1),
+        }
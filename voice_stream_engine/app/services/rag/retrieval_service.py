@@ -1,23 +1,33 @@
+import asyncio
 import json
 import hashlib
 import redis.asyncio as redis
 import logging
 from typing import List, Optional
 from openai import AsyncOpenAI
+from prometheus_client import Histogram
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from app.core.config import settings
+from app.services.rag.context_packer import ContextPacker, PackedContext, Passage
 
 logger = logging.getLogger("rag")
 
+CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens", "Packed RAG context per turn (estimated tokens)",
+    buckets=(50, 100, 200, 300, 400, 500, 750, 1000, 1500)
+)
+
 class RetrievalService:
     def __init__(self):
-        self.openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
         self.qdrant = AsyncQdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
         # Initialize Redis for Caching
         self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
-    async def retrieve(self, query: str, tenant_id: str, limit: int = 3) -> Optional[str]:
+    async def retrieve(self, query: str, tenant_id: str, packer: ContextPacker = None) -> Optional[PackedContext]:
+        """Context for `query`, deduplicated, merged and trimmed to the packer's token budget."""
+        packer = packer or ContextPacker()
         try:
             # 1. Optimization: Check Embedding Cache
             # Hash the query + tenant to create a unique key
@@ -44,7 +54,7 @@ class RetrievalService:
                     self.qdrant.search(
                         collection_name=settings.QDRANT_COLLECTION_NAME,
                         query_vector=query_vector,
-                        limit=limit,
+                        limit=packer.candidates,
                         query_filter=models.Filter(
                             must=[models.FieldCondition(key="tenant_id", match=models.MatchValue(value=str(tenant_id)))]
                         )
@@ -61,8 +71,15 @@ class RetrievalService:
             if not search_result:
                 return None
 
-            context_blocks = [hit.payload.get("content", "") for hit in search_result if hit.score > 0.45]
-            return "\n---\n".join(context_blocks) if context_blocks else None
+            # 3. Pack: dedup overlapping chunks, merge neighbours, rerank, fit the token budget
+            hits = [
+                Passage(hit.payload.get("content", ""), hit.payload.get("source"), hit.score)
+                for hit in search_result
+            ]
+            packed = packer.pack(query, hits)
+            if packed:
+                CONTEXT_TOKENS.observe(packed.tokens)
+            return packed
 
         except Exception as e:
             logging.error(f"RAG Global Failure: {e}")
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from app.core.config import settings
+from app.utils.audio_buffer import AudioRingBuffer, PCM_BYTES_PER_MS
+
+logger = logging.getLogger("stt")
+
+class InboundAudioForwarder:
+    """
+    Coalesces inbound Twilio frames (20ms / 320 bytes each) into larger chunks
+    and forwards them to the STT socket on a fixed timer.
+
+    Latency cost is bounded by the chunk size; the last STT_REPLAY_SECONDS of
+    audio stay in the ring buffer for replay after an STT reconnect.
+    """
+
+    def __init__(self, stt, chunk_ms: int = None, retain_seconds: float = None):
+        self.stt = stt
+        chunk_ms = chunk_ms or settings.STT_CHUNK_MS
+        retain_seconds = retain_seconds or settings.STT_REPLAY_SECONDS
+
+        self.chunk_bytes = chunk_ms * PCM_BYTES_PER_MS
+        self.interval = chunk_ms / 1000.0
+        self.buffer = AudioRingBuffer(int(retain_seconds * 1000) * PCM_BYTES_PER_MS)
+        self._task = None
+
+        # Counters
+        self.frames_in = 0
+        self.chunks_out = 0
+        self.replayed_bytes = 0 # Audio held back during STT outages and sent late
+        self._stalled_at = None # Read position where the current outage began
+
+    def push(self, pcm_frame: bytes):
+        """Hot path: called once per Twilio media message. Copies into the ring only."""
+        self.buffer.write(pcm_frame)
+        self.frames_in += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the timer and flushes whatever is left (including a partial chunk)."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(final=True)
+        logger.info(f"🎙️ Forwarded {self.frames_in} frames as {self.chunks_out} STT chunks")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Audio forward error: {e}")
+
+    async def flush(self, final: bool = False):
+        """Sends every complete chunk in the buffer (and the remainder if `final`)."""
+        while self.buffer.pending >= self.chunk_bytes or (final and self.buffer.pending):
+            chunk = self.buffer.peek(self.chunk_bytes)
+            if await self.stt.send_audio(chunk, self.buffer.read_pos) is False:
+                # STT is down: keep the audio in the ring and retry on the next tick
+                if self._stalled_at is None:
+                    self._stalled_at = self.buffer.read_pos
+                return
+
+            if self._stalled_at is not None:
+                backlog = self.buffer.write_pos - max(self._stalled_at, self.buffer.oldest_pos)
+                self.replayed_bytes += backlog
+                logger.info(f"🔁 Replaying {backlog / (PCM_BYTES_PER_MS * 1000):.2f}s of buffered audio to STT")
+                self._stalled_at = None
+
+            self.buffer.advance(len(chunk))
+            self.chunks_out += 1
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self.replayed_bytes / (PCM_BYTES_PER_MS * 1000)
+
+    @property
+    def dropped_seconds(self) -> float:
+        return self.buffer.dropped_bytes / (PCM_BYTES_PER_MS * 1000)
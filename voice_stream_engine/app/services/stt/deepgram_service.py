@@ -1,27 +1,56 @@
+import asyncio
 import logging
 import json
 from typing import AsyncGenerator, Callable
 from deepgram import DeepgramClient, DeepgramClientOptions, LiveOptions, LiveTranscriptionEvents
 from app.core.config import settings
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
 
 logger = logging.getLogger("stt")
 
+# deepgram-sdk 3.1 has no SpeechStarted event (nor a vad_events option); when the
+# server sends VAD events anyway they surface as "unhandled message" errors
+SPEECH_STARTED_EVENT = getattr(LiveTranscriptionEvents, "SpeechStarted", None)
+VAD_EVENTS_OPTION = {"vad_events": True} if "vad_events" in getattr(LiveOptions, "__dataclass_fields__", {}) else {}
+
 class DeepgramService:
     def __init__(self, on_transcript: Callable, on_speech_start: Callable):
         self.on_transcript = on_transcript
         self.on_speech_start = on_speech_start
-        self.dg_client = DeepgramClient(settings.DEEPGRAM_API_KEY)
+        if settings.DEEPGRAM_URL:
+            # Self-hosted or local fake Deepgram
+            options = DeepgramClientOptions(api_key=settings.DEEPGRAM_API_KEY or "", url=settings.DEEPGRAM_URL)
+            self.dg_client = DeepgramClient(config=options)
+        else:
+            self.dg_client = DeepgramClient(settings.DEEPGRAM_API_KEY)
         self.dg_connection = None
+        self.is_connected = False
+        self._closing = False
+        self._reconnect_task = None
+
+        # Timestamp correction: Deepgram restarts its clock at 0 on every new socket,
+        # so transcripts are shifted by the call position of the socket's first audio
+        # (audio dropped during an outage included).
+        self.bytes_sent = 0
+        self.stream_offset_seconds = 0.0
+        self._offset_pending = True # New socket: offset taken from its first chunk
+
+        # Counters
+        self.reconnects = 0
+        self.failed_sends = 0
 
     async def connect(self):
         """Initialize Deepgram WebSocket Connection"""
         try:
             # Create a websocket connection to Deepgram
-            self.dg_connection = self.dg_client.listen.live.v("1")
+            self.dg_connection = self.dg_client.listen.asynclive.v("1")
 
             # Register Event Handlers
             self.dg_connection.on(LiveTranscriptionEvents.Transcript, self._handle_transcript)
-            self.dg_connection.on(LiveTranscriptionEvents.SpeechStarted, self._handle_speech_start)
+            if SPEECH_STARTED_EVENT is not None:
+                self.dg_connection.on(SPEECH_STARTED_EVENT, self._handle_speech_start)
+            self.dg_connection.on(LiveTranscriptionEvents.Close, self._handle_close)
+            self.dg_connection.on(LiveTranscriptionEvents.Error, self._handle_error)
             
             # Configure Options (Nova-2 is fastest model)
             options = LiveOptions(
@@ -32,14 +61,17 @@ class DeepgramService:
                 channels=1,
                 sample_rate=8000,    # Twilio Mulaw is 8000Hz
                 interim_results=True,
-                vad_events=True,     # Critical for interruption
-                endpointing=300      # 300ms silence = end of sentence
+                endpointing=300,     # 300ms silence = end of sentence
+                **VAD_EVENTS_OPTION  # Critical for interruption (local VAD covers older SDKs)
             )
 
-            if await self.dg_connection.start(options) is False:
+            # asynclive returns None (not False) when the handshake is refused
+            if not await self.dg_connection.start(options):
                 logger.error("Failed to connect to Deepgram")
                 return False
             
+            self.is_connected = True
+            self._offset_pending = True
             logger.info("Deepgram Connected")
             return True
 
@@ -47,21 +79,98 @@ class DeepgramService:
             logger.error(f"Deepgram connection error: {e}")
             return False
 
-    async def send_audio(self, audio_chunk: bytes):
-        """Stream raw audio to Deepgram"""
-        if self.dg_connection:
-            await self.dg_connection.send(audio_chunk)
+    async def send_audio(self, audio_chunk: bytes, position: int = None) -> bool:
+        """
+        Stream raw audio to Deepgram. `position`: the chunk's byte offset in the
+        call's inbound audio (defaults to the bytes sent so far).
+        Returns False if the chunk was not delivered; the caller keeps it buffered
+        and re-sends it once the socket is back.
+        """
+        if not self.is_connected:
+            self._schedule_reconnect()
+            return False
+
+        if self._offset_pending:
+            self.stream_offset_seconds = (self.bytes_sent if position is None else position) / (PCM_BYTES_PER_MS * 1000)
+            self._offset_pending = False
+        try:
+            if await self.dg_connection.send(audio_chunk) is False:
+                raise ConnectionError("send returned False")
+        except Exception as e:
+            self.failed_sends += 1
+            logger.warning(f"Deepgram send failed, reconnecting: {e}")
+            self._mark_disconnected()
+            return False
+
+        self.bytes_sent += len(audio_chunk)
+        return True
 
     async def finish(self):
-        if self.dg_connection:
-            await self.dg_connection.finish()
+        self._closing = True
+        if self._reconnect_task and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+        if self.dg_connection and self.is_connected:
+            self.is_connected = False
+            try:
+                await self.dg_connection.finish()
+            except Exception as e:
+                logger.warning(f"Deepgram close error: {e}")
 
-    def _handle_speech_start(self, *args, **kwargs):
+    def _mark_disconnected(self):
+        self.is_connected = False
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        if self._closing:
+            return
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        """Reconnects with exponential backoff until the call ends."""
+        delay = settings.STT_RECONNECT_BASE_DELAY
+        attempt = 0
+        while not self._closing:
+            attempt += 1
+            if self.dg_connection:
+                try:
+                    await self.dg_connection.finish()
+                except Exception:
+                    pass # Socket is already dead
+
+            if await self.connect():
+                self.reconnects += 1
+                logger.info(
+                    f"🔁 Deepgram reconnected after {attempt} attempt(s); "
+                    f"transcript offset {self.stream_offset_seconds:.2f}s"
+                )
+                return
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.STT_RECONNECT_MAX_DELAY)
+
+    async def _handle_close(self, *args, **kwargs):
+        if not self._closing and self.is_connected:
+            logger.warning("Deepgram socket closed mid-call")
+            self._mark_disconnected()
+
+    async def _handle_error(self, *args, **kwargs):
+        error = kwargs.get("error")
+        if getattr(error, "type", None) == "UnhandledMessage":
+            # A message type this SDK version doesn't parse; the socket itself is fine
+            if "SpeechStarted" in (getattr(error, "message", "") or ""):
+                self.on_speech_start()
+            return
+        logger.error(f"Deepgram error: {error}")
+        if not self._closing:
+            self._mark_disconnected()
+
+    async def _handle_speech_start(self, *args, **kwargs):
         """Triggered immediately when VAD detects voice"""
         # This is the "Kill Switch" for TTS
         self.on_speech_start()
 
-    def _handle_transcript(self, *args, **kwargs):
+    async def _handle_transcript(self, *args, **kwargs):
         """Process transcription results"""
         try:
             result = kwargs.get('result')
@@ -74,9 +183,13 @@ class DeepgramService:
             if alternatives:
                 text = alternatives[0].transcript
                 is_final = result.is_final
+
+                # Map the socket-relative timestamps back onto the call timeline
+                start = (getattr(result, "start", 0) or 0) + self.stream_offset_seconds
+                end = start + (getattr(result, "duration", 0) or 0)
                 
                 # We only care about non-empty transcripts
                 if len(text.strip()) > 0:
-                    self.on_transcript(text, is_final)
+                    self.on_transcript(text, is_final, start, end)
         except Exception as e:
             logger.error(f"Error handling transcript: {e}")
\ No newline at end of file
@@ -1,10 +1,14 @@
 from abc import ABC, abstractmethod
 from fastapi import WebSocket
+from app.services.telephony.playback import PlaybackTracker
 
 class TelephonyTransport(ABC):
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
         self.stream_sid = None
+        self.recorder = None # Optional CallRecorder; tees inbound/outbound PCM
+        self.listen_tap = None # Optional ListenTap; same tee, for supervisors listening live
+        self.playback = PlaybackTracker()
 
     @abstractmethod
     async def process_incoming_message(self, message: str):
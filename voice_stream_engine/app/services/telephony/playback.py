@@ -0,0 +1,139 @@
+import time
+from collections import deque
+from app.core.config import settings
+
+
+class PlaybackTracker:
+    """
+    Where the caller's playback actually is, in ms of outbound audio.
+
+    The transport sends a mark after every audio chunk; Twilio echoes it once
+    everything before it has played. Between acknowledgements playback is
+    assumed to advance in real time (bounded by what was sent), so the estimate
+    stays usable if marks are late or never come back.
+
+    Per turn it also keeps the spoken text segments with their audio span, so an
+    interrupted reply can be cut down to what the caller heard.
+    """
+
+    def __init__(self):
+        self.sent_ms = 0.0
+        self.played_ms = 0.0     # Last acknowledged (or drained) position
+        self.playing_since = 0.0 # Monotonic time playback resumed from played_ms
+        self.pending = deque()   # (mark name, end_ms, chunk_ms, first chunk of turn)
+        self._seq = 0
+
+        # Current turn
+        self.segments = [] # {"text": [str], "done": bool, "start_ms", "end_ms"}
+        self.turn_started_at = None
+        self._awaiting_first_audio = False
+
+        # Metrics
+        self.audible_latencies = [] # Turn start -> first audio heard (ms)
+        self.marks_acked = 0
+
+    # --- Outbound ---
+
+    def begin_turn(self, started_at: float = None):
+        self.segments = []
+        self.turn_started_at = started_at if started_at is not None else time.monotonic()
+        self._awaiting_first_audio = True
+
+    def start_segment(self, segment: dict):
+        segment["start_ms"] = segment["end_ms"] = self.sent_ms
+        self.segments.append(segment)
+
+    def sent(self, chunk_ms: float, now: float = None) -> str:
+        """Records an outbound chunk; returns the mark name to send after it."""
+        now = now if now is not None else time.monotonic()
+        if self.heard_ms(now) >= self.sent_ms:
+            # Caller's buffer had drained: this chunk starts playing right away
+            self.played_ms = self.sent_ms
+            self.playing_since = now
+
+        self.sent_ms += chunk_ms
+        if self.segments:
+            self.segments[-1]["end_ms"] = self.sent_ms
+
+        self._seq += 1
+        name = f"a{self._seq}"
+        self.pending.append((name, self.sent_ms, chunk_ms, self._awaiting_first_audio))
+        self._awaiting_first_audio = False
+        return name
+
+    def clear(self, now: float = None):
+        """Caller's buffer was flushed: nothing pending will play, echoed marks are ignored."""
+        now = now if now is not None else time.monotonic()
+        self.played_ms = self.sent_ms = self.heard_ms(now)
+        self.playing_since = now
+        self.pending.clear()
+        self.segments = []
+        self._awaiting_first_audio = False
+
+    # --- Inbound ---
+
+    def acked(self, name: str, now: float = None):
+        now = now if now is not None else time.monotonic()
+        if not any(entry[0] == name for entry in self.pending):
+            return # Echo of a cleared mark
+        # Marks are echoed in order; everything up to this one has played
+        while self.pending:
+            entry_name, end_ms, chunk_ms, first_of_turn = self.pending.popleft()
+            if first_of_turn and self.turn_started_at is not None:
+                audible_at = now - chunk_ms / 1000 # The chunk started playing one chunk ago
+                self.audible_latencies.append(max(0.0, (audible_at - self.turn_started_at) * 1000))
+            if entry_name == name:
+                break
+        self.marks_acked += 1
+        self.played_ms = end_ms
+        self.playing_since = now
+
+    # --- Position ---
+
+    def heard_ms(self, now: float = None) -> float:
+        now = now if now is not None else time.monotonic()
+        return min(self.played_ms + (now - self.playing_since) * 1000, self.sent_ms)
+
+    @property
+    def is_playing(self) -> bool:
+        return self.heard_ms() < self.sent_ms
+
+    def heard_text(self, now: float = None) -> str:
+        """Text of the current turn the caller has heard, cut at a word boundary."""
+        heard = self.heard_ms(now)
+        done = [s for s in self.segments if s["done"]]
+        done_chars = sum(len("".join(s["text"])) for s in done)
+        ms_per_char = (
+            sum(s["end_ms"] - s["start_ms"] for s in done) / done_chars
+            if done_chars else settings.PLAYBACK_MS_PER_CHAR
+        )
+
+        parts = []
+        for segment in self.segments:
+            text = "".join(segment["text"])
+            played = max(0.0, heard - segment["start_ms"])
+            span = segment["end_ms"] - segment["start_ms"]
+            if segment["done"] and span > 0:
+                chars = int(len(text) * min(1.0, played / span))
+            else:
+                # Still synthesizing: only part of the text has audio yet
+                chars = int(played / ms_per_char)
+
+            if chars >= len(text):
+                parts.append(text)
+                continue
+            cut = text[:chars]
+            if not text[chars].isspace():
+                cut = cut[:cut.rfind(" ") + 1] # Drop the half-heard word
+            parts.append(cut)
+            break
+        return "".join(parts).strip()
+
+    def stats(self) -> dict:
+        latencies = self.audible_latencies
+        return {
+            "audible_turns": len(latencies),
+            "audible_latency_avg_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "audible_latency_max_ms": round(max(latencies), 1) if latencies else 0.0,
+            "playback_marks_acked": self.marks_acked,
+        }
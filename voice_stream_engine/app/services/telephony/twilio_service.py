@@ -2,6 +2,7 @@ import json
 import logging
 from app.services.telephony.base import TelephonyTransport
 from app.utils.audio import AudioUtils
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,10 @@ class TwilioTransport(TelephonyTransport):
             payload = data['media']['payload']
             # Convert to PCM immediately
             pcm_data = AudioUtils.mulaw_to_pcm(payload)
+            if self.recorder:
+                self.recorder.write_inbound(pcm_data)
+            if self.listen_tap:
+                self.listen_tap.inbound(pcm_data)
             return pcm_data
 
         elif event_type == "stop":
@@ -35,7 +40,8 @@ class TwilioTransport(TelephonyTransport):
             return None
             
         elif event_type == "mark":
-            # Used for bidirectional latency tracking
+            # Audio up to this mark has played (or was cleared)
+            self.playback.acked(data["mark"]["name"])
             return None
 
         return None
@@ -52,6 +58,18 @@ class TwilioTransport(TelephonyTransport):
         response = AudioUtils.create_twilio_media_event(self.stream_sid, base64_payload)
         
         await self.websocket.send_json(response)
+        if self.recorder:
+            self.recorder.write_outbound(audio_chunk)
+        if self.listen_tap:
+            self.listen_tap.outbound(audio_chunk)
+
+        # Twilio echoes the mark once the chunk has played
+        mark = self.playback.sent(len(audio_chunk) / PCM_BYTES_PER_MS)
+        await self.websocket.send_json({
+            "event": "mark",
+            "streamSid": self.stream_sid,
+            "mark": {"name": mark}
+        })
 
     async def send_clear_message(self):
         """
@@ -64,4 +82,9 @@ class TwilioTransport(TelephonyTransport):
             "event": "clear",
             "streamSid": self.stream_sid
         }
-        await self.websocket.send_json(msg)
\ No newline at end of file
+        await self.websocket.send_json(msg)
+        self.playback.clear()
+        if self.recorder:
+            self.recorder.truncate_outbound()
+        if self.listen_tap:
+            self.listen_tap.clear()
\ No newline at end of file
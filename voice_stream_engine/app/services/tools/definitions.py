@@ -1,3 +1,23 @@
+from pydantic import BaseModel, Field
+from app.services.tools.calendar_tool import CalendarTool
+from app.services.tools.sms_tool import SmsTool
+from app.services.tools.registry import tool_registry
+
+
+# Strict Schemas for Validation
+class CalendarCheckSchema(BaseModel):
+    date: str
+    time: str
+
+class AppointmentBookSchema(BaseModel):
+    date: str
+    time: str
+    name: str
+    phone: str | None = None
+
+class SmsSendSchema(BaseModel):
+    message: str = Field(min_length=1, max_length=480) # 3 SMS segments
+
 # OpenAI Tool Schemas
 AVAILABLE_TOOLS = [
     {
@@ -37,5 +57,26 @@ AVAILABLE_TOOLS = [
                 "required": ["date", "time", "name"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "send_sms",
+            "description": "Send a text message to the caller's phone (the number they are on), e.g. to confirm a booked appointment.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "message": {"type": "string", "description": "The text to send, under 480 characters"}
+                },
+                "required": ["message"]
+            }
+        }
     }
-]
\ No newline at end of file
+]
+
+
+# Register once per process; agents enable a subset via agent_config["enabled_tools"]
+tool_registry.register(CalendarTool.check_calendar_availability, CalendarCheckSchema, AVAILABLE_TOOLS[0])
+tool_registry.register(CalendarTool.book_appointment, AppointmentBookSchema, AVAILABLE_TOOLS[1])
+# Opt-in (costs money, reaches outside the call): list "send_sms" in enabled_tools
+tool_registry.register(SmsTool.send_sms, SmsSendSchema, AVAILABLE_TOOLS[2], default=False)
@@ -1,60 +1,42 @@
-import json
 import logging
-from app.services.tools.calendar_tool import CalendarTool
 import asyncio
-from pydantic import BaseModel, ValidationError, create_model
+from typing import Optional, Tuple
+from pydantic import ValidationError
+from app.services.tools import definitions # noqa: F401 (registers the built-in tools)
+from app.services.tools.registry import tool_registry
 
 logger = logging.getLogger("tools")
 
 
-# 1. Define Strict Schemas for Validation
-class CalendarCheckSchema(BaseModel):
-    date: str
-    time: str
-
-class AppointmentBookSchema(BaseModel):
-    date: str
-    time: str
-    name: str
-    phone: str | None = None
-
 class ToolExecutor:
-    def __init__(self):
-        self.functions = {
-            "check_calendar_availability": (CalendarTool.check_calendar_availability, CalendarCheckSchema),
-            "book_appointment": (CalendarTool.book_appointment, AppointmentBookSchema)
-        }
-
-    async def execute(self, tool_call_data: dict) -> str:
-        name = tool_call_data.function.name
-        raw_args = tool_call_data.function.arguments
+    def __init__(self, tool_names: Optional[Tuple[str, ...]] = None, context: Optional[dict] = None):
+        # Shared per-subset lookup from the registry: nothing is built per call
+        self.tool_names = tool_names if tool_names is not None else tool_registry.resolve(None)
+        self.functions, self.schemas = tool_registry.select(self.tool_names)
+        self.context = context or {} # Call facts for tools that ask for them (tenant_id, call_id...)
 
-        if name not in self.functions:
-            return f"System Error: Tool {name} is defined in definitions but missing implementation."
-
-        func, schema = self.functions[name]
+    async def execute(self, name: str, raw_args: str) -> str:
+        tool = self.functions.get(name)
+        if tool is None:
+            return f"System Error: Tool {name} is not enabled for this agent."
 
         try:
-            # 2. Validate JSON & Schema
-            args_dict = json.loads(raw_args)
-            validated_args = schema(**args_dict) # This throws ValidationError if LLM hallucinated
-            
-            # 3. Timeout Protection
-            # Don't let a tool hang the call for >3 seconds
-            result = await asyncio.wait_for(
-                # Run sync function in thread pool to not block asyncio loop
-                asyncio.to_thread(func, **validated_args.model_dump()), 
-                timeout=3.0
-            )
+            # 1. Validate JSON & Schema in one pass (precompiled per tool)
+            # This throws ValidationError if LLM hallucinated
+            validated_args = tool.validator.validate_json(raw_args or "{}")
+
+            # 2. Timeout Protection
+            # Don't let a tool hang the call for longer than its budget
+            result = await asyncio.wait_for(tool.run(validated_args, self.context), timeout=tool.timeout)
             return str(result)
 
-        except json.JSONDecodeError:
-            return "Error: Invalid JSON arguments provided by model."
         except ValidationError as e:
+            if any(error["type"] == "json_invalid" for error in e.errors()):
+                return "Error: Invalid JSON arguments provided by model."
             # Return specific validation error so LLM can self-correct in next turn
-            return f"Error: Missing or invalid arguments. Details: {e.errors()}"
+            return f"Error: Missing or invalid arguments. Details: {e.errors(include_url=False)}"
         except asyncio.TimeoutError:
             return "Error: The tool took too long to respond."
         except Exception as e:
             logger.error(f"Tool Execution Critical Failure: {e}")
-            return "Error: Internal tool failure."
\ No newline at end of file
+            return "Error: Internal tool failure."
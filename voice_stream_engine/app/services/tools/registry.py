@@ -0,0 +1,85 @@
+import asyncio
+import inspect
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger("tools")
+
+
+class Tool:
+    """A registered tool: implementation, argument validator and the schema sent to the LLM."""
+
+    def __init__(self, func: Callable, args_model: Type[BaseModel], schema: dict, timeout: float, default: bool):
+        self.name = schema["function"]["name"]
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        # Tools that need the call (tenant, caller line...) declare a `context` parameter
+        self.wants_context = "context" in inspect.signature(func).parameters
+        self.default = default # Enabled for agents that don't list their tools
+        # Built once per process: parses and validates the raw JSON arguments in one pass
+        self.validator = TypeAdapter(args_model)
+        self.schema = schema
+        self.timeout = timeout
+
+    async def run(self, args: BaseModel, context: Optional[dict] = None):
+        kwargs = args.model_dump()
+        if self.wants_context:
+            kwargs["context"] = context or {}
+        if self.is_async:
+            return await self.func(**kwargs)
+        # Run sync function in thread pool to not block asyncio loop
+        return await asyncio.to_thread(self.func, **kwargs)
+
+
+class ToolRegistry:
+    """
+    Process-wide tool catalogue. Tools register once at import (see definitions.py);
+    each call picks the agent's subset by name, so building an executor is a dict
+    lookup and only the enabled schemas go into the prompt.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._selections = {} # names -> (tools, schemas)
+
+    def register(self, func: Callable, args_model: Type[BaseModel], schema: dict, timeout: float = 3.0,
+                 default: bool = True) -> Tool:
+        tool = Tool(func, args_model, schema, timeout, default)
+        if tool.name in self._tools:
+            raise ValueError(f"Tool {tool.name} is already registered")
+        self._tools[tool.name] = tool
+        self._selections.clear()
+        return tool
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def resolve(self, enabled: Optional[List[str]]) -> Tuple[str, ...]:
+        """
+        Agent's `enabled_tools` -> registered tool names, in registration order.
+        None enables the default tools; tools with side effects outside the call (SMS) are opt-in.
+        """
+        if enabled is None:
+            return tuple(name for name, tool in self._tools.items() if tool.default)
+        unknown = set(enabled) - set(self._tools)
+        if unknown:
+            logger.warning(f"⚠️ Agent enables unknown tools, ignored: {sorted(unknown)}")
+        return tuple(name for name in self._tools if name in enabled)
+
+    def select(self, names: Tuple[str, ...]) -> Tuple[Dict[str, Tool], Optional[list]]:
+        """
+        ({name: Tool}, schemas) for a resolved subset, shared by every call with that subset.
+        Schemas are None when no tool is enabled, so nothing is sent. Treat both as read-only.
+        """
+        if names not in self._selections:
+            tools = {name: self._tools[name] for name in names}
+            self._selections[names] = (tools, [tool.schema for tool in tools.values()] or None)
+        return self._selections[names]
+
+
+tool_registry = ToolRegistry()
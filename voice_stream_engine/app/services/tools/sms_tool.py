@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import random
+import re
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.config import settings
+
+logger = logging.getLogger("tools")
+
+SMS_SENT = Counter("sms_messages_total", "Outbox SMS by final outcome", ["outcome"])
+SMS_RETRIES = Counter("sms_retries_total", "SMS send attempts retried after a retryable failure")
+SMS_QUEUED = Gauge("sms_outbox_depth", "SMS waiting in this pod's outbox")
+SMS_DELIVERY = Histogram(
+    "sms_queue_to_sent_seconds", "Enqueue -> provider accepted",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+)
+
+_PHONE_STRIP_RE = re.compile(r"[\s().-]")
+_E164_RE = re.compile(r"^\+[1-9]\d{7,14}$")
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """'(415) 555-0100' -> '+14155550100'; None if it can't be an E.164 number."""
+    number = _PHONE_STRIP_RE.sub("", raw or "")
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    elif not number.startswith("+"):
+        # Bare 10-digit numbers are assumed to be in the default country
+        number = (settings.SMS_DEFAULT_COUNTRY_CODE + number) if len(number) == 10 else "+" + number
+    return number if _E164_RE.match(number) else None
+
+
+class OutboundSms:
+    def __init__(self, tenant_id: str, to: str, body: str, from_number: str, call_id: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.tenant_id = tenant_id
+        self.to = to
+        self.body = body
+        self.from_number = from_number
+        self.call_id = call_id
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+        self.not_before = 0.0 # Retry backoff
+
+
+class SmsOutbox:
+    """
+    Pod-local outbox for SMS sent by the send_sms tool.
+
+    enqueue() returns at once; a background worker flushes every
+    SMS_FLUSH_INTERVAL_MS over one pooled HTTP client (keep-alive connections
+    shared by every call on the pod). Each flush takes up to SMS_BATCH_SIZE due
+    messages per tenant and sends them concurrently, so a tenant with a burst
+    can't starve the others. 429/5xx/connection failures retry with jittered
+    exponential backoff (Retry-After wins when given) up to SMS_MAX_ATTEMPTS.
+
+    The outbox is in memory: close() flushes it on shutdown (drain), but a
+    crashed pod loses what was still queued.
+    """
+
+    def __init__(self, client: httpx.AsyncClient = None):
+        self._client = client
+        self._queues: Dict[str, Deque[OutboundSms]] = {} # tenant_id -> messages
+        self._size = 0
+        self._wake = asyncio.Event()
+        self._worker = None
+        self._closing = False
+
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0 # Outbox full
+
+    # --- Producer side (tool calls) ---
+
+    def enqueue(self, tenant_id: str, to: str, body: str, from_number: str = None,
+                call_id: str = None) -> Optional[OutboundSms]:
+        if self._closing or self._size >= settings.SMS_OUTBOX_MAX:
+            self.rejected += 1
+            SMS_SENT.labels("rejected").inc()
+            return None
+        sms = OutboundSms(tenant_id or "default", to, body, from_number or settings.SMS_FROM_NUMBER, call_id)
+        self._queues.setdefault(sms.tenant_id, deque()).append(sms)
+        self._size += 1
+        self.queued += 1
+        SMS_QUEUED.set(self._size)
+        self._ensure_worker()
+        self._wake.set()
+        return sms
+
+    def _ensure_worker(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.SMS_API_URL,
+                auth=(settings.TWILIO_ACCOUNT_SID or "", settings.TWILIO_AUTH_TOKEN or ""),
+                limits=httpx.Limits(max_connections=settings.SMS_MAX_CONNECTIONS,
+                                    max_keepalive_connections=settings.SMS_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(10.0, connect=3.0)
+            )
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="sms_outbox")
+
+    # --- Worker ---
+
+    async def _run(self):
+        while self._size:
+            self._wake.clear()
+            # Short window so messages queued close together go out in one flush
+            await asyncio.sleep(settings.SMS_FLUSH_INTERVAL_MS / 1000)
+            batch = self._take_due()
+            if batch:
+                await asyncio.gather(*(self._send(sms) for sms in batch))
+                continue
+            # Only backed-off messages left: sleep until the first is due (or something new arrives)
+            wait = min(sms.not_before for queue in self._queues.values() for sms in queue) - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, wait))
+            except asyncio.TimeoutError:
+                pass
+
+    def _take_due(self) -> list:
+        now = time.monotonic()
+        batch = []
+        for tenant_id, queue in list(self._queues.items()):
+            taken = 0
+            for sms in list(queue):
+                if taken >= settings.SMS_BATCH_SIZE:
+                    break
+                if sms.not_before <= now:
+                    queue.remove(sms)
+                    batch.append(sms)
+                    taken += 1
+            if not queue:
+                del self._queues[tenant_id]
+        return batch
+
+    async def _send(self, sms: OutboundSms):
+        sms.attempts += 1
+        retry_after = None
+        try:
+            response = await self._client.post(
+                f"/2010-04-01/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json",
+                data={"To": sms.to, "From": sms.from_number, "Body": sms.body}
+            )
+            if response.status_code < 300:
+                self._done(sms, "sent")
+                logger.info(f"📨 SMS {sms.id} sent to {sms.to[:-4]}**** (attempt {sms.attempts})")
+                return
+            retryable = response.status_code in RETRYABLE_STATUS
+            retry_after = response.headers.get("Retry-After")
+            error = f"HTTP {response.status_code}"
+        except httpx.TransportError as e:
+            retryable = True
+            error = type(e).__name__
+        except Exception as e:
+            # Not worth retrying, but must not take down the worker (and the rest of the batch) with it
+            retryable = False
+            error = f"{type(e).__name__}: {e}"
+
+        if retryable and sms.attempts < settings.SMS_MAX_ATTEMPTS:
+            delay = settings.SMS_RETRY_BASE_DELAY * 2 ** (sms.attempts - 1) * random.uniform(0.8, 1.2)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            sms.not_before = time.monotonic() + delay
+            self._queues.setdefault(sms.tenant_id, deque()).append(sms)
+            self.retried += 1
+            SMS_RETRIES.inc()
+            logger.warning(f"⚠️ SMS {sms.id} failed ({error}), retry {sms.attempts} in {delay:.1f}s")
+            return
+        self._done(sms, "failed")
+        logger.error(f"❌ SMS {sms.id} for tenant {sms.tenant_id} dropped after {sms.attempts} attempts: {error}")
+
+    def _done(self, sms: OutboundSms, outcome: str):
+        self._size -= 1
+        SMS_QUEUED.set(self._size)
+        SMS_SENT.labels(outcome).inc()
+        if outcome == "sent":
+            self.sent += 1
+            SMS_DELIVERY.observe(time.monotonic() - sms.queued_at)
+        else:
+            self.failed += 1
+
+    async def close(self, timeout: float = None):
+        """Stops accepting messages and gives queued ones until `timeout` to go out."""
+        self._closing = True
+        if self._worker and not self._worker.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._worker), timeout or settings.DRAIN_FLUSH_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ SMS outbox closed with {self._size} unsent messages")
+                self._worker.cancel()
+        if self._client:
+            await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {"queued": self.queued, "sent": self.sent, "failed": self.failed,
+                "retried": self.retried, "rejected": self.rejected, "pending": self._size}
+
+
+sms_outbox = SmsOutbox()
+
+
+class SmsTool:
+    @staticmethod
+    async def send_sms(message: str, context: dict = None) -> str:
+        """
+        Texts the caller, and only the caller: the recipient is the number on the call
+        (Twilio's From, or To on outbound calls), never one the model picked, so a number
+        spoken on the call or injected into the prompt can't be charged for (toll fraud).
+        """
+        context = context or {}
+        number = normalize_phone(context.get("caller_number") or "")
+        if not number:
+            return "Error: The caller's number is hidden, so a text can't be sent. Offer to give the details verbally."
+        from_number = context.get("from_number") or settings.SMS_FROM_NUMBER
+        if not from_number:
+            return "Error: Text messages are not set up for this line."
+        # Per-call cap; the context dict lives as long as the call
+        if context.get("sms_sent", 0) >= settings.SMS_MAX_PER_CALL:
+            return "Error: The text message limit for this call has been reached."
+
+        logger.info(f"🔧 TOOL: Queueing SMS to {number[:-4]}****")
+        sms = sms_outbox.enqueue(context.get("tenant_id"), number, message, from_number, context.get("call_id"))
+        if not sms:
+            return "Error: Text messages can't be sent right now."
+        context["sms_sent"] = context.get("sms_sent", 0) + 1
+        # Sending happens in the background; the call doesn't wait on the SMS provider
+        return f"Queued. The text message will arrive in a moment (ref {sms.id})."
@@ -23,7 +23,7 @@ class ElevenLabsService:
         - Task B: Receives audio bytes from ElevenLabs.
         """
         uri = (
-            f"wss://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/stream-input"
+            f"{settings.ELEVENLABS_WS_URL}/v1/text-to-speech/{self.voice_id}/stream-input"
             f"?model_id={self.model_id}&output_format={self.output_format}"
         )
 
@@ -0,0 +1,100 @@
+"""
+Replay-based evaluation of the TurnDetector against Deepgram endpointing.
+
+Session files are JSONL, one event per line, timestamps in seconds from call start:
+    {"t": 0.42, "type": "vad", "speech": true}
+    {"t": 0.90, "type": "interim", "text": "yes"}
+    {"t": 1.10, "type": "final", "text": "Yes."}
+    {"t": 1.35, "type": "endpoint"}     # Deepgram speech_final (the baseline)
+
+Usage:
+    python -m app.services.turn.evaluation sessions/*.jsonl [--config '{"min_silence_ms": 150}']
+"""
+import argparse
+import json
+import statistics
+from typing import Dict, List
+from app.services.turn.turn_detector import TurnDetector
+
+POLL_INTERVAL = 0.02 # Same cadence as the orchestrator's turn loop
+
+
+def load_session(path: str) -> List[Dict]:
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    return sorted(events, key=lambda e: e["t"])
+
+
+def replay_session(events: List[Dict], config: dict = None) -> Dict:
+    """
+    Drives a fresh detector through one session.
+
+    A trigger is a false cut-in if the user speaks again before the next baseline
+    endpoint; otherwise it is credited with (endpoint - trigger) latency saved.
+    """
+    detector = TurnDetector(config)
+    triggers = []
+    endpoints = []
+    speech_onsets = []
+
+    def poll_until(t: float, now: float) -> float:
+        while now + POLL_INTERVAL <= t:
+            now += POLL_INTERVAL
+            if detector.poll(now) is not None:
+                triggers.append(now)
+        return now
+
+    now = events[0]["t"] if events else 0.0
+    for event in events:
+        now = poll_until(event["t"], now)
+        kind = event["type"]
+        if kind == "vad":
+            if event["speech"] and not detector.speaking:
+                speech_onsets.append(event["t"])
+            detector.on_voice_activity(event["speech"], event["t"])
+        elif kind in ("interim", "final"):
+            detector.on_transcript(event["text"], kind == "final", event["t"])
+        elif kind == "endpoint":
+            endpoints.append(event["t"])
+    poll_until(now + 2.0, now)
+
+    saved_ms = []
+    false_cut_ins = 0
+    for trigger in triggers:
+        next_endpoint = next((e for e in endpoints if e >= trigger), None)
+        resumed = any(trigger < s < (next_endpoint or float("inf")) for s in speech_onsets)
+        if resumed:
+            false_cut_ins += 1
+        elif next_endpoint is not None:
+            saved_ms.append((next_endpoint - trigger) * 1000)
+
+    return {
+        "turns": len(endpoints),
+        "triggers": len(triggers),
+        "false_cut_ins": false_cut_ins,
+        "saved_ms": saved_ms,
+    }
+
+
+def evaluate(paths: List[str], config: dict = None) -> Dict:
+    results = [replay_session(load_session(p), config) for p in paths]
+    saved = [ms for r in results for ms in r["saved_ms"]]
+    triggers = sum(r["triggers"] for r in results)
+    false_cut_ins = sum(r["false_cut_ins"] for r in results)
+    return {
+        "sessions": len(results),
+        "turns": sum(r["turns"] for r in results),
+        "triggers": triggers,
+        "false_cut_ins": false_cut_ins,
+        "false_cut_in_rate": round(false_cut_ins / triggers, 3) if triggers else 0.0,
+        "mean_saved_ms": round(statistics.mean(saved), 1) if saved else 0.0,
+        "median_saved_ms": round(statistics.median(saved), 1) if saved else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate local turn detection on recorded sessions")
+    parser.add_argument("sessions", nargs="+")
+    parser.add_argument("--config", default="{}", help="JSON overrides for TurnDetector")
+    args = parser.parse_args()
+    print(json.dumps(evaluate(args.sessions, json.loads(args.config)), indent=2))
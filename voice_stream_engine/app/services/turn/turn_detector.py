@@ -0,0 +1,180 @@
+import audioop
+import re
+import time
+from typing import Optional
+from app.core.config import settings
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
+
+# Utterances that are complete on their own ("yes" should not wait 300ms+)
+SHORT_ANSWERS = {
+    "yes", "yeah", "yep", "no", "nope", "okay", "ok", "sure", "right", "correct",
+    "thanks", "thank you", "great", "perfect", "bye", "goodbye", "hello", "hi",
+}
+
+# Trailing words that mean the speaker is mid-sentence or thinking
+CONTINUATION_WORDS = {
+    "and", "but", "so", "or", "because", "um", "uh", "uhm", "like", "the", "a", "an",
+    "to", "of", "with", "for", "my", "is", "if", "then", "i", "i'm", "we", "it's",
+}
+
+_WORD_RE = re.compile(r"[a-z']+")
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+class TurnDetector:
+    """
+    Local end-of-turn detection for one call.
+
+    Combines three signals:
+    - VAD silence: frame RMS below a threshold since the last voiced frame.
+    - Transcript stability: the interim hypothesis has stopped changing.
+    - Completeness: punctuation, short answers and trailing filler words decide
+      how much silence we require before handing the turn to the LLM.
+
+    `max_silence_ms` caps the wait even for trailing fillers, so a turn always ends:
+    on a line whose noise keeps the VAD at "speech", a final transcript that
+    nothing has followed for `max_silence_ms` ends the turn anyway.
+    All methods take an explicit `now` so the same code runs in the replay evaluation.
+    """
+
+    DEFAULTS = {
+        "enabled": True,
+        "vad_rms_threshold": 500,   # 16-bit PCM RMS considered speech
+        "min_silence_ms": 200,      # Complete utterance ("yes.", "what time is it?")
+        "default_silence_ms": 500,  # Neutral utterance
+        "max_silence_ms": 1000,     # Trailing "and...", "um..."
+        "stability_ms": 150,        # Interim transcript unchanged for this long
+        "late_final_ms": 2000,      # After a turn ended on an interim, wait this long for its final
+    }
+
+    def __init__(self, config: dict = None):
+        self.config = {**self.DEFAULTS, "enabled": settings.TURN_DETECTION_ENABLED, **(config or {})}
+        self.enabled = self.config["enabled"]
+        self.audio_seconds = 0.0 # Inbound audio seen so far (same timeline as transcript start/end)
+        self.reset()
+
+    def reset(self):
+        self.final_segments = []
+        self.interim_text = ""
+        self.interim_changed_at = None
+        self.silence_started_at = None
+        self.speaking = False
+        # After an early trigger, Deepgram still delivers the final for that audio
+        self.awaiting_late_final = False
+        self.late_final_text = "" # What that turn committed
+        self.late_final_until = None
+        self.late_final_audio = None # Audio position at the commit: transcripts starting later are new speech
+
+    # --- Inputs ---
+
+    def on_audio(self, pcm_frame: bytes, now: float = None):
+        self.audio_seconds += len(pcm_frame) / (PCM_BYTES_PER_MS * 1000)
+        self.on_voice_activity(audioop.rms(pcm_frame, 2) >= self.config["vad_rms_threshold"], now)
+
+    def on_voice_activity(self, is_speech: bool, now: float = None):
+        now = now if now is not None else time.monotonic()
+        if is_speech:
+            # Not the end of the wait for a late final: it usually arrives after the caller goes on
+            self.speaking = True
+            self.silence_started_at = None
+        elif self.speaking:
+            self.speaking = False
+            self.silence_started_at = now
+
+    def on_transcript(self, text: str, is_final: bool, now: float = None, start: float = None):
+        """`start`: where the transcribed audio begins, in seconds of inbound audio (None if unknown)."""
+        now = now if now is not None else time.monotonic()
+        text = text.strip()
+        if not text:
+            return
+
+        if self.awaiting_late_final and (
+            now > self.late_final_until
+            or (start is not None and start >= self.late_final_audio)
+        ):
+            self.awaiting_late_final = False # Never came, or this is audio after the commit
+        if self.awaiting_late_final:
+            # Final/interim for audio we already turned into a user turn
+            if not is_final:
+                return
+            self.awaiting_late_final = False
+            # Deepgram may have run on into the next words: keep only those
+            text = _strip_committed(text, self.late_final_text)
+            if not text:
+                return
+
+        if not self.speaking and self.silence_started_at is None:
+            # Speech the VAD missed (quiet line): start the silence clock from the transcript
+            self.silence_started_at = now
+
+        if is_final:
+            self.final_segments.append(text)
+            self.interim_text = ""
+        elif text != self.interim_text:
+            self.interim_text = text
+        else:
+            return
+        self.interim_changed_at = now
+
+    # --- Decision ---
+
+    @property
+    def pending_text(self) -> str:
+        parts = self.final_segments + ([self.interim_text] if self.interim_text else [])
+        return " ".join(parts)
+
+    def required_silence_ms(self, text: str) -> int:
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return self.config["max_silence_ms"]
+        if words[-1] in CONTINUATION_WORDS:
+            return self.config["max_silence_ms"]
+        if text.rstrip().endswith(("?", ".", "!")) or " ".join(words) in SHORT_ANSWERS:
+            return self.config["min_silence_ms"]
+        return self.config["default_silence_ms"]
+
+    def poll(self, now: float = None) -> Optional[str]:
+        """
+        Returns the user's turn text once the turn is judged complete, else None.
+        Cheap enough to call every few tens of milliseconds.
+        """
+        if not self.enabled:
+            return None
+        text = self.pending_text
+        if not text:
+            return None
+
+        now = now if now is not None else time.monotonic()
+        quiet_ms = (now - self.interim_changed_at) * 1000
+        if self.speaking or self.silence_started_at is None:
+            # VAD sees no silence (noisy line?): a final nothing has followed for max_silence_ms still ends the turn
+            if self.interim_text or quiet_ms < self.config["max_silence_ms"]:
+                return None
+        elif quiet_ms < self.config["stability_ms"]:
+            return None
+        elif (now - self.silence_started_at) * 1000 < self.required_silence_ms(text):
+            return None
+
+        # Turn complete. If it rests on an interim hypothesis, swallow the late final.
+        awaiting_final = bool(self.interim_text)
+        speaking = self.speaking
+        self.reset()
+        self.speaking = speaking
+        if awaiting_final:
+            self.awaiting_late_final = True
+            self.late_final_text = text
+            self.late_final_until = now + self.config["late_final_ms"] / 1000
+            self.late_final_audio = self.audio_seconds
+        return text
+
+
+def _strip_committed(final: str, committed: str) -> str:
+    """The part of `final` after the words already committed; "" if it is just a revision of them."""
+    committed_words = _TOKEN_RE.findall(committed.lower())
+    tokens = final.split()
+    taken = []
+    for i, token in enumerate(tokens):
+        if len(taken) >= len(committed_words):
+            return " ".join(tokens[i:]) if taken == committed_words else ""
+        taken += _TOKEN_RE.findall(token.lower())
+    return ""
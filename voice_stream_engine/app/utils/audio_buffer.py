@@ -0,0 +1,78 @@
+SAMPLE_RATE = 8000
+SAMPLE_WIDTH = 2 # 16-bit PCM
+PCM_BYTES_PER_MS = SAMPLE_RATE * SAMPLE_WIDTH // 1000
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity circular buffer for raw PCM.
+
+    Writes copy into a preallocated bytearray through a memoryview, so the
+    hot path does not allocate per frame. Positions are absolute byte offsets
+    since the start of the call, which lets a consumer re-read anything still
+    retained (e.g. to replay audio after a reconnect).
+    """
+
+    def __init__(self, capacity_bytes: int):
+        self.capacity = capacity_bytes
+        self._buf = bytearray(capacity_bytes)
+        self._view = memoryview(self._buf)
+        self.write_pos = 0 # Total bytes ever written
+        self.read_pos = 0  # Total bytes consumed by the reader
+        self.dropped_bytes = 0 # Bytes overwritten before they were read
+
+    @property
+    def pending(self) -> int:
+        """Bytes written but not yet consumed."""
+        return self.write_pos - self.read_pos
+
+    @property
+    def oldest_pos(self) -> int:
+        """Oldest absolute position still retained in the buffer."""
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, data: bytes):
+        src = memoryview(data)
+        n = len(src)
+        if n > self.capacity:
+            # Only the newest `capacity` bytes can survive anyway
+            self.write_pos += n - self.capacity
+            src = src[n - self.capacity:]
+            n = self.capacity
+
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._view[start:start + first] = src[:first]
+        if first < n:
+            self._view[0:n - first] = src[first:]
+        self.write_pos += n
+
+        # Reader fell behind by more than the buffer holds: skip the lost audio
+        if self.write_pos - self.read_pos > self.capacity:
+            self.dropped_bytes += self.write_pos - self.capacity - self.read_pos
+            self.read_pos = self.write_pos - self.capacity
+
+    def read_range(self, start_pos: int, max_bytes: int) -> bytes:
+        """Copies up to `max_bytes` starting at absolute `start_pos` without consuming."""
+        start_pos = max(start_pos, self.oldest_pos)
+        n = min(max_bytes, self.write_pos - start_pos)
+        if n <= 0:
+            return b""
+
+        start = start_pos % self.capacity
+        first = min(n, self.capacity - start)
+        if first == n:
+            return bytes(self._view[start:start + n])
+        return bytes(self._view[start:]) + bytes(self._view[0:n - first])
+
+    def peek(self, max_bytes: int) -> bytes:
+        """Next unread bytes (up to `max_bytes`), left in the buffer."""
+        return self.read_range(self.read_pos, max_bytes)
+
+    def advance(self, n: int):
+        """Marks `n` bytes as consumed."""
+        self.read_pos = min(self.read_pos + n, self.write_pos)
+
+    def tail(self, n: int) -> bytes:
+        """The most recent `n` bytes retained, regardless of read position."""
+        return self.read_range(self.write_pos - n, n)
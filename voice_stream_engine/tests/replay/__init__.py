@@ -0,0 +1,2 @@
+from tests.replay.harness import ReplayHarness, summarize
+from tests.replay.synthetic import build_capture
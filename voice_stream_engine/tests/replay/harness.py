@@ -0,0 +1,249 @@
+"""
+Deterministic call replay.
+
+Feeds a captured Twilio media stream into a real StreamOrchestrator whose
+providers are replaced by the stubs in stubs.py, on a virtual-time loop, and
+reports a latency breakdown for every user turn:
+
+    endpoint_ms   end of user speech -> turn committed (turn detection)
+    dispatch_ms   commit -> first LLM request
+    llm_ttft_ms   LLM request -> first text token (includes tool steps)
+    tts_wait_ms   first token -> first text reaching TTS
+    tts_ttfb_ms   first text sent to TTS -> first audio back
+    send_ms       first TTS audio -> first media frame sent to Twilio
+    total_ms      end of user speech -> first media frame (what the caller hears as delay)
+
+Usage:
+    python -m tests.replay.harness capture.jsonl [--latency-scale 1.5]
+"""
+import argparse
+import asyncio
+import audioop
+import base64
+import json
+import statistics
+import time
+from collections import deque
+from typing import Dict, List
+from fastapi import WebSocketDisconnect
+from app.services import orchestrator as orchestrator_module
+from app.services.call_capture import load_capture
+from tests.replay.clock import run_virtual
+from tests.replay.stubs import ReplayScript, StubRedactor, StubRetrieval, StubTelemetry
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
+
+SPEECH_RMS = 500 # Same default as the TurnDetector's VAD threshold
+
+
+class ReplayWebSocket:
+    """
+    Plays the captured Twilio frames at their recorded times; records what we send back.
+
+    Like Twilio, outbound media is played out in real time and each mark is echoed
+    once the audio before it has played (immediately, on a clear).
+    """
+
+    def __init__(self, script: ReplayScript, tail_seconds: float):
+        self.script = script
+        # Recorded mark echoes belong to the recorded playback; we echo our own
+        self.frames = [f for f in script.capture["twilio"] if json.loads(f["message"]).get("event") != "mark"]
+        self.tail_seconds = tail_seconds
+        self.sent = [] # (monotonic time, message)
+        self.speech_frames = [] # monotonic times of inbound frames with caller speech
+        self.playback_end = 0.0 # When the audio sent so far finishes playing
+        self.echoes = deque() # (due time, mark message)
+        self._hangup_at = None
+        self._wake = asyncio.Event()
+        self.closed_at = None # We hung up (end_call)
+
+    async def receive_text(self) -> str:
+        while True:
+            if self.closed_at is not None:
+                raise RuntimeError("WebSocket is not connected")
+            if self.frames:
+                next_at = self.script.started + self.frames[0]["t"]
+            else:
+                # Let the last answer play out, then hang up
+                if self._hangup_at is None:
+                    self._hangup_at = time.monotonic() + self.tail_seconds
+                next_at = self._hangup_at
+            echo_first = bool(self.echoes) and self.echoes[0][0] <= next_at
+            if echo_first:
+                next_at = self.echoes[0][0]
+
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                    continue # A new mark or a clear: re-plan
+                except asyncio.TimeoutError:
+                    pass
+            if echo_first:
+                return json.dumps(self.echoes.popleft()[1])
+            if not self.frames:
+                raise WebSocketDisconnect()
+            break
+
+        frame = self.frames.pop(0)
+        message = json.loads(frame["message"])
+        if message.get("event") == "media":
+            mulaw = base64.b64decode(message["media"]["payload"])
+            if audioop.rms(audioop.ulaw2lin(mulaw, 2), 2) >= SPEECH_RMS:
+                self.speech_frames.append(time.monotonic())
+        return frame["message"]
+
+    async def send_json(self, message: dict):
+        now = time.monotonic()
+        self.sent.append((now, message))
+        event = message.get("event")
+        if event == "media":
+            audio_ms = len(base64.b64decode(message["media"]["payload"])) * 2 / PCM_BYTES_PER_MS
+            self.playback_end = max(self.playback_end, now) + audio_ms / 1000
+        elif event == "mark":
+            self.echoes.append((max(self.playback_end, now), message))
+            self._wake.set()
+        elif event == "clear":
+            self.playback_end = now
+            self.echoes = deque((now, mark) for _, mark in self.echoes)
+            self._wake.set()
+
+    async def close(self, *args, **kwargs):
+        self.closed_at = time.monotonic()
+        self._wake.set()
+
+
+def _patch_providers(script: ReplayScript):
+    """Swaps the orchestrator's provider classes for stubs; returns a restore callback."""
+    stub_stt, stub_llm, stub_tts, stub_tools = script.build()
+    replacements = {
+        "DeepgramService": stub_stt,
+        "OpenAIService": stub_llm,
+        "ElevenLabsService": stub_tts,
+        "ToolExecutor": stub_tools,
+        "TelemetryService": StubTelemetry,
+        "RetrievalService": StubRetrieval,
+        "pii_redactor": StubRedactor(),
+    }
+    originals = {name: getattr(orchestrator_module, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(orchestrator_module, name, value)
+    # Captured LLM output was recorded after hedging; replay it as a single route
+    hedge_enabled, orchestrator_module.settings.LLM_HEDGE_ENABLED = orchestrator_module.settings.LLM_HEDGE_ENABLED, False
+
+    def restore():
+        for name, value in originals.items():
+            setattr(orchestrator_module, name, value)
+        orchestrator_module.settings.LLM_HEDGE_ENABLED = hedge_enabled
+    return restore
+
+
+def _first_after(times: List[float], start: float, end: float):
+    for t in times:
+        if start <= t < end:
+            return t
+    return None
+
+
+def _ms(a, b):
+    return round((b - a) * 1000, 1) if a is not None and b is not None else None
+
+
+def turn_breakdown(commits: List[float], marks: List, speech_frames: List[float], sent: List) -> List[Dict]:
+    by_kind = {}
+    for t, kind in marks:
+        by_kind.setdefault(kind, []).append(t)
+    media_out = [t for t, message in sent if message.get("event") == "media"]
+
+    turns = []
+    for i, commit in enumerate(commits):
+        end = commits[i + 1] if i + 1 < len(commits) else float("inf")
+        speech = [t for t in speech_frames if t <= commit]
+        speech_end = speech[-1] + 0.02 if speech else None # Frames are stamped at their start
+
+        llm_request = _first_after(by_kind.get("llm_request", []), commit, end)
+        first_token = _first_after(by_kind.get("llm_first_token", []), commit, end)
+        tts_text = _first_after(by_kind.get("tts_first_text", []), commit, end)
+        tts_audio = _first_after(by_kind.get("tts_first_audio", []), commit, end)
+        first_media = _first_after(media_out, commit, end)
+
+        turns.append({
+            "turn": i + 1,
+            "endpoint_ms": _ms(speech_end, commit),
+            "dispatch_ms": _ms(commit, llm_request),
+            "llm_ttft_ms": _ms(llm_request, first_token),
+            "tts_wait_ms": _ms(first_token, tts_text),
+            "tts_ttfb_ms": _ms(tts_text, tts_audio),
+            "send_ms": _ms(tts_audio, first_media),
+            "total_ms": _ms(speech_end, first_media),
+            "llm_requests": len([t for t in by_kind.get("llm_request", []) if commit <= t < end]),
+            "tool_calls": len([t for t in by_kind.get("tool", []) if commit <= t < end]),
+        })
+    return turns
+
+
+class ReplayHarness:
+    def __init__(self, capture: dict, latency_scale: float = 1.0, tail_seconds: float = 5.0, agent_config: dict = None):
+        self.capture = capture
+        self.latency_scale = latency_scale
+        self.tail_seconds = tail_seconds
+        # Overrides on top of the captured agent config (e.g. turn detection tuning)
+        self.agent_config = agent_config or {}
+
+    async def _run(self) -> Dict:
+        script = ReplayScript(self.capture, self.latency_scale)
+        restore = _patch_providers(script)
+        try:
+            websocket = ReplayWebSocket(script, self.tail_seconds)
+            config = {**self.capture["call"].get("agent_config", {}), **self.agent_config}
+            config["call_context"] = self.capture["call"].get("call_context", {})
+
+            orchestrator = orchestrator_module.StreamOrchestrator(websocket, config)
+            commits = []
+            commit_user_turn = orchestrator.commit_user_turn
+
+            def timed_commit(text: str):
+                commits.append(time.monotonic())
+                commit_user_turn(text)
+            orchestrator.commit_user_turn = timed_commit
+
+            script.started = time.monotonic()
+            await orchestrator.handle_stream()
+        finally:
+            restore()
+
+        return {
+            "turns": turn_breakdown(commits, script.marks, websocket.speech_frames, websocket.sent),
+            "history": orchestrator.conversation_history,
+            "metrics": orchestrator.telemetry.call_ended,
+            "live": [message for _, message in orchestrator.telemetry.redis.published],
+            "media_frames_sent": sum(1 for _, m in websocket.sent if m.get("event") == "media"),
+        }
+
+    def run(self) -> Dict:
+        return run_virtual(self._run())
+
+
+def summarize(turns: List[Dict]) -> Dict:
+    summary = {}
+    for key in ("endpoint_ms", "llm_ttft_ms", "tts_ttfb_ms", "total_ms"):
+        values = [t[key] for t in turns if t[key] is not None]
+        if values:
+            summary[key] = {"median": statistics.median(values), "max": max(values)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured call and report per-turn latency")
+    parser.add_argument("capture")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply provider latencies")
+    args = parser.parse_args()
+
+    result = ReplayHarness(load_capture(args.capture), latency_scale=args.latency_scale).run()
+    for turn in result["turns"]:
+        print(json.dumps(turn))
+    print(json.dumps({"summary": summarize(result["turns"])}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Local stand-ins for Deepgram, OpenAI, ElevenLabs and the tool executor.
+
+Each stub replays its entries from a capture (see app/services/call_capture.py)
+in order, with provider latencies multiplied by `latency_scale`. Timing marks
+for the per-turn report are appended to `ReplayScript.marks`.
+"""
+import asyncio
+import dataclasses
+import json
+import time
+from app.security.pii_redactor import redact_structured
+from app.services.llm.events import ContentDelta, Timing, from_dict
+from app.services.rag.context_packer import ContextPacker
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
+
+# Used when a capture runs out of entries (e.g. a code change added an LLM step)
+DEFAULT_LLM_REPLY = [[300.0, "Okay."]]
+DEFAULT_TTS_TTFB_MS = 250.0
+DEFAULT_TTS_MS_PER_CHAR = 60
+TTS_CHUNK_BYTES = 200 * PCM_BYTES_PER_MS
+
+
+class ReplayScript:
+    """Shared state for one replay: remaining provider entries + timing marks."""
+
+    def __init__(self, capture: dict, latency_scale: float = 1.0):
+        self.capture = capture
+        self.latency_scale = latency_scale
+        self.llm = list(capture["llm"])
+        self.tts = list(capture["tts"])
+        self.tools = list(capture["tool"])
+        self.marks = [] # (monotonic time, kind)
+        self.started = None
+
+    def mark(self, kind: str):
+        self.marks.append((time.monotonic(), kind))
+
+    async def sleep_until(self, t: float):
+        """Sleeps until `t` seconds after the call started (recorded timeline, unscaled)."""
+        delay = self.started + t - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def build(self):
+        """Provider classes bound to this script, to patch into the orchestrator module."""
+        script = self
+
+        class StubDeepgram:
+            """Replays recorded transcripts/speech events at their recorded call times."""
+
+            def __init__(self, on_transcript, on_speech_start):
+                self.on_transcript = on_transcript
+                self.on_speech_start = on_speech_start
+                self.bytes_sent = 0
+                self.reconnects = 0
+                self.failed_sends = 0
+                self._task = None
+
+            async def connect(self):
+                self._task = asyncio.create_task(self._play())
+                return True
+
+            async def _play(self):
+                events = [(e["t"], "stt", e) for e in script.capture["stt"]]
+                events += [(e["t"], "speech_started", e) for e in script.capture["speech_started"]]
+                for t, kind, event in sorted(events, key=lambda e: e[0]):
+                    await script.sleep_until(t)
+                    if kind == "speech_started":
+                        self.on_speech_start()
+                    else:
+                        if event["is_final"]:
+                            script.mark("stt_final")
+                        self.on_transcript(event["text"], event["is_final"], event.get("start"), event.get("end"))
+
+            async def send_audio(self, chunk: bytes, position: int = None) -> bool:
+                self.bytes_sent += len(chunk)
+                return True
+
+            async def finish(self):
+                if self._task:
+                    self._task.cancel()
+
+        class StubLLM:
+            def __init__(self, system_prompt: str = None, **kwargs):
+                self.system_prompt = system_prompt
+                self.requests = []
+                self.models = []
+
+            async def stream(self, messages: list, model: str = None, **kwargs):
+                self.requests.append([dict(m) for m in messages])
+                self.models.append(model)
+                items = script.llm.pop(0)["items"] if script.llm else DEFAULT_LLM_REPLY
+                script.mark("llm_request")
+                started = time.monotonic()
+                first = True
+                first_at = None
+                deltas = 0
+                for ms, item in items:
+                    delay = started + ms * script.latency_scale / 1000 - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    for event in from_dict(item):
+                        if isinstance(event, Timing):
+                            continue # Recorded timing; the replay produces its own
+                        if isinstance(event, ContentDelta):
+                            deltas += 1
+                            if first:
+                                script.mark("llm_first_token")
+                                first, first_at = False, time.monotonic()
+                        yield event
+                finished = time.monotonic()
+                generating = finished - first_at if first_at else 0.0
+                yield Timing(
+                    model or "replay",
+                    round((first_at - started) * 1000, 1) if first_at else None,
+                    round((finished - started) * 1000, 1),
+                    deltas,
+                    round(deltas / generating, 1) if generating else 0.0
+                )
+
+        class StubTTS:
+            def __init__(self, voice_id: str = None, **kwargs):
+                self.voice_id = voice_id
+
+            async def stream_audio(self, text_iterator):
+                entry = script.tts.pop(0) if script.tts else None
+                text = []
+                first_text = asyncio.get_running_loop().create_future()
+
+                async def consume():
+                    async for chunk in text_iterator:
+                        if not first_text.done():
+                            script.mark("tts_first_text")
+                            first_text.set_result(time.monotonic())
+                        text.append(chunk)
+
+                consumer = asyncio.create_task(consume())
+                try:
+                    started = await asyncio.wait_for(first_text, timeout=30)
+                    if entry is not None:
+                        chunks = entry["chunks"]
+                    else:
+                        await consumer # No recording: size the audio from the full text
+                        audio_bytes = len("".join(text)) * DEFAULT_TTS_MS_PER_CHAR * PCM_BYTES_PER_MS
+                        chunks = [
+                            [DEFAULT_TTS_TTFB_MS + i * 50, min(TTS_CHUNK_BYTES, audio_bytes - offset)]
+                            for i, offset in enumerate(range(0, audio_bytes, TTS_CHUNK_BYTES))
+                        ]
+
+                    first = True
+                    for ms, size in chunks:
+                        delay = started + ms * script.latency_scale / 1000 - time.monotonic()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        if first:
+                            script.mark("tts_first_audio")
+                            first = False
+                        yield b"\x00\x04" * (size // 2) # Constant non-zero PCM, distinguishable from silence
+                    await consumer
+                finally:
+                    consumer.cancel()
+
+        class StubTools:
+            def __init__(self, tool_names=None, context=None):
+                self.tool_names = tool_names
+                self.context = context
+
+            async def execute(self, name: str, raw_args: str) -> str:
+                entry = script.tools.pop(0) if script.tools else {"result": "{}", "latency_ms": 0}
+                script.mark("tool")
+                await asyncio.sleep(entry["latency_ms"] * script.latency_scale / 1000)
+                return entry["result"]
+
+        return StubDeepgram, StubLLM, StubTTS, StubTools
+
+
+class StubRedis:
+    """
+    Redis stand-in for the call's side channels: publish() keeps (channel, decoded
+    message) pairs; get/hset/hgetall/hdel/expire (direct or pipelined) work on `values`.
+    """
+
+    def __init__(self, values: dict = None):
+        self.published = []
+        self.values = dict(values or {})
+
+    async def publish(self, channel: str, message: str):
+        self.published.append((channel, json.loads(message)))
+        return 1
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def hset(self, key: str, field: str, value: str):
+        self.values.setdefault(key, {})[field] = value
+        return 1
+
+    async def hgetall(self, key: str):
+        return dict(self.values.get(key, {}))
+
+    async def hdel(self, key: str, *fields):
+        return sum(self.values.get(key, {}).pop(field, None) is not None for field in fields)
+
+    async def expire(self, key: str, seconds: int):
+        return True
+
+    def pipeline(self, transaction: bool = True):
+        return _StubPipeline(self)
+
+
+class _StubPipeline:
+    def __init__(self, redis: StubRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await getattr(self.redis, name)(*args) for name, args in commands]
+
+
+class StubTelemetry:
+    """Collects call_ended/transcripts; tests preload Redis keys (rate card, balances) via `redis_values`."""
+
+    redis_values = {}
+
+    def __init__(self):
+        self.call_ended = None
+        self.transcripts = []
+        self.redis = StubRedis(self.redis_values)
+
+    async def emit_call_ended(self, metrics: dict):
+        self.call_ended = dict(metrics)
+
+    async def emit_transcript(self, call_id: str, role: str, content: str):
+        self.transcripts.append((role, content))
+
+
+class StubRetrieval:
+    """Knowledge base stand-in; tests set `passages` (and `latency_ms`) on the class."""
+
+    passages = []
+    latency_ms = 0
+
+    def __init__(self):
+        self.queries = []
+
+    async def retrieve(self, query: str, tenant_id: str, packer=None):
+        self.queries.append(query)
+        await asyncio.sleep(self.latency_ms / 1000)
+        return (packer or ContextPacker()).pack(query, [dataclasses.replace(p) for p in self.passages]) if self.passages else None
+
+
+class StubRedactor:
+    """Regex tier only (no process pool in tests)."""
+
+    def redact_text(self, text: str) -> str:
+        return redact_structured(text or "")
+
+    async def redact(self, text: str) -> str:
+        return self.redact_text(text)
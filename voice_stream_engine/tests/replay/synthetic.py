@@ -0,0 +1,93 @@
+"""
+Builds captures for scripted conversations, so tests don't need recorded calls.
+
+Caller speech is a tone loud enough for the local VAD, silence is digital silence.
+"""
+import audioop
+import base64
+import json
+import math
+from typing import Dict, List
+
+FRAME_MS = 20
+FRAME_SAMPLES = 160 # 20ms at 8kHz
+
+_TONE = b"".join(
+    int(4000 * math.sin(2 * math.pi * 440 * i / 8000)).to_bytes(2, "little", signed=True)
+    for i in range(FRAME_SAMPLES)
+)
+SPEECH_PAYLOAD = base64.b64encode(audioop.lin2ulaw(_TONE, 2)).decode()
+SILENCE_PAYLOAD = base64.b64encode(audioop.lin2ulaw(bytes(FRAME_SAMPLES * 2), 2)).decode()
+
+
+def _media(t: float, payload: str) -> Dict:
+    message = {"event": "media", "streamSid": "MZreplay", "media": {"payload": payload}}
+    return {"type": "twilio", "t": round(t, 3), "message": json.dumps(message)}
+
+
+def build_capture(turns: List[Dict], agent_config: Dict = None, lead_in_ms: int = 500) -> Dict:
+    """
+    `turns`: one dict per user turn, e.g.
+        {"user": "What are your hours?", "interim": "What are your", "speech_ms": 1200, "stt_delay_ms": 150,
+         "reply": ["We're open", " nine to five."], "llm_ttft_ms": 300, "token_ms": 25,
+         "tts_ttfb_ms": 200, "gap_ms": 3000}
+    `gap_ms` is the silence after the user stops talking (the agent answers in it).
+    `reply` items may also be serialized LLM events (e.g. a ToolCallComplete dict).
+    """
+    capture = {
+        "call": {
+            "type": "call",
+            "version": 1,
+            "call_id": "synthetic",
+            "agent_config": {"system_prompt": "You are a helpful receptionist.", "voice_id": "replay", **(agent_config or {})},
+            "call_context": {"direction": "inbound"},
+        },
+        "twilio": [
+            {"type": "twilio", "t": 0.0, "message": json.dumps({"event": "connected", "protocol": "Call"})},
+            {"type": "twilio", "t": 0.0, "message": json.dumps({"event": "start", "start": {"streamSid": "MZreplay"}})},
+        ],
+        "stt": [], "speech_started": [], "llm": [], "tool": [], "tts": [],
+    }
+
+    t = 0.0
+    for _ in range(lead_in_ms // FRAME_MS):
+        capture["twilio"].append(_media(t, SILENCE_PAYLOAD))
+        t += FRAME_MS / 1000
+
+    for turn in turns:
+        speech_start = t
+        for _ in range(turn.get("speech_ms", 1200) // FRAME_MS):
+            capture["twilio"].append(_media(t, SPEECH_PAYLOAD))
+            t += FRAME_MS / 1000
+        speech_end = t
+
+        words = turn["user"].split()
+        stt_delay = turn.get("stt_delay_ms", 150) / 1000
+        capture["speech_started"].append({"type": "speech_started", "t": round(speech_start + 0.1, 3)})
+        capture["stt"].append({
+            "type": "stt", "t": round((speech_start + speech_end) / 2, 3),
+            "text": turn.get("interim") or " ".join(words[:max(1, len(words) // 2)]), "is_final": False,
+        })
+        capture["stt"].append({"type": "stt", "t": round(speech_end + stt_delay, 3), "text": turn["user"], "is_final": True})
+
+        ttft = turn.get("llm_ttft_ms", 300)
+        token_ms = turn.get("token_ms", 25)
+        capture["llm"].append({
+            "type": "llm", "t": round(speech_end, 3),
+            "items": [[ttft + i * token_ms, token] for i, token in enumerate(turn["reply"])],
+        })
+
+        reply_text = "".join(item for item in turn["reply"] if isinstance(item, str))
+        reply_ms = len(reply_text) * 60
+        ttfb = turn.get("tts_ttfb_ms", 200)
+        if reply_text: # Nothing is synthesized for a tool-call-only reply
+            capture["tts"].append({
+                "type": "tts", "t": round(speech_end, 3), "text": reply_text,
+                "chunks": [[ttfb + i * 50, 3200] for i in range(max(1, reply_ms // 200))],
+            })
+
+        for _ in range(turn.get("gap_ms", 3000) // FRAME_MS):
+            capture["twilio"].append(_media(t, SILENCE_PAYLOAD))
+            t += FRAME_MS / 1000
+
+    return capture
@@ -0,0 +1,32 @@
+from app.utils.audio_buffer import AudioRingBuffer
+
+
+def test_writes_wrap_around_and_reads_span_the_seam():
+    ring = AudioRingBuffer(8)
+    ring.write(b"abcdef")
+    assert ring.peek(4) == b"abcd"
+    ring.advance(4)
+
+    ring.write(b"ghij") # Wraps: positions 8..9 land at the start of the buffer
+    assert ring.pending == 6 and ring.dropped_bytes == 0
+    assert ring.peek(10) == b"efghij"
+    assert ring.tail(3) == b"hij"
+
+
+def test_slow_reader_skips_overwritten_audio():
+    ring = AudioRingBuffer(8)
+    ring.write(b"0123456789") # Larger than the buffer: only the newest 8 bytes survive
+    assert (ring.oldest_pos, ring.read_pos, ring.dropped_bytes) == (2, 2, 2)
+    assert ring.peek(8) == b"23456789"
+
+    ring.advance(3)
+    ring.write(b"abcd")
+    assert ring.dropped_bytes == 3 # "01", then "5": overwritten before they were read
+    assert ring.peek(8) == b"6789abcd" and ring.pending == 8
+
+
+def test_read_range_clamps_to_what_is_retained():
+    ring = AudioRingBuffer(4)
+    ring.write(b"abcdef")
+    assert ring.read_range(0, 10) == b"cdef" # Position 0 is gone; start at the oldest retained
+    assert ring.read_range(6, 10) == b""
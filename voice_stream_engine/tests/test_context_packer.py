@@ -0,0 +1,31 @@
+from app.services.rag.context_packer import ContextPacker, Passage, estimate_tokens
+
+DOC = (
+    "Our clinic is open from nine to five on weekdays. Saturday hours are ten until two. "
+    "We are closed on Sundays and public holidays. Walk-ins are welcome before noon. "
+    "Parking is free in the lot behind the building. Bring your insurance card to every visit. "
+)
+
+
+def test_overlapping_chunks_are_merged_and_duplicates_dropped():
+    # Two neighbouring chunks sharing ~70 chars, as the ingestion splitter produces them
+    first, second = DOC[:160], DOC[90:]
+    hits = [
+        Passage(first, "faq.pdf", 0.82),
+        Passage(second, "faq.pdf", 0.77),
+        Passage(first, "faq-copy.pdf", 0.80), # Same text uploaded twice
+        Passage("Unrelated text about billing codes.", "billing.pdf", 0.30), # Under the score floor
+    ]
+    packed = ContextPacker({"max_tokens": 500}).pack("When is parking free?", hits)
+
+    assert packed.text == DOC
+    assert (packed.hits, packed.used, packed.merged, packed.duplicates) == (3, 1, 1, 1)
+
+
+def test_context_is_trimmed_to_the_token_budget():
+    hits = [Passage(DOC * 4, "faq.pdf", 0.9), Passage("Saturday hours are ten until two.", "hours.pdf", 0.6)]
+    packed = ContextPacker({"max_tokens": 60, "rerank": False}).pack("Saturday hours", hits)
+
+    assert packed.tokens <= 60
+    assert packed.text.endswith(".") # Cut on a sentence boundary
+    assert packed.tokens == estimate_tokens(packed.text)
@@ -0,0 +1,37 @@
+import asyncio
+import json
+import time
+from app.services.cost_meter import RATE_CARD_KEY, CostMeter, balance_key, inflight_key
+from tests.replay.stubs import StubRedis
+
+RATES = {"per_minute": 0.06, "llm_input_1k": 0.0, "llm_output_1k": 0.0, "llm_fast_input_1k": 0.0,
+         "llm_fast_output_1k": 0.0, "tts_1k_chars": 0.0, "margin": 0.0}
+IDLE = {"input_tokens": 0, "output_tokens": 0, "tts_characters": 0}
+FAST = {"input_tokens": 0, "output_tokens": 0}
+
+
+def test_estimates_are_kept_per_call_and_a_dead_pods_share_ages_out():
+    now = time.time()
+    key = inflight_key("t1")
+    redis = StubRedis({
+        RATE_CARD_KEY: json.dumps(RATES),
+        balance_key("t1"): "10.0",
+        key: {
+            "live-call": json.dumps({"cost": 2.0, "at": now - 5}),
+            # Its pod died an hour ago; the tenant's other calls kept syncing since
+            "dead-call": json.dumps({"cost": 7.0, "at": now - 3600}),
+        },
+    })
+
+    async def run():
+        meter = CostMeter(redis, "t1", "this-call")
+        await meter.start()
+        meter.update(60, IDLE, FAST) # One minute: 0.06
+        await meter.sync()
+        return meter
+
+    meter = asyncio.run(run())
+
+    assert round(meter.remaining, 2) == 10.0 - 2.0 - 0.06
+    assert set(redis.values[key]) == {"live-call", "this-call"} # Stale entry pruned
+    assert json.loads(redis.values[key]["this-call"])["cost"] == meter.synced
@@ -0,0 +1,86 @@
+import array
+import asyncio
+from app.core.config import settings
+from app.services import orchestrator as orchestrator_module
+from app.services.listen_in import ListenTap, listen_hub
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
+from tests.replay.harness import ReplayWebSocket, _patch_providers
+from tests.replay.stubs import ReplayScript
+from tests.replay.synthetic import build_capture
+
+FRAME = 20 * PCM_BYTES_PER_MS # One Twilio media frame
+
+
+def _pcm(value: int, n_bytes: int = FRAME) -> bytes:
+    return array.array("h", [value] * (n_bytes // 2)).tobytes()
+
+
+def test_tap_encodes_once_per_frame_and_drops_for_slow_listeners(monkeypatch):
+    monkeypatch.setattr(settings, "LISTEN_FRAME_MS", 40)
+    monkeypatch.setattr(settings, "LISTEN_QUEUE_FRAMES", 2)
+
+    async def run():
+        tap = ListenTap("call-1")
+        mixed = [tap.add_listener("mixed", "pcm16") for _ in range(3)]
+        dual = tap.add_listener("dual", "pcm16")
+
+        # Agent reply queued ahead of playback: it is heard from the next caller frame on
+        tap.outbound(_pcm(100, FRAME * 3))
+        for _ in range(2):
+            tap.inbound(_pcm(10))
+        # Barge-in: the rest of the reply is never heard
+        tap.clear()
+        for _ in range(4):
+            tap.inbound(_pcm(10))
+        tap.close()
+        return tap, mixed, dual
+
+    tap, mixed, dual = asyncio.run(run())
+
+    # 3 frames x 2 (mode, encoding) pairs in use, whatever the number of listeners
+    assert tap.frames == 6
+    # Nobody read: each queue kept the newest 2 items (last frame + end marker)
+    assert all(listener.dropped == 2 for listener in mixed + [dual])
+    frames = [listener.queue.get_nowait() for listener in mixed]
+    assert frames[0] is frames[1] is frames[2] # Shared, not copied per listener
+    assert frames[0] == _pcm(10, FRAME * 2) and mixed[0].queue.get_nowait() is None
+    # Dual channel: left = caller, right = agent (silent after the clear)
+    assert array.array("h", dual.queue.get_nowait())[:2].tolist() == [10, 0]
+    assert tap.stats()["listen_in_dropped_frames"] == 8
+
+
+def test_reply_is_mixed_on_the_caller_timeline():
+    tap = ListenTap("call-2")
+    tap.outbound(_pcm(100, FRAME))
+
+    async def run():
+        listener = tap.add_listener("mixed", "pcm16")
+        for _ in range(settings.LISTEN_FRAME_MS // 20):
+            tap.inbound(_pcm(10))
+        return listener.queue.get_nowait()
+
+    frame = array.array("h", asyncio.run(run()))
+    assert frame[0] == 110 and frame[-1] == 10
+
+
+def test_no_tap_is_left_open_when_the_call_never_starts(monkeypatch):
+    monkeypatch.setattr(settings, "LISTEN_IN_ENABLED", True)
+    script = ReplayScript(build_capture([]))
+    restore = _patch_providers(script)
+
+    class DeadStt(orchestrator_module.DeepgramService):
+        async def connect(self):
+            return False
+
+    monkeypatch.setattr(orchestrator_module, "DeepgramService", DeadStt)
+
+    async def run():
+        orchestrator = orchestrator_module.StreamOrchestrator(ReplayWebSocket(script, 0), script.capture["call"]["agent_config"])
+        await orchestrator.handle_stream()
+        return orchestrator.call_id
+
+    try:
+        call_id = asyncio.run(run())
+    finally:
+        restore()
+    assert listen_hub.get(call_id) is None
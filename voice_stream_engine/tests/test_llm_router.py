@@ -0,0 +1,37 @@
+import asyncio
+from app.core.config import settings
+from app.services.llm.events import ContentDelta, Usage
+from app.services.llm.router import LLMRouter
+
+
+class FakeLLM:
+    def __init__(self, model: str, first_token_ms: int):
+        self.model = model
+        self.first_token_ms = first_token_ms
+
+    async def stream(self, messages: list, model: str = None, **kwargs):
+        model = model or self.model
+        await asyncio.sleep(self.first_token_ms / 1000)
+        yield ContentDelta(f"from {model}")
+        yield Usage(model, 100, 5)
+
+
+def test_hedge_win_is_counted_per_route_and_the_losers_prompt_is_kept(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_OBSERVE_SECONDS", 0.05)
+    router = LLMRouter(FakeLLM("large", 200), FakeLLM("mini", 10), first_token_deadline_ms=20,
+                       routes={"mini": "fast", "large": "large"})
+
+    async def run():
+        events = [event async for event in router.stream([{"role": "user", "content": "hi " * 40}], model="large")]
+        await router.close() # Closes (and counts) the loser still being observed
+        return events
+
+    events = asyncio.run(run())
+
+    # The hedge answered: its usage carries its own model, which is what gets priced
+    assert events == [ContentDelta("from mini"), Usage("mini", 100, 5)]
+    stats = router.stats()
+    assert stats["llm_large_hedged"] == 1 and stats["llm_fast_hedged"] == 0 and stats["llm_hedge_wins"] == 1
+    abandoned = router.take_abandoned()
+    assert list(abandoned) == ["large"] and abandoned["large"] > 30
+    assert stats["llm_abandoned_input_tokens"] == abandoned["large"] and router.take_abandoned() == {}
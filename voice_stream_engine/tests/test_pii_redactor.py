@@ -0,0 +1,27 @@
+from app.security.pii_redactor import redact_structured
+
+
+def test_luhn_valid_card_numbers_are_redacted():
+    assert redact_structured("Card 4111 1111 1111 1111, exp 04/27") == "Card <CREDIT_CARD>, exp 04/27"
+    assert redact_structured("it's 5500-0000-0000-0004") == "it's <CREDIT_CARD>"
+    assert redact_structured("4111111111111111") == "<CREDIT_CARD>"
+
+
+def test_long_numbers_failing_luhn_stay_readable():
+    # Order / tracking numbers of card length are not cards
+    assert redact_structured("Order 4111 1111 1111 1112 shipped") == "Order 4111 1111 1111 1112 shipped"
+
+
+def test_card_is_not_half_matched_as_a_phone_or_ssn():
+    text = redact_structured("Call 415-555-0100 or use 4111111111111111, SSN 123-45-6789, mail a@b.com")
+    assert text == "Call <PHONE> or use <CREDIT_CARD>, SSN <SSN>, mail <EMAIL>"
+
+
+def test_order_and_account_numbers_are_not_taken_for_ssns_or_phones():
+    assert redact_structured("my order number is 123456789") == "my order number is 123456789"
+    assert redact_structured("account 1234567890") == "account 1234567890"
+    # Written like an SSN, but not a number the SSA issues
+    for number in ("000-12-3456", "666-12-3456", "912-34-5678", "123-00-4567", "123-45-0000"):
+        assert redact_structured(f"ref {number}") == f"ref {number}"
+    assert redact_structured("ssn 123 45 6789") == "ssn <SSN>"
+    assert redact_structured("call (415) 555 0100 or 4155550100") == "call <PHONE> or <PHONE>"
@@ -0,0 +1,196 @@
+import json
+from app.core.config import settings
+from app.services.call_capture import load_capture
+from app.services.rag.context_packer import Passage
+from tests.replay import ReplayHarness, build_capture, summarize
+from app.services.cost_meter import RATE_CARD_KEY, balance_key
+from tests.replay.stubs import StubRetrieval, StubTelemetry
+
+TURNS = [
+    {"user": "What are your hours?", "reply": ["We're open", " nine to five", " on weekdays."]},
+    {"user": "Do you take walk-ins?", "reply": ["Yes,", " walk-ins are welcome."], "llm_ttft_ms": 450},
+]
+
+# Mouth-to-ear budget for the scripted provider latencies above
+TOTAL_BUDGET_MS = 1200
+
+
+def test_replay_reports_per_turn_latency():
+    result = ReplayHarness(build_capture(TURNS)).run()
+    turns = result["turns"]
+
+    assert len(turns) == 2
+    assert [t["llm_ttft_ms"] for t in turns] == [300.0, 450.0]
+    assert all(t["tts_ttfb_ms"] == 200.0 for t in turns)
+    for turn in turns:
+        assert turn["total_ms"] <= TOTAL_BUDGET_MS, f"turn {turn['turn']} over budget: {turn}"
+
+    assert [m["role"] for m in result["history"]] == ["user", "assistant", "user", "assistant"]
+    assert result["history"][1]["content"] == "We're open nine to five on weekdays."
+    assert result["media_frames_sent"] > 0
+
+
+def test_replay_is_deterministic():
+    capture = build_capture(TURNS)
+    assert ReplayHarness(capture).run()["turns"] == ReplayHarness(capture).run()["turns"]
+
+
+def test_latency_scale_shows_up_in_provider_stages():
+    capture = build_capture(TURNS)
+    base = ReplayHarness(capture).run()["turns"]
+    slow = ReplayHarness(capture, latency_scale=2.0).run()["turns"]
+
+    for fast_turn, slow_turn in zip(base, slow):
+        assert slow_turn["llm_ttft_ms"] == 2 * fast_turn["llm_ttft_ms"]
+        assert slow_turn["tts_ttfb_ms"] == 2 * fast_turn["tts_ttfb_ms"]
+        # Turn detection is not a provider latency; it must not move
+        assert slow_turn["endpoint_ms"] == fast_turn["endpoint_ms"]
+    assert summarize(slow)["total_ms"]["max"] > summarize(base)["total_ms"]["max"]
+
+
+def test_capture_round_trip(tmp_path, monkeypatch):
+    # Record a replayed call with capture on, then replay the capture it wrote
+    monkeypatch.setattr(settings, "CAPTURE_ENABLED", True)
+    monkeypatch.setattr(settings, "CAPTURE_DIR", str(tmp_path))
+    first = ReplayHarness(build_capture(TURNS)).run()
+    capture_path = first["metrics"]["capture_path"]
+
+    monkeypatch.setattr(settings, "CAPTURE_ENABLED", False)
+    capture = load_capture(capture_path)
+    assert len(capture["llm"]) == 2 and len(capture["tts"]) == 2
+
+    second = ReplayHarness(capture).run()
+    assert second["history"] == first["history"]
+    for original, replayed in zip(first["turns"], second["turns"]):
+        assert replayed["llm_ttft_ms"] == original["llm_ttft_ms"]
+        assert abs(replayed["total_ms"] - original["total_ms"]) <= 20 # One frame of timing slack
+
+
+def test_barge_in_keeps_only_heard_reply_in_history():
+    reply = ["Our clinic is open from nine in the morning", " until five in the evening on weekdays,",
+             " and from ten until two on Saturdays."]
+    turns = [
+        # The caller starts talking ~1.5s into a ~7s answer
+        {"user": "What are your hours?", "reply": reply, "gap_ms": 1500},
+        {"user": "Saturdays?", "reply": ["Ten until two."]},
+    ]
+    result = ReplayHarness(build_capture(turns)).run()
+
+    heard = result["history"][1]["content"]
+    assert result["history"][1]["role"] == "assistant"
+    assert heard and "".join(reply).startswith(heard) and len(heard) < len("".join(reply)) // 2
+    assert result["metrics"]["interrupted_turns"] == 1
+    assert result["metrics"]["history_chars_trimmed"] == len("".join(reply)) - len(heard)
+
+    # Time to audible comes from the marks the fake Twilio echoed at playback time
+    assert result["metrics"]["audible_turns"] == 2
+    assert 0 < result["metrics"]["audible_latency_max_ms"] <= TOTAL_BUDGET_MS
+
+
+def test_barge_in_while_a_tts_segment_is_open_does_not_swallow_the_next_reply():
+    turns = [
+        # The LLM stalls after its first token and no audio has come back when the caller cuts in
+        {"user": "What are your hours?", "reply": ["Our clinic", " is open nine to five."], "token_ms": 4000,
+         "tts_ttfb_ms": 3000, "gap_ms": 1500},
+        {"user": "Saturdays?", "reply": ["Yes, ten until two."]},
+    ]
+    result = ReplayHarness(build_capture(turns)).run()
+    second = result["turns"][1]
+
+    assert second["tts_ttfb_ms"] is not None and second["send_ms"] is not None
+    assert second["total_ms"] <= TOTAL_BUDGET_MS
+    assert result["history"][-1] == {"role": "assistant", "content": "Yes, ten until two."}
+    assert result["metrics"]["tts_characters"] == len("Our clinic") + len("Yes, ten until two.")
+
+def test_turn_cancelled_mid_tool_leaves_every_tool_call_answered():
+    booking = {"type": "ToolCallComplete", "id": "call_1", "name": "book_appointment",
+               "arguments": '{"date": "2024-06-07", "time": "10:00"}'}
+    turns = [
+        # The caller talks again while the booking tool is still running
+        {"user": "Book me in for Friday at ten.", "reply": [booking], "gap_ms": 1500},
+        {"user": "Actually, make it eleven.", "reply": ["Sure, eleven it is."]},
+    ]
+    capture = build_capture(turns)
+    capture["tool"].append({"type": "tool", "name": "book_appointment", "result": "Booked.", "latency_ms": 5000})
+    # No speech-start barge-in: the commit itself cancels the turn, after the new user line is in the history
+    capture["speech_started"].pop()
+    history = ReplayHarness(capture).run()["history"]
+
+    answered = {m["tool_call_id"] for m in history if m["role"] == "tool"}
+    for i, message in enumerate(history):
+        if message.get("tool_calls"):
+            ids = [call["id"] for call in message["tool_calls"]]
+            # Results follow their assistant message directly, as the API requires
+            assert [m.get("tool_call_id") for m in history[i + 1:i + 1 + len(ids)]] == ids
+    assert answered == {"call_1"}
+    assert history[-1] == {"role": "assistant", "content": "Sure, eleven it is."}
+
+def test_turns_are_routed_between_fast_and_large_models():
+    turns = [
+        {"user": "What are your hours?", "reply": ["Nine to five."]},
+        {"user": "Can I book an appointment for Friday?", "reply": ["Sure, what time?"]},
+    ]
+    metrics = ReplayHarness(build_capture(turns)).run()["metrics"]
+
+    assert metrics["llm_fast_turns"] == 1
+    assert metrics["llm_large_turns"] == 1
+
+
+def test_rag_lookup_is_prefetched_while_the_caller_talks(monkeypatch):
+    monkeypatch.setattr(StubRetrieval, "passages", [Passage("Parking is free behind the clinic.", "faq.pdf", 0.8)])
+    monkeypatch.setattr(StubRetrieval, "latency_ms", 300)
+    turns = [
+        # The interim already carries the question: its lookup is done before the turn commits
+        {"user": "Is parking free at the clinic?", "interim": "Is parking free at the", "reply": ["Yes, it's free."]},
+        # Nothing to look up in the interim: the lookup starts on the final, before the endpoint wait ends
+        {"user": "Thanks, and do you open on Saturday mornings?", "interim": "Thanks and", "reply": ["Yes, ten to two."]},
+    ]
+    result = ReplayHarness(build_capture(turns, {"tenant_id": "t1"})).run()
+    metrics, (first, second) = result["metrics"], result["turns"]
+
+    assert metrics["rag_hits"] == 2
+    assert metrics["rag_prefetch_hit_rate"] == 1.0
+    assert first["dispatch_ms"] == 0.0
+    assert 0.0 < second["dispatch_ms"] < 300.0
+    assert metrics["rag_prefetch_saved_ms"] == 300.0 + (300.0 - second["dispatch_ms"])
+
+
+def test_live_transcript_is_coalesced(monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_TRANSCRIPT_MAX_RATE_HZ", 0.5)
+    turns = [
+        {"user": "What are your hours?", "interim": "What are", "reply": ["Nine to five", " on weekdays."]},
+        {"user": "And on Saturday?", "reply": ["Ten until two."]},
+    ]
+    result = ReplayHarness(build_capture(turns, {"tenant_id": "t1"})).run()
+    live, metrics = result["live"], result["metrics"]
+
+    assert live[0]["type"] == "call_started" and live[-1]["type"] == "call_ended"
+    assert [message["seq"] for message in live] == list(range(1, len(live) + 1))
+    # No line is lost to coalescing
+    finals = [(line["role"], line["text"]) for message in live for line in message.get("finals", [])]
+    assert finals == [("user", "What are your hours?"), ("assistant", "Nine to five on weekdays."),
+                      ("user", "And on Saturday?"), ("assistant", "Ten until two.")]
+    # At most one transcript message per 2s window (the end-of-call flush aside)
+    sent = [message["ts"] for message in live if message["type"] == "transcript"][:-1]
+    assert all(b - a >= 2.0 for a, b in zip(sent, sent[1:]))
+    assert len(sent) + 1 < metrics["live_transcript_updates"]
+
+
+def test_call_ends_gracefully_when_the_tenant_runs_out_of_credit(monkeypatch):
+    rate_card = {"per_minute": 0.057, "llm_input_1k": 0.005, "llm_output_1k": 0.015, "llm_fast_input_1k": 0.00015,
+                 "llm_fast_output_1k": 0.0006, "tts_1k_chars": 0.18, "margin": 0.2}
+    monkeypatch.setattr(StubTelemetry, "redis_values", {RATE_CARD_KEY: json.dumps(rate_card), balance_key("t1"): "0.01"})
+    turns = [
+        {"user": "What are your hours?", "reply": ["Nine to five on weekdays, and ten until two on Saturdays."]},
+        {"user": "Do you take walk-ins?", "reply": ["Yes, walk-ins are welcome."]},
+    ]
+    result = ReplayHarness(build_capture(turns, {"tenant_id": "t1"})).run()
+    metrics = result["metrics"]
+
+    # The first answer uses up the credit: the second turn gets the goodbye instead of an answer
+    assert metrics["llm_fast_turns"] + metrics["llm_large_turns"] == 1
+    assert metrics["end_reason"] == metrics["cost_stop_reason"] == "credit_exhausted"
+    spoken = [line["text"] for message in result["live"] for line in message.get("finals", []) if line["role"] == "assistant"]
+    assert spoken[-1] == settings.BILLING_CUTOFF_MESSAGE
+    assert metrics["tts_characters"] == len(turns[0]["reply"][0]) + len(settings.BILLING_CUTOFF_MESSAGE)
+    assert metrics["cost_estimate"] > 0.01
@@ -0,0 +1,77 @@
+import asyncio
+import httpx
+from app.core.config import settings
+from app.services.tools import sms_tool
+from app.services.tools.sms_tool import SmsOutbox, SmsTool
+
+
+def test_outbox_batches_per_tenant_and_retries(monkeypatch):
+    monkeypatch.setattr(settings, "SMS_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "SMS_FLUSH_INTERVAL_MS", 10)
+    monkeypatch.setattr(settings, "SMS_RETRY_BASE_DELAY", 0.01)
+    flushes = [] # Sender numbers per flush, in arrival order
+    throttled = set()
+
+    def provider(request: httpx.Request) -> httpx.Response:
+        form = dict(httpx.QueryParams(request.content.decode()))
+        flushes.append(form["From"])
+        # First attempt of every "busy" tenant message is throttled
+        if form["Body"].startswith("busy") and form["Body"] not in throttled:
+            throttled.add(form["Body"])
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(201, json={"sid": "SM1", "status": "queued"})
+
+    async def run():
+        outbox = SmsOutbox(httpx.AsyncClient(base_url="http://sms.test", transport=httpx.MockTransport(provider)))
+        for i in range(5):
+            outbox.enqueue("busy-tenant", "+14155550100", f"busy {i}", "+15550000001")
+        outbox.enqueue("quiet-tenant", "+14155550101", "quiet", "+15550000002")
+        await outbox.close(timeout=5)
+        return outbox
+
+    outbox = asyncio.run(run())
+
+    # The quiet tenant goes out in the first flush, not behind the busy tenant's backlog
+    assert flushes[:3] == ["+15550000001", "+15550000001", "+15550000002"]
+    assert outbox.stats() == {"queued": 6, "sent": 6, "failed": 0, "retried": 5, "rejected": 0, "pending": 0}
+
+
+def test_send_sms_texts_only_the_caller_and_caps_per_call(monkeypatch):
+    monkeypatch.setattr(settings, "SMS_MAX_PER_CALL", 2)
+    outbox = SmsOutbox(httpx.AsyncClient(base_url="http://sms.test", transport=httpx.MockTransport(
+        lambda request: httpx.Response(201, json={"sid": "SM1"})
+    )))
+    monkeypatch.setattr(sms_tool, "sms_outbox", outbox)
+    context = {"tenant_id": "t1", "call_id": "c1", "from_number": "+15550000001", "caller_number": "+14155550100"}
+
+    async def run():
+        results = [await SmsTool.send_sms("Your appointment is at 3pm", context) for _ in range(3)]
+        hidden = await SmsTool.send_sms("hi", {"from_number": "+15550000001", "caller_number": "anonymous"})
+        await outbox.close(timeout=5)
+        return results, hidden
+
+    results, hidden = asyncio.run(run())
+
+    assert [r.startswith("Queued") for r in results] == [True, True, False]
+    assert hidden.startswith("Error")
+    assert outbox.stats()["sent"] == 2
+
+
+def test_unexpected_send_error_counts_as_failed_and_keeps_the_worker_going(monkeypatch):
+    monkeypatch.setattr(settings, "SMS_FLUSH_INTERVAL_MS", 10)
+
+    def provider(request: httpx.Request) -> httpx.Response:
+        if "boom" in request.content.decode():
+            raise ValueError("bad response")
+        return httpx.Response(201, json={"sid": "SM1"})
+
+    async def run():
+        outbox = SmsOutbox(httpx.AsyncClient(base_url="http://sms.test", transport=httpx.MockTransport(provider)))
+        outbox.enqueue("t1", "+14155550100", "boom", "+15550000001")
+        outbox.enqueue("t1", "+14155550100", "fine", "+15550000001")
+        await outbox.close(timeout=5)
+        return outbox
+
+    outbox = asyncio.run(run())
+
+    assert outbox.stats() == {"queued": 2, "sent": 1, "failed": 1, "retried": 0, "rejected": 0, "pending": 0}
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+from app.core.config import settings
+from app.services.stt import deepgram_service
+from app.services.stt.audio_forwarder import InboundAudioForwarder
+from app.services.stt.deepgram_service import DeepgramService
+from app.utils.audio_buffer import PCM_BYTES_PER_MS
+
+CHUNK = 100 * PCM_BYTES_PER_MS
+
+
+class FakeConnection:
+    """One Deepgram socket; the first one drops after `drop_after` chunks."""
+
+    def __init__(self, drop_after: int = None):
+        self.drop_after = drop_after
+        self.received = []
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def start(self, options):
+        return True
+
+    async def send(self, chunk: bytes):
+        if self.drop_after is not None and len(self.received) >= self.drop_after:
+            return False
+        self.received.append(chunk)
+
+    async def finish(self):
+        pass
+
+    async def transcript(self, text: str, start: float, duration: float):
+        result = SimpleNamespace(
+            channel=SimpleNamespace(alternatives=[SimpleNamespace(transcript=text)]),
+            is_final=True, start=start, duration=duration
+        )
+        await self.handlers[deepgram_service.LiveTranscriptionEvents.Transcript](self, result=result)
+
+
+def test_audio_sent_during_an_outage_is_replayed_and_timestamps_stay_on_the_call_timeline(monkeypatch):
+    monkeypatch.setattr(settings, "STT_RECONNECT_BASE_DELAY", 0.01)
+    sockets = [FakeConnection(drop_after=2), FakeConnection()]
+    connections = iter(sockets)
+    client = SimpleNamespace(listen=SimpleNamespace(asynclive=SimpleNamespace(v=lambda version: next(connections))))
+    monkeypatch.setattr(deepgram_service, "DeepgramClient", lambda *args, **kwargs: client)
+    transcripts = []
+
+    async def run():
+        stt = DeepgramService(lambda *args: transcripts.append(args), lambda: None)
+        forwarder = InboundAudioForwarder(stt, chunk_ms=100, retain_seconds=2)
+        assert await stt.connect()
+        for i in range(5):
+            forwarder.push(bytes([i]) * CHUNK)
+        await forwarder.flush() # Socket drops on the 3rd chunk: it stays buffered
+        await asyncio.sleep(0.05) # Reconnect
+        await forwarder.flush()
+        await sockets[1].transcript("second socket", start=0.1, duration=0.5)
+        await stt.finish()
+        return stt, forwarder
+
+    stt, forwarder = asyncio.run(run())
+
+    assert (stt.reconnects, stt.failed_sends) == (1, 1)
+    # Nothing lost: chunks 0-1 on the first socket, 2-4 replayed on the second
+    assert [c[0] for c in sockets[0].received] == [0, 1]
+    assert [c[0] for c in sockets[1].received] == [2, 3, 4]
+    assert forwarder.buffered_seconds == 0.3 and forwarder.dropped_seconds == 0
+    # The second socket's clock starts at 0.2s of call audio
+    text, is_final, start, end = transcripts[0]
+    assert (text, is_final) == ("second socket", True)
+    assert round(start, 3) == 0.3 and round(end, 3) == 0.8
@@ -0,0 +1,113 @@
+import array
+from app.services.turn.turn_detector import TurnDetector
+
+
+def _frame(value: int) -> bytes:
+    return array.array("h", [value, -value] * 80).tobytes() # 20ms at 8kHz, RMS == value
+
+
+def _detector(**config) -> TurnDetector:
+    return TurnDetector({"enabled": True, **config})
+
+
+def test_vad_threshold_starts_the_silence_clock():
+    detector = _detector(vad_rms_threshold=500)
+    detector.on_audio(_frame(499), now=0.0)
+    assert not detector.speaking # Line noise under the threshold is not speech
+
+    detector.on_audio(_frame(500), now=0.1)
+    detector.on_transcript("What are your hours?", is_final=True, now=0.2)
+    assert detector.speaking and detector.poll(now=0.5) is None # Not mid-speech (only after max_silence_ms with no new words)
+
+    detector.on_audio(_frame(100), now=1.0)
+    assert detector.silence_started_at == 1.0
+
+
+def test_short_answer_ends_after_min_silence():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0)
+    detector.on_transcript("Yeah", is_final=True, now=0.3)
+    detector.on_voice_activity(False, now=0.4)
+
+    assert detector.required_silence_ms("Yeah") == 200
+    assert detector.poll(now=0.55) is None
+    assert detector.poll(now=0.65) == "Yeah"
+    assert detector.pending_text == "" # Reset for the next turn
+
+
+def test_trailing_continuation_word_waits_for_max_silence():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0)
+    detector.on_transcript("I'd like to book for", is_final=True, now=0.5)
+    detector.on_voice_activity(False, now=0.6)
+
+    assert detector.poll(now=1.2) is None # Default 500ms would have ended it
+    assert detector.poll(now=1.6) == "I'd like to book for"
+
+
+def test_turn_on_an_interim_swallows_its_late_final():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0)
+    detector.on_transcript("Can I book tomorrow", is_final=False, now=0.4)
+    detector.on_voice_activity(False, now=0.5)
+
+    assert detector.poll(now=0.9) is None # Neutral utterance: 500ms
+    assert detector.poll(now=1.0) == "Can I book tomorrow"
+    detector.on_transcript("Can I book tomorrow?", is_final=True, now=1.1)
+    assert detector.pending_text == ""
+
+
+def test_final_ends_the_turn_when_line_noise_keeps_the_vad_on():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0) # Noise above the threshold, never silence
+    detector.on_transcript("yes.", is_final=True, now=0.5)
+
+    assert detector.poll(now=1.0) is None
+    assert detector.poll(now=1.5) == "yes." # max_silence_ms after the last transcript change
+    assert detector.speaking
+
+
+def test_late_final_arriving_after_the_caller_goes_on_is_not_repeated():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0)
+    detector.on_transcript("what time is it?", is_final=False, now=0.4)
+    detector.on_voice_activity(False, now=0.5)
+    assert detector.poll(now=0.75) == "what time is it?"
+
+    # Caller goes on before Deepgram finalizes the first utterance
+    detector.on_voice_activity(True, now=0.8)
+    detector.on_transcript("what time is it?", is_final=True, now=0.9)
+    detector.on_transcript("and where", is_final=False, now=1.2)
+    detector.on_transcript("and where", is_final=True, now=1.4)
+    detector.on_voice_activity(False, now=1.5)
+
+    assert detector.poll(now=2.1) == "and where"
+
+
+def test_late_final_that_runs_on_keeps_only_the_new_words():
+    detector = _detector()
+    detector.on_voice_activity(True, now=0.0)
+    detector.on_transcript("what time is it?", is_final=False, now=0.4)
+    detector.on_voice_activity(False, now=0.5)
+    assert detector.poll(now=0.75) == "what time is it?"
+
+    detector.on_voice_activity(True, now=0.8)
+    detector.on_transcript("What time is it? And where", is_final=True, now=1.4)
+    detector.on_voice_activity(False, now=1.5)
+
+    assert detector.poll(now=2.1) == "And where"
+
+
+def test_transcript_of_audio_after_the_commit_ends_the_wait_for_the_late_final():
+    detector = _detector()
+    for _ in range(50): # 1s of speech
+        detector.on_audio(_frame(1000), now=0.0)
+    detector.on_transcript("Can I book tomorrow", is_final=False, now=0.4, start=0.0)
+    detector.on_voice_activity(False, now=0.5)
+    assert detector.poll(now=1.0) == "Can I book tomorrow"
+
+    # That utterance's final never comes; the next one starts past the committed audio
+    detector.on_voice_activity(True, now=1.2)
+    detector.on_transcript("at noon", is_final=True, now=1.6, start=1.3)
+    detector.on_voice_activity(False, now=1.7)
+    assert detector.poll(now=2.3) == "at noon"